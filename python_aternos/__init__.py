@@ -9,3 +9,6 @@ from .atplayers import Lists
 from .atwss import Streams
 from .atjsparse import Js2PyInterpreter
 from .atjsparse import NodeInterpreter
+from .atjsparse import NodePipeInterpreter
+from .atjsparse import AsyncNodeInterpreter
+from .atjsparse import InterpreterPool
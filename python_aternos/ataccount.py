@@ -4,11 +4,13 @@ including servers page parsing"""
 import re
 import base64
 
+from concurrent import futures
+
+from typing import Optional
 from typing import List, Dict
+from typing import NamedTuple
 from typing import TYPE_CHECKING
 
-import lxml.html
-
 from .atlog import log
 from .atmd5 import md5encode
 
@@ -27,6 +29,25 @@ email_re = re.compile(
 )
 
 
+class FetchResult(NamedTuple):
+
+    """Result of `AternosAccount.fetch_all`
+    for one server, `error` is None on success"""
+
+    server: AternosServer
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        """Checks if the server info was fetched
+
+        Returns:
+            Is the request successful
+        """
+
+        return self.error is None
+
+
 class AternosAccount:
     """Methods related to an Aternos account
     including servers page parsing"""
@@ -62,6 +83,7 @@ class AternosAccount:
         serverspage = self.atconn.request_cloudflare(
             f'{BASE_URL}/servers/', 'GET'
         )
+        import lxml.html  # pylint: disable=import-outside-toplevel
         serverstree = lxml.html.fromstring(serverspage.content)
 
         servers = serverstree.xpath(
@@ -98,6 +120,67 @@ class AternosAccount:
 
         self.parsed = True
 
+    def fetch_all(
+            self,
+            max_workers: Optional[int] = None,
+            timeout: Optional[float] = None,
+            cache: bool = True) -> Dict[str, FetchResult]:
+        """Fetches the info of all servers (see `list_servers`)
+        concurrently from a thread pool. The requests follow
+        `AternosConnect.max_concurrent` and `min_interval` limits.
+        The server objects are updated in the calling thread,
+        so the `onchange` callbacks are called there
+
+        Args:
+            max_workers (Optional[int], optional): Threads count,
+                `AternosConnect.max_concurrent` if None
+            timeout (Optional[float], optional): Max seconds to wait
+                for all servers, the unfinished ones get TimeoutError.
+                No limit if None
+            cache (bool, optional): Use the cached servers list
+
+        Returns:
+            Dict of server ID and its result, in the `list_servers` order
+        """
+
+        servers = self.list_servers(cache)
+        if not servers:
+            return {}
+
+        workers = max_workers or self.atconn.max_concurrent
+        executor = futures.ThreadPoolExecutor(
+            max_workers=max(1, min(workers, len(servers))),
+        )
+        pending = {
+            executor.submit(srv.fetch_info): srv
+            for srv in servers
+        }
+
+        results: Dict[str, FetchResult] = {}
+        try:
+            for future in futures.as_completed(pending, timeout):
+                srv = pending[future]
+                try:
+                    srv.update(future.result())
+                    results[srv.servid] = FetchResult(srv)
+                except Exception as err:  # pylint: disable=broad-exception-caught
+                    log.warning('Unable to fetch server %s info: %s', srv.servid, err)
+                    results[srv.servid] = FetchResult(srv, err)
+
+        except futures.TimeoutError:
+            for future, srv in pending.items():
+                if srv.servid not in results:
+                    future.cancel()
+                    results[srv.servid] = FetchResult(
+                        srv, TimeoutError(f'Server {srv.servid} info is not fetched in time'),
+                    )
+
+        finally:
+            # don't wait for the requests left after the timeout
+            executor.shutdown(wait=False)
+
+        return {srv.servid: results[srv.servid] for srv in servers}
+
     def get_server(self, servid: str) -> AternosServer:
         """Creates a server object from the server ID.
         Use this instead of `list_servers` if you know
@@ -87,7 +87,7 @@ class Client:
         except (OSError, CredentialsError):
             pass
 
-        atjsparse.get_interpreter(create=self.js)
+        atjsparse.get_pool(create=self.js)
         self.atconn.parse_token()
         self.atconn.generate_sec()
 
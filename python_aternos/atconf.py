@@ -8,8 +8,6 @@ import re
 from typing import Any, Dict, List, Union, Optional
 from typing import TYPE_CHECKING
 
-import lxml.html
-
 from .atconnect import BASE_URL, AJAX_URL
 if TYPE_CHECKING:
     from .atserver import AternosServer
@@ -148,6 +146,7 @@ class AternosConfig:
         optreq = self.atserv.atserver_request(
             f'{BASE_URL}/options', 'GET'
         )
+        import lxml.html  # pylint: disable=import-outside-toplevel
         opttree = lxml.html.fromstring(optreq)
 
         tzopt = opttree.xpath(
@@ -189,6 +188,7 @@ class AternosConfig:
         optreq = self.atserv.atserver_request(
             f'{BASE_URL}/options', 'GET'
         )
+        import lxml.html  # pylint: disable=import-outside-toplevel
         opttree = lxml.html.fromstring(optreq)
         imgopt = opttree.xpath(
             '//div[@class="options-other-input image-switch"]'
@@ -345,6 +345,7 @@ class AternosConfig:
             prefixes: Optional[List[str]] = None) -> Dict[str, Any]:
 
         optreq = self.atserv.atserver_request(url, 'GET')
+        import lxml.html  # pylint: disable=import-outside-toplevel
         opttree = lxml.html.fromstring(optreq.content)
         configs = opttree.xpath('//div[@class="config-options"]')
 
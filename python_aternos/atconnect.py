@@ -2,6 +2,7 @@
 
 import re
 import time
+import threading
 
 import string
 import secrets
@@ -10,10 +11,7 @@ from functools import partial
 
 from typing import Optional
 from typing import List, Dict, Any
-
-import requests
-
-from cloudscraper import CloudScraper
+from typing import TYPE_CHECKING
 
 from .atlog import log, is_debug
 
@@ -22,6 +20,10 @@ from .aterrors import TokenError
 from .aterrors import CloudflareError
 from .aterrors import AternosPermissionError
 
+if TYPE_CHECKING:
+    import requests
+    from cloudscraper import CloudScraper
+
 
 BASE_URL = 'https://aternos.org'
 AJAX_URL = f'{BASE_URL}/ajax'
@@ -44,11 +46,28 @@ class AternosConnect:
 
     def __init__(self) -> None:
 
-        self.session = CloudScraper()
+        # Config
+        # seconds between two requests
+        self.min_interval = 0.0
+        # max requests being sent at once from different threads,
+        # change it before the first request
+        self.max_concurrent = 8
+        # ###
+
+        self.session = new_scraper()
         self.sec = ''
         self.token = ''
         self.atcookie = ''
 
+        # created on the first request
+        self.limiter: Optional[threading.BoundedSemaphore] = None
+        self.next_request = 0.0
+
+        # request_cloudflare replaces the session on each call,
+        # so the requests sent from several threads
+        # (e.g. by the status poller) must not do it at the same time
+        self.lock = threading.RLock()
+
     def refresh_session(self) -> None:
         """Creates a new CloudScraper
         session object and copies all cookies.
@@ -56,10 +75,66 @@ class AternosConnect:
 
         old_cookies = self.session.cookies
         captcha_kwarg = self.session.captcha
-        self.session = CloudScraper(captcha=captcha_kwarg)
+        self.session = new_scraper(captcha=captcha_kwarg)
         self.session.cookies.update(old_cookies)
         del old_cookies
 
+    def get_limiter(self) -> threading.BoundedSemaphore:
+        """Returns the semaphore limiting
+        simultaneous requests to `max_concurrent`
+
+        Returns:
+            threading.BoundedSemaphore object
+        """
+
+        with self.lock:
+            if self.limiter is None:
+                self.limiter = threading.BoundedSemaphore(self.max_concurrent)
+            return self.limiter
+
+    def wait_turn(self) -> None:
+
+        """Sleeps so that the requests
+        start at least `min_interval` seconds apart"""
+
+        if self.min_interval <= 0:
+            return
+
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_request)
+            self.next_request = start + self.min_interval
+
+        time.sleep(start - now)
+
+    def new_session(self, reqcookies: Dict[Any, Any]) -> 'CloudScraper':
+        """Refreshes the session for a request
+        and moves the session cookie to `reqcookies`.
+        Each request uses its own session object,
+        so other threads can replace `self.session` meanwhile
+
+        Args:
+            reqcookies (Dict[Any, Any]): Cookies of the request
+
+        Returns:
+            CloudScraper object for the request
+        """
+
+        with self.lock:
+
+            try:
+                self.atcookie = self.session.cookies['ATERNOS_SESSION']
+            except KeyError:
+                pass
+
+            self.refresh_session()
+
+            # requests.cookies.CookieConflictError bugfix
+            reqcookies['ATERNOS_SESSION'] = self.atcookie
+            del self.session.cookies['ATERNOS_SESSION']
+
+            return self.session
+
     def parse_token(self) -> str:
         """Parses Aternos ajax token that
         is needed for most requests
@@ -104,9 +179,9 @@ class AternosConnect:
             if len(js_code) > 1:
                 token_func = js_code[1]
 
-            js = atjsparse.get_interpreter()
-            js.exec_js(token_func)
-            self.token = js['AJAX_TOKEN']
+            with atjsparse.get_pool().acquire() as js:
+                token = js.exec_and_get(token_func, 'AJAX_TOKEN')
+            self.token = token['AJAX_TOKEN']
 
         except (IndexError, TypeError) as err:
 
@@ -163,7 +238,7 @@ class AternosConnect:
             reqcookies: Optional[Dict[Any, Any]] = None,
             sendtoken: bool = False,
             retries: int = 5,
-            timeout: int = 4) -> requests.Response:
+            timeout: int = 4) -> 'requests.Response':
         """Sends a request to Aternos API bypass Cloudflare
 
         Args:
@@ -192,13 +267,6 @@ class AternosConnect:
         if retries <= 0:
             raise CloudflareError('Unable to bypass Cloudflare protection')
 
-        try:
-            self.atcookie = self.session.cookies['ATERNOS_SESSION']
-        except KeyError:
-            pass
-
-        self.refresh_session()
-
         params = params or {}
         data = data or {}
         headers = headers or {}
@@ -214,9 +282,7 @@ class AternosConnect:
             params['SEC'] = self.sec
             headers['X-Requested-With'] = 'XMLHttpRequest'
 
-        # requests.cookies.CookieConflictError bugfix
-        reqcookies['ATERNOS_SESSION'] = self.atcookie
-        del self.session.cookies['ATERNOS_SESSION']
+        session = self.new_session(reqcookies)
 
         if is_debug():
 
@@ -227,7 +293,7 @@ class AternosConnect:
 
             session_cookies_dbg = {
                 k: str(v or '')[:3]
-                for k, v in self.session.cookies.items()
+                for k, v in session.cookies.items()
             }
 
             log.debug('Requesting(%s)%s', method, url)
@@ -239,22 +305,29 @@ class AternosConnect:
 
         if method == 'POST':
             sendreq = partial(
-                self.session.post,
+                session.post,
                 params=params,
                 data=data,
             )
         else:
             sendreq = partial(
-                self.session.get,
+                session.get,
                 params={**params, **data},
             )
 
-        req = sendreq(
-            url,
-            headers=headers,
-            cookies=reqcookies,
-            timeout=timeout,
-        )
+        with self.get_limiter():
+            self.wait_turn()
+            req = sendreq(
+                url,
+                headers=headers,
+                cookies=reqcookies,
+                timeout=timeout,
+            )
+
+        with self.lock:
+            if session is not self.session:
+                # keep the cookies set by the response
+                self.session.cookies.update(session.cookies)
 
         resp_type = req.headers.get('content-type', '')
         html_type = resp_type.find('text/html') != -1
@@ -294,3 +367,17 @@ class AternosConnect:
         return self.session.cookies.get(
             'ATERNOS_SESSION', ''
         )
+
+
+def new_scraper(**kwargs) -> 'CloudScraper':
+    """Creates a CloudScraper session.
+    cloudscraper (and requests with it) is imported here
+    instead of the module level to speed up `import python_aternos`
+
+    Returns:
+        CloudScraper object
+    """
+
+    # pylint: disable-next=import-outside-toplevel,redefined-outer-name
+    from cloudscraper import CloudScraper
+    return CloudScraper(**kwargs)
@@ -0,0 +1,291 @@
+"""Parsing Minecraft server console lines"""
+
+import re
+
+from typing import Iterable, List, Dict, Set
+from typing import NamedTuple, Optional, Union
+from typing import Hashable, Pattern
+
+
+# [23:27:07] [Server thread/INFO]: Done (3.2s)!
+# [23:27:07] [Server thread/INFO] [FML]: Injecting itemstacks
+# [28Mar2021 12:00:00.123] [Server thread/INFO] [minecraft/DedicatedServer]: Done
+log4j_re = re.compile(
+    r'\[(?P<time>[^\]]+)\] '
+    r'\[(?P<thread>[^\]]+)/(?P<level>[A-Z]+)\]'
+    r'(?: \[(?P<logger>[^\]]+)\])?'
+    r': (?P<message>.*)',
+    re.DOTALL,
+)
+
+# Paper, Spigot, Bukkit:
+# [23:27:07 INFO]: Done (3.2s)!
+# [23:27:07 INFO]: [Essentials] Loaded 36 items
+# Bedrock:
+# [2023-01-01 12:00:00:123 INFO] Server started.
+paper_re = re.compile(
+    r'\[(?P<time>\d[^\]]*?) (?P<level>[A-Z]+)\]:? '
+    r'(?:\[(?P<logger>[^\]\s]+)\] )?'
+    r'(?P<message>.*)',
+    re.DOTALL,
+)
+
+# Section sign formatting codes
+colors_re = re.compile(r'§[0-9a-fk-orxA-FK-ORX]')
+# ANSI escape sequences
+ansi_re = re.compile(r'\x1b\[[0-9;]*m')
+
+
+LOG4J_GROUPS = ('message', 'time', 'thread', 'level', 'logger')
+
+# flags that can be applied to a part of a regex
+SCOPED_FLAGS = (
+    (re.IGNORECASE, 'i'),
+    (re.MULTILINE, 'm'),
+    (re.DOTALL, 's'),
+)
+# (?i)pattern: global inline flags can't be
+# inside the combined alternation
+global_flags_re = re.compile(r'\(\?[aiLmsux]+\)')
+
+
+class ConsoleLine(NamedTuple):
+
+    """Parsed console line. For the lines
+    in an unknown format, only `message` is set"""
+
+    message: str
+    time: Optional[str] = None
+    thread: Optional[str] = None
+    level: Optional[str] = None
+    logger: Optional[str] = None
+    raw: str = ''
+
+
+def strip_colors(line: str) -> str:
+    """Removes formatting codes (e.g. `§r`, `§4`)
+    and ANSI color escape sequences
+
+    Args:
+        line (str): Console line
+
+    Returns:
+        Line without formatting
+    """
+
+    if '§' in line:
+        line = colors_re.sub('', line)
+    if '\x1b' in line:
+        line = ansi_re.sub('', line)
+    return line
+
+
+def parse_line(line: str) -> ConsoleLine:
+    """Parses a console line in the vanilla,
+    Forge or Paper format
+
+    Args:
+        line (str): Console line
+
+    Returns:
+        Parsed line
+    """
+
+    clean = strip_colors(line.strip('\r\n '))
+
+    if clean.startswith('['):
+        return parse_parts(clean, line)
+
+    return ConsoleLine(message=clean, raw=line)
+
+
+def parse_parts(clean: str, raw: str) -> ConsoleLine:
+    """Matches a line without formatting codes
+    against the known formats
+
+    Args:
+        clean (str): Line without formatting codes
+        raw (str): Original line
+
+    Returns:
+        Parsed line
+    """
+
+    match = log4j_re.match(clean)
+    if match is not None:
+        return ConsoleLine._make(
+            (*match.group(*LOG4J_GROUPS), raw)
+        )
+
+    match = paper_re.match(clean)
+    if match is not None:
+        # no thread name in this format
+        msg, time = match.group('message', 'time')
+        level, logger = match.group('level', 'logger')
+        return ConsoleLine(msg, time, None, level, logger, raw)
+
+    return ConsoleLine(message=clean, raw=raw)
+
+
+def parse_lines(lines: Iterable[str]) -> List[ConsoleLine]:
+    """Parses many console lines at once,
+    e.g. a batch from `AternosWss.wssbatcher`
+
+    Args:
+        lines (Iterable[str]): Console lines
+
+    Returns:
+        List of parsed lines
+    """
+
+    colors = colors_re.sub
+    parts = parse_parts
+
+    result: List[ConsoleLine] = []
+    append = result.append
+
+    # the same as parse_line, but with
+    # less lookups and calls per line
+    for line in lines:
+
+        clean = line.strip('\r\n ')
+        if '§' in clean:
+            clean = colors('', clean)
+        if '\x1b' in clean:
+            clean = ansi_re.sub('', clean)
+
+        if clean[:1] == '[':
+            append(parts(clean, line))
+        else:
+            append(ConsoleLine(clean, raw=line))
+
+    return result
+
+
+class PatternSet:
+
+    """Matches a line against many regexes at once.
+    Patterns without groups are merged into one alternation
+    regex, so a line that matches none of them (the most
+    common case) is rejected with a single `search` call
+    instead of one call per pattern. Only when it matches,
+    the patterns are checked one by one, starting from the
+    position of the first match. Patterns with groups,
+    re.VERBOSE or inline global flags (`(?i)...`)
+    are always checked separately"""
+
+    def __init__(self) -> None:
+
+        self.patterns: Dict[Hashable, Pattern[str]] = {}
+        self.combined: Optional[Pattern[str]] = None
+        self.merged: Dict[Hashable, Pattern[str]] = {}
+        self.separate: Dict[Hashable, Pattern[str]] = {}
+
+    def add(
+            self,
+            key: Hashable,
+            pattern: Union[str, Pattern[str]]) -> None:
+        """Adds a pattern
+
+        Args:
+            key (Hashable): Key returned by `match`
+                if the pattern matches a line
+            pattern (Union[str, Pattern[str]]): Regex
+
+        Raises:
+            re.error: If the pattern is invalid
+        """
+
+        self.patterns[key] = re.compile(pattern)
+        self.compile()
+
+    def add_keyword(self, key: Hashable, keyword: str) -> None:
+        """Adds a plain substring
+
+        Args:
+            key (Hashable): Key returned by `match`
+                if the line contains the keyword
+            keyword (str): Substring
+        """
+
+        self.add(key, re.escape(keyword))
+
+    def remove(self, key: Hashable) -> None:
+        """Removes a pattern
+
+        Args:
+            key (Hashable): Pattern key
+        """
+
+        del self.patterns[key]
+        self.compile()
+
+    def compile(self) -> None:
+
+        """Builds the combined regex"""
+
+        parts = []
+        self.merged = {}
+        self.separate = {}
+
+        for key, regex in self.patterns.items():
+
+            # capturing groups make the alternation
+            # much slower, backreferences would break
+            if regex.groups or regex.flags & re.VERBOSE:
+                self.separate[key] = regex
+                continue
+
+            if global_flags_re.match(regex.pattern):
+                self.separate[key] = regex
+                continue
+
+            flags = ''.join(
+                char for flag, char in SCOPED_FLAGS
+                if regex.flags & flag
+            )
+            parts.append(f'(?{flags}:{regex.pattern})')
+            self.merged[key] = regex
+
+        # the same pattern added by many listeners
+        parts = list(dict.fromkeys(parts))
+        try:
+            self.combined = re.compile('|'.join(parts)) if parts else None
+        except re.error:
+            # can't be merged, check one by one
+            self.combined = None
+            self.separate.update(self.merged)
+            self.merged = {}
+
+    def match(self, line: str) -> Set[Hashable]:
+        """Finds the patterns matching the line
+
+        Args:
+            line (str): Console line
+
+        Returns:
+            Set of keys
+        """
+
+        result = set()
+
+        if self.combined is not None:
+            found = self.combined.search(line)
+            if found is not None:
+                # none of the patterns matches before this position
+                pos = found.start()
+                for key, regex in self.merged.items():
+                    if regex.search(line, pos):
+                        result.add(key)
+
+        for key, regex in self.separate.items():
+            if regex.search(line):
+                result.add(key)
+
+        return result
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.patterns
+
+    def __len__(self) -> int:
+        return len(self.patterns)
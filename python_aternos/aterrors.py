@@ -32,6 +32,18 @@ class TokenError(AternosError):
     to extract Aternos ajax token"""
 
 
+class InterpreterError(AternosError):
+
+    """Raised when a JS interpreter is unable
+    to execute code or stops responding"""
+
+
+class QueueClosedError(AternosError):
+
+    """Raised when reading from a closed
+    websocket stream subscription"""
+
+
 class ServerError(AternosError):
 
     """Common class for server errors"""
@@ -5,8 +5,6 @@ import enum
 from typing import Union
 from typing import TYPE_CHECKING
 
-import lxml.html
-
 from .atconnect import BASE_URL, AJAX_URL
 from .aterrors import FileError
 
@@ -203,6 +201,7 @@ class AternosFile:
         editor = self.atserv.atserver_request(
             f'{BASE_URL}/files/{filepath}', 'GET'
         )
+        import lxml.html  # pylint: disable=import-outside-toplevel
         edittree = lxml.html.fromstring(editor.content)
         editblock = edittree.xpath('//div[@id="editor"]')
 
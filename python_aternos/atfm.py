@@ -3,8 +3,6 @@
 from typing import Union, Optional, Any, List
 from typing import TYPE_CHECKING
 
-import lxml.html
-
 from .atconnect import BASE_URL, AJAX_URL
 from .atfile import AternosFile, FileType
 
@@ -45,6 +43,7 @@ class FileManager:
         filesreq = self.atserv.atserver_request(
             f'{BASE_URL}/files/{path}', 'GET'
         )
+        import lxml.html  # pylint: disable=import-outside-toplevel
         filestree = lxml.html.fromstring(filesreq.content)
 
         fileslist = filestree.xpath(
@@ -0,0 +1,582 @@
+"""Compact console history
+with tail, time range and search queries"""
+
+import re
+import time
+
+from array import array
+from bisect import bisect_left, bisect_right
+
+from typing import Any, Optional, Union
+from typing import Iterable, List, Dict, Set, Tuple
+from typing import Pattern
+from typing import NamedTuple
+from typing import TYPE_CHECKING
+
+from .atwss import Streams
+from .atqueue import Sink
+
+if TYPE_CHECKING:
+    from .atwss import AternosWss
+
+
+# player names, exception class names
+# (java.lang.NullPointerException), numbers (12.5)
+token_re = re.compile(r'[\w$]+(?:[.\-][\w$]+)*')
+
+
+def tokenize(text: str) -> List[Tuple[int, str]]:
+    """Splits a line into lowercase tokens.
+    Dotted names are also split into parts,
+    so both `java.lang.NullPointerException`
+    and `NullPointerException` can be found.
+    The parts have the same position as the whole token
+
+    Args:
+        text (str): Line
+
+    Returns:
+        List of (position, token) tuples in the line order,
+        the whole token goes before its parts
+    """
+
+    tokens = []
+    for pos, token in enumerate(token_re.findall(text.lower())):
+        tokens.append((pos, token))
+        if '.' in token or '-' in token:
+            tokens.extend((pos, part) for part in re.split(r'[.\-]', token))
+    return tokens
+
+
+def words(tokens: List[Tuple[int, str]]) -> Set[str]:
+    """Tokens without positions
+
+    Args:
+        tokens (List[Tuple[int, str]]): `tokenize` result
+
+    Returns:
+        Set of tokens
+    """
+
+    return {token for _, token in tokens}
+
+
+def has_phrase(
+        tokens: List[Tuple[int, str]],
+        phrase: List[Tuple[int, str]]) -> bool:
+    """Checks if the phrase tokens appear
+    in the line at consecutive positions.
+    A phrase token may match a part
+    of a dotted line token (`to 12` matches `to 12.5`)
+
+    Args:
+        tokens (List[Tuple[int, str]]): Line tokens
+        phrase (List[Tuple[int, str]]): Phrase tokens
+
+    Returns:
+        Is the phrase found
+    """
+
+    # tokens (with parts) at each line position
+    slots: List[Set[str]] = []
+    for pos, token in tokens:
+        if pos == len(slots):
+            slots.append(set())
+        slots[pos].add(token)
+
+    # only whole tokens of the phrase
+    query: List[str] = []
+    for pos, token in phrase:
+        if pos == len(query):
+            query.append(token)
+
+    size = len(query)
+    for start in range(len(slots) - size + 1):
+        if all(query[i] in slots[start + i] for i in range(size)):
+            return True
+    return False
+
+
+class TokenIndex:
+
+    """Inverted index: token -> increasing line IDs
+    in `array('Q')`. Lines are added as they arrive
+    and removed together with the history retention"""
+
+    def __init__(self) -> None:
+
+        self.postings: Dict[str, array] = {}
+
+    def add(self, lineid: int, text: str) -> None:
+        """Indexes a line
+
+        Args:
+            lineid (int): Line ID, greater than the previous one
+            text (str): Line
+        """
+
+        postings = self.postings
+        for token in words(tokenize(text)):
+            ids = postings.get(token)
+            if ids is None:
+                ids = postings[token] = array('Q')
+            ids.append(lineid)
+
+    def evict(self, texts: Iterable[str], first: int) -> None:
+        """Removes the IDs lower than `first`
+        from the postings of the evicted lines tokens
+
+        Args:
+            texts (Iterable[str]): Evicted lines
+            first (int): ID of the first retained line
+        """
+
+        tokens: Set[str] = set()
+        for text in texts:
+            tokens.update(words(tokenize(text)))
+
+        for token in tokens:
+            ids = self.postings.get(token)
+            if ids is None:
+                continue
+            count = bisect_left(ids, first)
+            if count >= len(ids):
+                del self.postings[token]
+            else:
+                del ids[:count]
+
+    def lookup(self, tokens: Iterable[str]) -> List[int]:
+        """Finds the lines containing all tokens
+
+        Args:
+            tokens (Iterable[str]): Lowercase tokens
+
+        Returns:
+            Increasing line IDs
+        """
+
+        lists = []
+        for token in set(tokens):
+            ids = self.postings.get(token)
+            if ids is None:
+                return []
+            lists.append(ids)
+
+        if not lists:
+            return []
+
+        # intersect starting from the rarest token
+        lists.sort(key=len)
+        result = set(lists[0])
+        for ids in lists[1:]:
+            result.intersection_update(ids)
+            if not result:
+                break
+        return sorted(result)
+
+    def clear(self) -> None:
+
+        """Removes all postings"""
+
+        self.postings.clear()
+
+    def __len__(self) -> int:
+        return len(self.postings)
+
+
+class HistoryLine(NamedTuple):
+
+    """Console line from the history"""
+
+    id: int
+    time: float
+    text: str
+
+
+class ConsoleHistory(Sink):
+
+    """Keeps the last console lines as UTF-8 in one bytearray
+    (`\\n`-terminated) with `array` of their offsets and timestamps,
+    so a million lines cost a few dozens of MB instead of
+    a million Python strings. When the limits are exceeded,
+    the oldest lines are removed (down to 90% of the limit,
+    so it doesn't happen on each line)"""
+
+    def __init__(
+            self,
+            max_bytes: int = 16 * 1024 * 1024,
+            max_lines: int = 1000000,
+            index: bool = False) -> None:
+        """Keeps the last console lines
+
+        Args:
+            max_bytes (int, optional): Max text size
+            max_lines (int, optional): Max lines count
+            index (bool, optional): Maintain a token index
+                for fast `find` queries
+        """
+
+        self.max_bytes = max_bytes
+        self.max_lines = max_lines
+
+        self.data = bytearray()
+        # absolute offsets of the lines starts
+        self.offsets = array('Q')
+        self.times = array('d')
+
+        # absolute offset of data[0]
+        self.base = 0
+        # ID of the first retained line
+        self.first = 0
+
+        self.index = TokenIndex() if index else None
+
+    def attach(self, wss: 'AternosWss') -> 'ConsoleHistory':
+        """Starts recording the console stream
+        of the websocket connection
+
+        Args:
+            wss (AternosWss): Websocket connection
+
+        Returns:
+            The same object
+        """
+
+        wss.add_sink(Streams.console, self)
+        return self
+
+    async def feed(self, msg: Any) -> None:
+        self.append(msg)
+
+    def append(self, line: str, ts: Optional[float] = None) -> int:
+        """Adds a line
+
+        Args:
+            line (str): Console line, newlines
+                are replaced with spaces
+            ts (Optional[float], optional): Unix timestamp,
+                the current time if None. Must not decrease
+
+        Returns:
+            Line ID
+        """
+
+        if ts is None:
+            ts = time.time()
+
+        self.offsets.append(self.base + len(self.data))
+        self.times.append(ts)
+        line = line.replace('\n', ' ')
+        self.data += line.encode('utf-8')
+        self.data += b'\n'
+
+        lineid = self.first + len(self.offsets) - 1
+        if self.index is not None:
+            self.index.add(lineid, line)
+        if len(self.data) > self.max_bytes or len(self.offsets) > self.max_lines:
+            self.evict()
+        return lineid
+
+    def evict(self) -> None:
+
+        """Removes the oldest lines
+        to get below 90% of the limits"""
+
+        count = len(self.offsets)
+
+        # lines to remove because of max_lines
+        drop = max(0, count - self.max_lines * 9 // 10)
+
+        # because of max_bytes
+        keep_from = self.base + len(self.data) - self.max_bytes * 9 // 10
+        drop = max(drop, bisect_left(self.offsets, keep_from))
+
+        drop = min(drop, count)
+        if drop == 0:
+            return
+
+        evicted = []
+        if self.index is not None:
+            evicted = [line.text for line in self.lines(0, drop)]
+
+        cut = (
+            self.offsets[drop] - self.base
+            if drop < count else len(self.data)
+        )
+        del self.data[:cut]
+        del self.offsets[:drop]
+        del self.times[:drop]
+
+        self.base += cut
+        self.first += drop
+
+        if self.index is not None:
+            self.index.evict(evicted, self.first)
+
+    def get(self, lineid: int) -> HistoryLine:
+        """Returns a line by its ID
+
+        Args:
+            lineid (int): Line ID
+
+        Raises:
+            IndexError: If the line is not retained
+
+        Returns:
+            Line
+        """
+
+        i = lineid - self.first
+        if not 0 <= i < len(self.offsets):
+            raise IndexError(f'Line {lineid} is not in the history')
+
+        start = self.offsets[i] - self.base
+        end = (
+            self.offsets[i + 1] - self.base
+            if i + 1 < len(self.offsets) else len(self.data)
+        )
+        text = self.data[start:end - 1].decode('utf-8')
+        return HistoryLine(lineid, self.times[i], text)
+
+    def lines(self, start: int = 0, end: Optional[int] = None) -> List[HistoryLine]:
+        """Returns the retained lines by index
+        (0 is the oldest retained line)
+
+        Args:
+            start (int, optional): First index
+            end (Optional[int], optional): Index after the last one
+
+        Returns:
+            List of lines
+        """
+
+        if end is None:
+            end = len(self.offsets)
+        if start >= end:
+            return []
+
+        first = self.offsets[start] - self.base
+        last = (
+            self.offsets[end] - self.base
+            if end < len(self.offsets) else len(self.data)
+        )
+        # one decode for all lines
+        texts = self.data[first:last - 1].decode('utf-8').split('\n')
+
+        return [
+            HistoryLine(self.first + start + i, self.times[start + i], text)
+            for i, text in enumerate(texts)
+        ]
+
+    def tail(self, count: int = 100) -> List[HistoryLine]:
+        """Returns the last lines
+
+        Args:
+            count (int, optional): Lines count
+
+        Returns:
+            List of lines, the oldest first
+        """
+
+        return self.lines(max(0, len(self.offsets) - count))
+
+    def between(
+            self,
+            start: Optional[float] = None,
+            end: Optional[float] = None) -> List[HistoryLine]:
+        """Returns the lines received in a time range
+
+        Args:
+            start (Optional[float], optional):
+                Unix timestamp, from the oldest line if None
+            end (Optional[float], optional):
+                Unix timestamp (inclusive), until the newest line if None
+
+        Returns:
+            List of lines, the oldest first
+        """
+
+        first = 0 if start is None else bisect_left(self.times, start)
+        last = None if end is None else bisect_right(self.times, end)
+        return self.lines(first, last)
+
+    def search(
+            self,
+            query: Union[str, Pattern[str]],
+            regex: bool = False,
+            limit: Optional[int] = None,
+            start: Optional[float] = None,
+            end: Optional[float] = None) -> List[HistoryLine]:
+        """Finds the lines containing a substring
+        or matching a regex (`re.search`)
+
+        Args:
+            query (Union[str, Pattern[str]]): Substring or regex,
+                compiled patterns are always treated as regexes
+            regex (bool, optional): Treat a string query as a regex
+            limit (Optional[int], optional): Max lines count
+            start (Optional[float], optional): Search only in the lines
+                received after this Unix timestamp
+            end (Optional[float], optional): and before this one
+
+        Returns:
+            List of lines, the oldest first
+        """
+
+        lo = 0 if start is None else bisect_left(self.times, start)
+        hi = len(self.offsets) if end is None else bisect_right(self.times, end)
+        if lo >= hi:
+            return []
+
+        if regex or not isinstance(query, str):
+            found = self.search_regex(re.compile(query), lo, hi, limit)
+        else:
+            found = self.search_bytes(query.encode('utf-8'), lo, hi, limit)
+
+        return [self.get(self.first + i) for i in found]
+
+    def search_bytes(
+            self,
+            needle: bytes,
+            lo: int, hi: int,
+            limit: Optional[int]) -> List[int]:
+        """Finds the substring in the buffer without decoding it
+
+        Args:
+            needle (bytes): Encoded substring
+            lo (int): First line index
+            hi (int): Index after the last line
+            limit (Optional[int]): Max lines count
+
+        Returns:
+            Indexes of the lines
+        """
+
+        found: List[int] = []
+        pos = self.offsets[lo] - self.base
+        stop = (
+            self.offsets[hi] - self.base
+            if hi < len(self.offsets) else len(self.data)
+        )
+
+        while limit is None or len(found) < limit:
+
+            pos = self.data.find(needle, pos, stop)
+            if pos < 0:
+                break
+
+            i = bisect_right(self.offsets, self.base + pos) - 1
+            found.append(i)
+
+            # continue from the next line
+            if i + 1 >= len(self.offsets):
+                break
+            pos = self.offsets[i + 1] - self.base
+
+        return found
+
+    def search_regex(
+            self,
+            pattern: Pattern[str],
+            lo: int, hi: int,
+            limit: Optional[int]) -> List[int]:
+        """Finds the regex matches in the decoded range
+
+        Args:
+            pattern (Pattern[str]): Regex
+            lo (int): First line index
+            hi (int): Index after the last line
+            limit (Optional[int]): Max lines count
+
+        Returns:
+            Indexes of the lines
+        """
+
+        found: List[int] = []
+        for line in self.lines(lo, hi):
+            if limit is not None and len(found) >= limit:
+                break
+            if pattern.search(line.text):
+                found.append(line.id - self.first)
+        return found
+
+    def find(
+            self,
+            query: str,
+            phrase: bool = False,
+            limit: Optional[int] = None) -> List[HistoryLine]:
+        """Finds the lines containing all words of the query
+        (case-insensitive, whole tokens: `Steve` doesn't match
+        `Steve123`) or, if `phrase` is True, these words
+        one after another. Uses the token index if it's enabled,
+        otherwise checks each line
+
+        Args:
+            query (str): Words, e.g. a player name, an exception
+                class name or coordinates
+            phrase (bool, optional): Search for the exact phrase
+            limit (Optional[int], optional): Max lines count,
+                the newest lines are returned
+
+        Returns:
+            List of lines, the oldest first
+        """
+
+        phrase_tokens = tokenize(query)
+        if not phrase_tokens:
+            return []
+        terms = words(phrase_tokens)
+
+        if self.index is None:
+            candidates = self.lines()
+        else:
+            candidates = [
+                self.get(lineid)
+                for lineid in self.index.lookup(terms)
+            ]
+
+        result: List[HistoryLine] = []
+        for line in reversed(candidates):
+
+            if limit is not None and len(result) >= limit:
+                break
+
+            tokens = tokenize(line.text)
+            if phrase:
+                found = has_phrase(tokens, phrase_tokens)
+            else:
+                found = terms.issubset(words(tokens))
+
+            if found:
+                result.append(line)
+
+        result.reverse()
+        return result
+
+    def clear(self) -> None:
+
+        """Removes all lines"""
+
+        if self.index is not None:
+            self.index.clear()
+
+        self.first += len(self.offsets)
+        self.base += len(self.data)
+        self.data = bytearray()
+        self.offsets = array('Q')
+        self.times = array('d')
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the buffers
+
+        Returns:
+            Size in bytes
+        """
+
+        arrays = self.offsets.itemsize * len(self.offsets)
+        arrays += self.times.itemsize * len(self.times)
+        return len(self.data) + arrays
+
+    def __len__(self) -> int:
+        return len(self.offsets)
@@ -1,24 +1,31 @@
 """Parsing and executing JavaScript code"""
 
 import abc
+import asyncio
 
 import json
 import base64
+import struct
 
+import hashlib
+import threading
 import subprocess
+import contextlib
 
 from pathlib import Path
+from types import CodeType
+from collections import OrderedDict
 from typing import Optional, Union
-from typing import Type, Any
-
-import regex
-import js2py
-import requests
+from typing import Type, Any, Dict
+from typing import List, Iterator
 
 from .atlog import log
+from .aterrors import InterpreterError
 
 
 js: Optional['Interpreter'] = None
+pool: Optional['InterpreterPool'] = None  # pylint: disable=invalid-name
+pool_lock = threading.Lock()
 
 
 class Interpreter(abc.ABC):
@@ -59,6 +66,47 @@ class Interpreter(abc.ABC):
             Variable value
         """
 
+    def exec_and_get(self, func: str, *names: str) -> Dict[str, Any]:
+        """Executes JavaScript code and returns
+        values of the specified variables.
+        Interpreters running in another process
+        override this to do it in one round trip
+
+        Args:
+            func (str): JS function
+            *names (str): Variables names
+
+        Returns:
+            Dictionary with the variables values
+        """
+
+        self.exec_js(func)
+        return {name: self.get_var(name) for name in names}
+
+    def reset(self) -> None:
+        """Drops all variables set by the executed code,
+        so the interpreter can be reused for another task
+
+        Raises:
+            NotImplementedError: If the interpreter
+                can't be reset and must be recreated
+        """
+
+        raise NotImplementedError
+
+    def alive(self) -> bool:
+        """Checks if the interpreter
+        is able to execute code
+
+        Returns:
+            Is it alive
+        """
+
+        return True
+
+    def close(self) -> None:
+        """Frees the interpreter resources"""
+
 
 class NodeInterpreter(Interpreter):
     """Node.JS interpreter wrapper,
@@ -101,19 +149,143 @@ class NodeInterpreter(Interpreter):
         log.debug('Received from server.js: %s', ok_msg)
 
     def exec_js(self, func: str) -> None:
+        import requests  # pylint: disable=import-outside-toplevel
         resp = requests.post(self.url, data=func, timeout=self.timeout)
         resp.raise_for_status()
 
     def get_var(self, name: str) -> Any:
+        import requests  # pylint: disable=import-outside-toplevel
         resp = requests.post(self.url, data=name, timeout=self.timeout)
         resp.raise_for_status()
         log.debug('NodeJS response: %s', resp.content)
         return json.loads(resp.content)
 
+    def reset(self) -> None:
+        # server.js keeps one VM while the process is running
+        raise NotImplementedError
+
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def close(self) -> None:
+        self.proc.terminate()
+        self.proc.communicate()
+
+    def __del__(self) -> None:
+        try:
+            self.close()
+        except AttributeError:
+            log.warning(
+                'NodeJS process was not initialized, '
+                'but __del__ was called'
+            )
+
+
+class NodePipeInterpreter(Interpreter):
+    """Node.JS interpreter wrapper,
+    communicates with the Node process over stdin/stdout,
+    so it doesn't need a free port and an HTTP request
+    for each evaluation"""
+
+    def __init__(self, node: Union[str, Path] = 'node') -> None:
+        """Node.JS interpreter wrapper,
+        communicates with the Node process over stdin/stdout
+
+        Args:
+            node (Union[str, Path], optional): Path to `node` executable
+        """
+
+        super().__init__()
+
+        file_dir = Path(__file__).absolute().parent
+        pipe_js = file_dir / 'data' / 'pipe.js'
+
+        self.lock = threading.Lock()
+
+        # pylint: disable=consider-using-with
+        self.proc = subprocess.Popen(
+            args=[node, pipe_js],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+        # pylint: enable=consider-using-with
+
+    def request(self, obj: Dict[str, Any]) -> Dict[str, Any]:
+        """Sends a request to pipe.js
+        and waits for the response.
+        Each message is a 4-byte big-endian length
+        followed by a UTF-8 encoded JSON object
+
+        Args:
+            obj (Dict[str, Any]): Request object,
+                may contain `exec` (code), `get` (variables names)
+                and `reset` (recreate the sandbox) keys
+
+        Raises:
+            InterpreterError: If the Node process has exited
+                or JS code has thrown an exception
+
+        Returns:
+            Response object
+        """
+
+        frame = pack_frame(obj)
+
+        with self.lock:
+            stdin = self.proc.stdin
+            stdout = self.proc.stdout
+            assert stdin is not None
+            assert stdout is not None
+
+            try:
+                stdin.write(frame)
+                stdin.flush()
+                head = stdout.read(4)
+                if len(head) < 4:
+                    raise EOFError
+                (length,) = struct.unpack('>I', head)
+                resp = stdout.read(length)
+            except (OSError, EOFError) as err:
+                try:
+                    # stdout is closed when the process is exiting
+                    code: Optional[int] = self.proc.wait(1)
+                except subprocess.TimeoutExpired:
+                    code = None
+                if code is None:
+                    raise InterpreterError(
+                        'NodeJS process is not running'
+                    ) from err
+                # e.g. pipe.js exits if vm2 is not installed
+                raise InterpreterError(
+                    f'NodeJS process has exited with code {code}, '
+                    'see its output above'
+                ) from err
+
+        return unpack_result(resp)
+
+    def exec_js(self, func: str) -> None:
+        self.request({'exec': func})
+
+    def get_var(self, name: str) -> Any:
+        return self.request({'get': [name]})['vars'].get(name)
+
+    def exec_and_get(self, func: str, *names: str) -> Dict[str, Any]:
+        resp = self.request({'exec': func, 'get': names})
+        return {name: resp['vars'].get(name) for name in names}
+
+    def reset(self) -> None:
+        self.request({'reset': True})
+
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def close(self) -> None:
+        self.proc.terminate()
+        self.proc.communicate()
+
     def __del__(self) -> None:
         try:
-            self.proc.terminate()
-            self.proc.communicate()
+            self.close()
         except AttributeError:
             log.warning(
                 'NodeJS process was not initialized, '
@@ -121,42 +293,328 @@ class NodeInterpreter(Interpreter):
             )
 
 
+class AsyncNodeInterpreter:
+    """Node.JS interpreter for asyncio applications.
+    Runs the same worker as NodePipeInterpreter,
+    but with `asyncio.create_subprocess_exec`,
+    so the event loop is never blocked"""
+
+    def __init__(
+            self,
+            node: Union[str, Path] = 'node',
+            timeout: float = 5.0,
+            respawn: int = 1) -> None:
+        """Node.JS interpreter for asyncio applications
+
+        Args:
+            node (Union[str, Path], optional): Path to `node` executable
+            timeout (float, optional): Timeout in seconds for the worker
+                startup and for each request
+            respawn (int, optional): How many times a request is retried
+                in a new Node process if the current one has crashed
+        """
+
+        file_dir = Path(__file__).absolute().parent
+        self.pipe_js = file_dir / 'data' / 'pipe.js'
+
+        self.node = node
+        self.timeout = timeout
+        self.respawn = respawn
+
+        self.proc: Optional[asyncio.subprocess.Process] = None
+        self.lock: Optional[asyncio.Lock] = None
+
+    async def start(self) -> None:
+        """Starts the Node process
+        and waits until it responds
+
+        Raises:
+            InterpreterError: If the worker
+                hasn't responded during `timeout`
+        """
+
+        if self.lock is None:
+            self.lock = asyncio.Lock()
+
+        async with self.lock:
+            await self.spawn()
+
+    async def spawn(self) -> None:
+        """Starts a new Node process (killing the old one)
+        and sends an empty request to check it.
+        Must be called with `lock` acquired"""
+
+        await self.kill()
+
+        try:
+            self.proc = await asyncio.create_subprocess_exec(
+                str(self.node), str(self.pipe_js),
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+            )
+        except OSError as err:
+            raise InterpreterError(
+                f'Unable to start NodeJS: {err}'
+            ) from err
+
+        await self.communicate({})
+        log.debug('NodeJS worker started, pid %d', self.proc.pid)
+
+    async def communicate(self, obj: Dict[str, Any]) -> Dict[str, Any]:
+        """Exchanges one frame with the worker.
+        Must be called with `lock` acquired
+
+        Args:
+            obj (Dict[str, Any]): Request object
+
+        Raises:
+            InterpreterError: If the worker has crashed
+                or hasn't responded during `timeout`
+
+        Returns:
+            Response object
+        """
+
+        assert self.proc is not None
+        stdin = self.proc.stdin
+        stdout = self.proc.stdout
+        assert stdin is not None
+        assert stdout is not None
+
+        async def exchange() -> bytes:
+            stdin.write(pack_frame(obj))
+            await stdin.drain()
+            head = await stdout.readexactly(4)
+            (length,) = struct.unpack('>I', head)
+            return await stdout.readexactly(length)
+
+        try:
+            resp = await asyncio.wait_for(exchange(), self.timeout)
+        except asyncio.TimeoutError as err:
+            # the stream may be out of sync now
+            await self.kill()
+            raise InterpreterError(
+                'NodeJS worker has not responded in time'
+            ) from err
+        except (OSError, asyncio.IncompleteReadError) as err:
+            await self.kill()
+            raise InterpreterError(
+                'NodeJS process is not running'
+            ) from err
+
+        return unpack_result(resp)
+
+    async def request(self, obj: Dict[str, Any]) -> Dict[str, Any]:
+        """Sends a request to the worker,
+        starting it (or a new one if it has crashed)
+        when needed
+
+        Args:
+            obj (Dict[str, Any]): Request object, see `NodePipeInterpreter.request`
+
+        Raises:
+            InterpreterError: If JS code has thrown an exception
+                or the worker has crashed more than `respawn` times
+
+        Returns:
+            Response object
+        """
+
+        if self.lock is None:
+            self.lock = asyncio.Lock()
+
+        async with self.lock:
+            attempts = self.respawn
+            while True:
+                if not self.alive():
+                    await self.spawn()
+                try:
+                    return await self.communicate(obj)
+                except InterpreterError:
+                    # JS exception, the worker is fine
+                    if self.alive() or attempts <= 0:
+                        raise
+                    attempts -= 1
+                    log.warning('NodeJS worker has crashed, respawning')
+
+    async def exec_js(self, func: str) -> None:
+        """Executes JavaScript code
+
+        Args:
+            func (str): JS function
+        """
+
+        await self.request({'exec': func})
+
+    async def get_var(self, name: str) -> Any:
+        """Returns JS variable value
+
+        Args:
+            name (str): Variable name
+
+        Returns:
+            Variable value
+        """
+
+        resp = await self.request({'get': [name]})
+        return resp['vars'].get(name)
+
+    async def exec_and_get(self, func: str, *names: str) -> Dict[str, Any]:
+        """Executes JavaScript code and returns
+        values of the specified variables in one round trip
+
+        Args:
+            func (str): JS function
+            *names (str): Variables names
+
+        Returns:
+            Dictionary with the variables values
+        """
+
+        resp = await self.request({'exec': func, 'get': names})
+        return {name: resp['vars'].get(name) for name in names}
+
+    async def reset(self) -> None:
+        """Recreates the sandbox in the worker"""
+
+        await self.request({'reset': True})
+
+    def alive(self) -> bool:
+        """Checks if the Node process is running
+
+        Returns:
+            Is it alive
+        """
+
+        return self.proc is not None and self.proc.returncode is None
+
+    async def kill(self) -> None:
+        """Kills the Node process if it is running"""
+
+        if self.proc is None:
+            return
+
+        if self.proc.returncode is None:
+            self.proc.kill()
+        await self.proc.wait()
+        self.proc = None
+
+    async def close(self) -> None:
+        """Stops the Node process"""
+
+        if self.lock is None:
+            self.lock = asyncio.Lock()
+
+        async with self.lock:
+            await self.kill()
+
+
 class Js2PyInterpreter(Interpreter):
     """Js2Py interpreter,
     uses js2py library to execute code"""
 
     # Thanks to http://regex.inginf.units.it
-    arrowexp = regex.compile(r'\w[^\}]*+')
+    arrowexp = r'\w[^\}]*+'
+
+    # window and document stubs
+    prelude = '''
+    window.Map = function(_i){ };
+    window.setTimeout = function(_f,_t){ };
+    window.setInterval = function(_f,_t){ };
+    window.encodeURIComponent = window.Map;
+    window.document = { };
+    document.doctype = { };
+    document.currentScript = { };
+    document.getElementById = window.Map;
+    document.prepend = window.Map;
+    document.append = window.Map;
+    document.appendChild = window.Map;
+    '''
+
+    # Translating JS to Python is the most expensive part,
+    # so the compiled prelude and the compiled functions
+    # (key is a hash of the JS source) are shared between instances
+    compiled_prelude: Optional[CodeType] = None
+    compiled: 'OrderedDict[bytes, CodeType]' = OrderedDict()
+    cache_size = 64
+    cache_lock = threading.Lock()
 
     def __init__(self) -> None:
         """Js2Py interpreter,
         uses js2py library to execute code"""
 
         super().__init__()
+        self.ctx = self.new_context()
+
+    def new_context(self) -> Any:
+        """Creates a js2py context
+        with window and document stubs
+
+        Returns:
+            js2py.EvalJs object
+        """
+
+        # js2py takes a noticeable time to import,
+        # so it is loaded only when the interpreter is created
+        import js2py  # pylint: disable=import-outside-toplevel
+
+        cls = type(self)
+        if cls.compiled_prelude is None:
+            cls.compiled_prelude = compile(
+                js2py.translate_js(self.prelude, ''),
+                '<js2py prelude>', 'exec',
+            )
 
         ctx = js2py.EvalJs({'atob': atob})
-        ctx.execute('''
-        window.Map = function(_i){ };
-        window.setTimeout = function(_f,_t){ };
-        window.setInterval = function(_f,_t){ };
-        window.encodeURIComponent = window.Map;
-        window.document = { };
-        document.doctype = { };
-        document.currentScript = { };
-        document.getElementById = window.Map;
-        document.prepend = window.Map;
-        document.append = window.Map;
-        document.appendChild = window.Map;
-        ''')
-
-        self.ctx = ctx
+        exec(cls.compiled_prelude, ctx.context)  # pylint: disable=exec-used
+
+        return ctx
 
     def exec_js(self, func: str) -> None:
-        self.ctx.execute(self.to_ecma5(func))
+        exec(self.compile_js(func), self.ctx.context)  # pylint: disable=exec-used
+
+    def compile_js(self, func: str) -> CodeType:
+        """Converts a function with `to_ecma5`
+        and translates it to Python bytecode.
+        The result is cached, so the same token script
+        is translated only once
+
+        Args:
+            func (str): ECMA6 function
+
+        Returns:
+            Compiled code
+        """
+
+        key = hashlib.sha1(func.encode('utf-8')).digest()
+        cls = type(self)
+
+        with cls.cache_lock:
+            code = cls.compiled.get(key)
+            if code is not None:
+                cls.compiled.move_to_end(key)
+                return code
+
+        import js2py  # pylint: disable=import-outside-toplevel
+
+        code = compile(
+            js2py.translate_js(self.to_ecma5(func), ''),
+            '<js2py function>', 'exec',
+        )
+
+        with cls.cache_lock:
+            cls.compiled[key] = code
+            while len(cls.compiled) > cls.cache_size:
+                cls.compiled.popitem(last=False)
+
+        return code
 
     def get_var(self, name: str) -> Any:
         return self.ctx[name]
 
+    def reset(self) -> None:
+        self.ctx = self.new_context()
+
     def to_ecma5(self, func: str) -> str:
         """Converts from ECMA6 format to ECMA5
         (replacing arrow expressions)
@@ -169,11 +627,13 @@ class Js2PyInterpreter(Interpreter):
             ECMA5 function
         """
 
+        import regex  # pylint: disable=import-outside-toplevel
+
         # Delete anything between /* and */
         func = regex.sub(r'/\*.+?\*/', '', func)
 
         # Search for arrow expressions
-        match = self.arrowexp.search(func)
+        match = regex.search(self.arrowexp, func)
         if match is None:
             return func
 
@@ -191,6 +651,199 @@ class Js2PyInterpreter(Interpreter):
         )
 
 
+class InterpreterPool:
+    """Bounded pool of JS interpreters.
+    Each task gets its own interpreter which is reset
+    when returned, so concurrent token parsing
+    in several threads doesn't share any JS variables"""
+
+    def __init__(
+            self,
+            *args,
+            create: Type[Interpreter] = Js2PyInterpreter,
+            size: int = 4,
+            timeout: Optional[float] = None,
+            **kwargs) -> None:
+        """Bounded pool of JS interpreters.
+        `*args` and `**kwargs` will be passed
+        directly to JS interpreter `__init__`
+
+        Args:
+            create (Type[Interpreter], optional): Interpreter class
+            size (int, optional): Max interpreters count
+            timeout (Optional[float], optional): How long `acquire()`
+                waits for a free interpreter, None means forever
+        """
+
+        self.create = create
+        self.size = size
+        self.timeout = timeout
+        self.args = args
+        self.kwargs = kwargs
+
+        self.idle: List[Interpreter] = []
+        self.count = 0
+        self.cond = threading.Condition()
+
+    @contextlib.contextmanager
+    def acquire(self) -> Iterator[Interpreter]:
+        """Takes an idle interpreter from the pool
+        (or creates a new one, if the pool is not full)
+        and returns it back after the `with` block
+
+        Raises:
+            InterpreterError: If no interpreter
+                was released during `timeout`
+
+        Yields:
+            JS interpreter instance
+        """
+
+        jsi = self.take()
+        try:
+            yield jsi
+        finally:
+            self.release(jsi)
+
+    def take(self) -> Interpreter:
+        """Takes an interpreter from the pool,
+        you must `release()` it after use.
+        Prefer the `acquire()` context manager
+
+        Raises:
+            InterpreterError: If no interpreter
+                was released during `timeout`
+
+        Returns:
+            JS interpreter instance
+        """
+
+        with self.cond:
+            ok = self.cond.wait_for(
+                lambda: self.idle or self.count < self.size,
+                self.timeout,
+            )
+            if not ok:
+                raise InterpreterError(
+                    'No free JS interpreter in the pool'
+                )
+
+            while self.idle:
+                jsi = self.idle.pop()
+                if jsi.alive():
+                    return jsi
+                log.warning('Removing dead JS interpreter from the pool')
+                self.discard(jsi)
+
+            self.count += 1
+
+        try:
+            return self.create(*self.args, **self.kwargs)
+        except BaseException:
+            with self.cond:
+                self.count -= 1
+                self.cond.notify()
+            raise
+
+    def release(self, jsi: Interpreter) -> None:
+        """Resets an interpreter and returns it to the pool.
+        Interpreters that can't be reset or are dead
+        are closed and removed
+
+        Args:
+            jsi (Interpreter): Interpreter taken with `take()`
+        """
+
+        try:
+            jsi.reset()
+            healthy = jsi.alive()
+        except Exception as err:  # pylint: disable=broad-exception-caught
+            log.debug('Unable to reset JS interpreter: %r', err)
+            healthy = False
+
+        with self.cond:
+            if healthy:
+                self.idle.append(jsi)
+            else:
+                self.discard(jsi)
+            self.cond.notify()
+
+    def check(self) -> int:
+        """Removes dead idle interpreters
+
+        Returns:
+            How many interpreters were removed
+        """
+
+        with self.cond:
+            dead = [jsi for jsi in self.idle if not jsi.alive()]
+            for jsi in dead:
+                self.idle.remove(jsi)
+                self.discard(jsi)
+            self.cond.notify_all()
+
+        return len(dead)
+
+    def discard(self, jsi: Interpreter) -> None:
+        """Closes an interpreter and decrements the counter.
+        Must be called with `cond` acquired
+
+        Args:
+            jsi (Interpreter): Interpreter to remove
+        """
+
+        self.count -= 1
+        try:
+            jsi.close()
+        except Exception as err:  # pylint: disable=broad-exception-caught
+            log.debug('Unable to close JS interpreter: %r', err)
+
+    def close(self) -> None:
+        """Closes all idle interpreters"""
+
+        with self.cond:
+            while self.idle:
+                self.discard(self.idle.pop())
+            self.cond.notify_all()
+
+
+def pack_frame(obj: Dict[str, Any]) -> bytes:
+    """Encodes a request for pipe.js:
+    4-byte big-endian length + UTF-8 JSON
+
+    Args:
+        obj (Dict[str, Any]): Request object
+
+    Returns:
+        Frame bytes
+    """
+
+    body = json.dumps(obj).encode('utf-8')
+    return struct.pack('>I', len(body)) + body
+
+
+def unpack_result(body: bytes) -> Dict[str, Any]:
+    """Decodes a pipe.js response body
+
+    Args:
+        body (bytes): Frame body without the length
+
+    Raises:
+        InterpreterError: If JS code has thrown an exception
+
+    Returns:
+        Response object
+    """
+
+    log.debug('NodeJS response: %s', body)
+    result = json.loads(body)
+
+    if 'error' in result:
+        raise InterpreterError(result['error'])
+
+    return result
+
+
 def atob(s: str) -> str:
     """Wrapper for the built-in library function.
     Decodes a base64 string
@@ -212,7 +865,9 @@ def get_interpreter(
     """Get or create a JS interpreter.
     `*args` and `**kwargs` will be passed
     directly to JS interpreter `__init__`
-    (when creating it)
+    (when creating it).
+    Deprecated: the instance is shared without locking,
+    use `get_pool().acquire()` instead
 
     Args:
         create (Type[Interpreter], optional): Preferred interpreter
@@ -223,9 +878,53 @@ def get_interpreter(
 
     global js  # pylint: disable=global-statement
 
-    # create if none
-    if js is None:
-        js = create(*args, **kwargs)
+    with pool_lock:
+        # create if none
+        if js is None:
+            js = create(*args, **kwargs)
 
     # and return
     return js
+
+
+def get_pool(
+        *args,
+        create: Optional[Type[Interpreter]] = None,
+        **kwargs) -> InterpreterPool:
+    """Get or create a JS interpreters pool.
+    `*args` and `**kwargs` will be passed
+    directly to `InterpreterPool.__init__`
+    (when creating it)
+
+    Args:
+        create (Optional[Type[Interpreter]], optional): Preferred interpreter,
+            if it differs from the existing pool's one, the pool is recreated.
+            None means the existing pool or Js2PyInterpreter.
+            NodeInterpreter is replaced with NodePipeInterpreter
+
+    Returns:
+        Interpreters pool
+    """
+
+    global pool  # pylint: disable=global-statement
+
+    if create is NodeInterpreter:
+        # server.js listens on a fixed port and can't be reset,
+        # the pool would start a process per login
+        # and the concurrent ones would share one VM
+        create = NodePipeInterpreter
+
+    with pool_lock:
+
+        if pool is not None and create in (None, pool.create):
+            return pool
+
+        if pool is not None:
+            pool.close()
+
+        pool = InterpreterPool(
+            *args,
+            create=create or Js2PyInterpreter,
+            **kwargs,
+        )
+        return pool
@@ -5,8 +5,6 @@ import enum
 from typing import List, Union
 from typing import TYPE_CHECKING
 
-import lxml.html
-
 from .atconnect import BASE_URL, AJAX_URL
 if TYPE_CHECKING:
     from .atserver import AternosServer
@@ -77,6 +75,7 @@ class PlayersList:
             f'{BASE_URL}/players/{self.lst.value}',
             'GET'
         )
+        import lxml.html  # pylint: disable=import-outside-toplevel
         listtree = lxml.html.fromstring(listreq.content)
         items = listtree.xpath(
             '//div[@class="list-item"]'
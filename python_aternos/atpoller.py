@@ -0,0 +1,386 @@
+"""Keeps many servers' info fresh
+with adaptive `fetch()` intervals"""
+
+import math
+import time
+import heapq
+import random
+import asyncio
+
+from concurrent.futures import Executor
+
+from typing import Any, Optional
+from typing import List, Dict, Set, Tuple
+from typing import TYPE_CHECKING
+
+from .atlog import log
+from .atserver import Status
+
+if TYPE_CHECKING:
+    from .atserver import AternosServer
+
+
+# Seconds between two requests by the server status.
+# Starting, loading and preparing (including the queue)
+# servers change often, offline ones almost never
+INTERVALS = {
+    Status.off: 120.0,
+    Status.on: 30.0,
+    Status.starting: 3.0,
+    Status.shutdown: 5.0,
+    Status.loading: 3.0,
+    Status.error: 60.0,
+    Status.preparing: 3.0,
+}
+
+
+class StatusPoller:  # pylint: disable=too-many-instance-attributes
+
+    """Fetches the info of many servers from one task.
+    The next request time of each server depends on its status
+    (see `INTERVALS`), the requests are sent at most `rate` times
+    per second and at most `concurrency` at once, so they don't come
+    in bursts. The blocking requests run in an executor,
+    `AternosServer.update` (and the `onchange` callbacks)
+    is called in the event loop. If the server info was updated
+    in another way (e.g. by the websocket status stream),
+    the request is postponed"""
+
+    def __init__(
+            self,
+            intervals: Optional[Dict[Status, float]] = None,
+            default: float = 15.0,
+            concurrency: int = 4,
+            rate: float = 2.0,
+            jitter: float = 0.1,
+            max_backoff: float = 600.0,
+            executor: Optional[Executor] = None) -> None:
+        """Fetches the info of many servers from one task
+
+        Args:
+            intervals (Optional[Dict[Status, float]], optional):
+                Seconds between requests by the server status,
+                `INTERVALS` if None
+            default (float, optional): Interval for unknown statuses
+            concurrency (int, optional): Max requests at once
+                for all servers
+            rate (float, optional): Max requests per second
+            jitter (float, optional): Random part of the intervals
+                (0.1 is ±10%), so the servers polled together
+                drift apart
+            max_backoff (float, optional): Max interval
+                after failed requests, it's doubled after each failure
+            executor (Optional[Executor], optional):
+                Executor for the requests,
+                the loop's default one if None
+        """
+
+        self.intervals = dict(INTERVALS if intervals is None else intervals)
+        self.default = default
+        self.concurrency = concurrency
+        self.rate = rate
+        self.jitter = jitter
+        self.max_backoff = max_backoff
+        self.executor = executor
+
+        self.servers: Dict[str, 'AternosServer'] = {}
+        self.due: Dict[str, float] = {}
+        self.errors: Dict[str, int] = {}
+
+        # (due time, counter, server ID),
+        # entries with an outdated due time are skipped
+        self.heap: List[Tuple[float, int, str]] = []
+        self.counter = 0
+
+        self.task: Optional[asyncio.Task] = None
+        self.tasks: Set[asyncio.Task] = set()
+
+        # created in the event loop
+        self.limiter: Optional[asyncio.Semaphore] = None
+        self.wake: Optional[asyncio.Event] = None
+        self.next_start = 0.0
+
+        # Stats
+        self.polls = 0
+        self.failures = 0
+        self.skipped = 0
+
+    def get_limiter(self) -> asyncio.Semaphore:
+        """Returns the semaphore limiting
+        simultaneous requests
+
+        Returns:
+            asyncio.Semaphore object
+        """
+
+        if self.limiter is None:
+            self.limiter = asyncio.Semaphore(self.concurrency)
+        return self.limiter
+
+    def get_wake(self) -> asyncio.Event:
+        """Returns the event set when
+        the schedule is changed
+
+        Returns:
+            asyncio.Event object
+        """
+
+        if self.wake is None:
+            self.wake = asyncio.Event()
+        return self.wake
+
+    def add(self, atserv: 'AternosServer', delay: float = 0.0) -> None:
+        """Adds a server, it's polled after `delay` seconds
+
+        Args:
+            atserv (AternosServer): atserver.AternosServer instance
+            delay (float, optional): Seconds before the first request
+
+        Raises:
+            KeyError: If the server has already been added
+        """
+
+        if atserv.servid in self.servers:
+            raise KeyError(f'Server {atserv.servid} is already added')
+
+        self.servers[atserv.servid] = atserv
+        self.errors[atserv.servid] = 0
+        self.schedule(atserv.servid, time.time() + delay)
+
+    def remove(self, servid: str) -> None:
+        """Stops polling a server
+
+        Args:
+            servid (str): Server ID
+        """
+
+        self.servers.pop(servid, None)
+        self.due.pop(servid, None)
+        self.errors.pop(servid, None)
+
+    def refresh(self, servid: str) -> None:
+        """Polls a server as soon as possible,
+        e.g. after starting it
+
+        Args:
+            servid (str): Server ID
+        """
+
+        # not while the request is being sent
+        if self.due.get(servid, math.inf) != math.inf:
+            self.schedule(servid, time.time())
+
+    def schedule(self, servid: str, due: float) -> None:
+        """Sets the next request time of a server
+
+        Args:
+            servid (str): Server ID
+            due (float): Unix timestamp
+        """
+
+        self.due[servid] = due
+        self.counter += 1
+        heapq.heappush(self.heap, (due, self.counter, servid))
+
+        if self.wake is not None:
+            self.wake.set()
+
+    def interval(self, atserv: 'AternosServer') -> float:
+        """Seconds until the next request for the server
+        without jitter, depending on its status and failures
+
+        Args:
+            atserv (AternosServer): atserver.AternosServer instance
+
+        Returns:
+            Interval
+        """
+
+        try:
+            interval = self.intervals.get(atserv.status_num, self.default)
+        except (KeyError, ValueError):
+            # not fetched yet or an unknown status
+            interval = self.default
+
+        errors = self.errors.get(atserv.servid, 0)
+        if errors:
+            interval = min(interval * 2 ** errors, self.max_backoff)
+
+        return interval
+
+    def staleness(self, servid: str, now: Optional[float] = None) -> float:
+        """How old the server info is
+
+        Args:
+            servid (str): Server ID
+            now (Optional[float], optional): Unix timestamp,
+                the current time if None
+
+        Returns:
+            Seconds since the last update,
+            infinity if the info has never been fetched
+        """
+
+        updated = self.servers[servid].updated
+        if not updated:
+            return math.inf
+        return (time.time() if now is None else now) - updated
+
+    async def start(self) -> None:
+
+        """Starts polling"""
+
+        if self.task is None:
+            self.get_wake()
+            self.task = asyncio.create_task(self.run())
+
+    def running(self) -> bool:
+        """Checks if the poller is started
+
+        Returns:
+            Is the polling task running
+        """
+
+        return self.task is not None
+
+    async def run(self) -> None:
+
+        """Sends the requests when they are due"""
+
+        wake = self.get_wake()
+        limiter = self.get_limiter()
+        heap = self.heap
+
+        try:
+            while True:
+
+                if not heap:
+                    wake.clear()
+                    await wake.wait()
+                    continue
+
+                due, _, servid = heap[0]
+                now = time.time()
+                if due > now:
+                    wake.clear()
+                    try:
+                        await asyncio.wait_for(wake.wait(), due - now)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                heapq.heappop(heap)
+                if self.due.get(servid) != due:
+                    # removed or rescheduled
+                    continue
+
+                atserv = self.servers[servid]
+                if atserv.updated and not self.errors[servid]:
+                    fresh = atserv.updated + self.interval(atserv)
+                    if fresh > now:
+                        # updated by the websocket meanwhile
+                        self.skipped += 1
+                        self.schedule(servid, fresh)
+                        continue
+
+                # spread the requests evenly
+                start = max(now, self.next_start)
+                self.next_start = start + 1 / self.rate
+                await asyncio.sleep(start - now)
+
+                await limiter.acquire()
+                if self.servers.get(servid) is not atserv:
+                    # removed while waiting
+                    limiter.release()
+                    continue
+
+                self.due[servid] = math.inf
+                task = asyncio.create_task(self.poll(atserv))
+                self.tasks.add(task)
+                task.add_done_callback(self.tasks.discard)
+
+        except asyncio.CancelledError:
+            pass
+
+    async def poll(self, atserv: 'AternosServer') -> None:
+        """Fetches the server info and schedules the next request
+
+        Args:
+            atserv (AternosServer): atserver.AternosServer instance
+        """
+
+        loop = asyncio.get_running_loop()
+        servid = atserv.servid
+
+        try:
+            info = await loop.run_in_executor(self.executor, atserv.fetch_info)
+            atserv.update(info, replace=True)
+            if self.servers.get(servid) is atserv:
+                self.errors[servid] = 0
+        # an Exception subclass in Python 3.7
+        except asyncio.CancelledError:  # pylint: disable=try-except-raise
+            raise
+        except Exception:  # pylint: disable=broad-exception-caught
+            self.failures += 1
+            if self.servers.get(servid) is atserv:
+                self.errors[servid] += 1
+            log.warning('Unable to fetch server %s info', servid, exc_info=True)
+        finally:
+            self.get_limiter().release()
+            self.polls += 1
+
+        if self.servers.get(servid) is atserv:
+            spread = random.uniform(1 - self.jitter, 1 + self.jitter)
+            self.schedule(servid, time.time() + self.interval(atserv) * spread)
+
+    async def close(self) -> None:
+
+        """Stops polling, the requests
+        already being sent are not waited for"""
+
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+        for task in tuple(self.tasks):
+            task.cancel()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """State of each server
+
+        Returns:
+            Dict of server ID and its `status` (string,
+            None if unknown), `stale` (seconds since
+            the last update), `interval`, `next`
+            (seconds until the next request, None if
+            it's being sent now) and `errors`
+            (failed requests in a row)
+        """
+
+        now = time.time()
+        result = {}
+
+        for servid, atserv in self.servers.items():
+
+            try:
+                status: Optional[str] = atserv.status
+            except KeyError:
+                status = None
+
+            due = self.due.get(servid, math.inf)
+            result[servid] = {
+                'status': status,
+                'stale': self.staleness(servid, now),
+                'interval': self.interval(atserv),
+                'next': max(0.0, due - now) if due != math.inf else None,
+                'errors': self.errors.get(servid, 0),
+            }
+
+        return result
+
+    def __contains__(self, servid: str) -> bool:
+        return servid in self.servers
+
+    def __len__(self) -> int:
+        return len(self.servers)
@@ -0,0 +1,456 @@
+"""Bounded message queues
+for websocket stream listeners"""
+
+import abc
+import enum
+import asyncio
+
+from collections import deque
+
+from typing import Any, Optional, Deque, List
+from typing import Callable, Coroutine
+from typing import AsyncIterator
+
+from .atlog import log
+from .aterrors import QueueClosedError
+
+
+class Overflow(enum.Enum):
+
+    """What to do when a queue is full"""
+
+    block = 'block'
+    drop_oldest = 'drop_oldest'
+    coalesce = 'coalesce'
+
+
+class Sink(abc.ABC):
+
+    """Base class for objects receiving
+    all messages of a websocket stream.
+    Unlike listeners, sinks are called directly
+    by the receiver, so `feed` must return quickly"""
+
+    @abc.abstractmethod
+    async def feed(self, msg: Any) -> None:
+        """Receives a message
+
+        Args:
+            msg (Any): Message
+        """
+
+    async def close(self) -> None:
+        """Called when the sink is removed
+        or the connection is closed"""
+
+
+class MessageQueue:
+
+    """Bounded FIFO queue with an overflow policy:
+    `block` waits for free space (slowing down the receiver),
+    `drop_oldest` discards the oldest message,
+    `coalesce` replaces the newest queued message
+    with the incoming one (useful for RAM, TPS, status
+    where only the last value matters)"""
+
+    def __init__(
+            self,
+            maxsize: int = 1000,
+            overflow: Overflow = Overflow.block) -> None:
+        """Bounded FIFO queue with an overflow policy
+
+        Args:
+            maxsize (int, optional): Max messages count
+            overflow (Overflow, optional): Overflow policy
+        """
+
+        self.maxsize = maxsize
+        self.overflow = overflow
+
+        self.items: Deque[Any] = deque()
+        self.dropped = 0
+        self.coalesced = 0
+        self.closed = False
+
+        # created in the event loop (Python 3.7-3.9
+        # bind asyncio primitives to a loop on creation)
+        self.cond: Optional[asyncio.Condition] = None
+
+    def get_cond(self) -> asyncio.Condition:
+        """Returns the condition variable
+        creating it if needed
+
+        Returns:
+            asyncio.Condition object
+        """
+
+        if self.cond is None:
+            self.cond = asyncio.Condition()
+        return self.cond
+
+    async def put(self, msg: Any) -> None:
+        """Adds a message to the queue
+        applying the overflow policy if it is full
+
+        Args:
+            msg (Any): Message
+        """
+
+        cond = self.get_cond()
+        async with cond:
+
+            if self.closed:
+                return
+
+            if self.full():
+
+                if self.overflow == Overflow.block:
+                    await cond.wait_for(
+                        lambda: self.closed or not self.full()
+                    )
+                    if self.closed:
+                        return
+
+                elif self.overflow == Overflow.drop_oldest:
+                    self.items.popleft()
+                    self.dropped += 1
+
+                else:
+                    self.items[-1] = msg
+                    self.coalesced += 1
+                    return
+
+            self.items.append(msg)
+            cond.notify_all()
+
+    async def get(self) -> Any:
+        """Waits for a message
+        and removes it from the queue
+
+        Raises:
+            QueueClosedError: If the queue is closed and empty
+
+        Returns:
+            Message
+        """
+
+        cond = self.get_cond()
+        async with cond:
+            await cond.wait_for(lambda: self.items or self.closed)
+            if not self.items:
+                raise QueueClosedError('The queue is closed')
+            msg = self.items.popleft()
+            cond.notify_all()
+            return msg
+
+    async def get_many(self, limit: int) -> List[Any]:
+        """Waits for at least one message and returns
+        all queued messages, but not more than `limit`
+
+        Args:
+            limit (int): Max messages count
+
+        Raises:
+            QueueClosedError: If the queue is closed and empty
+
+        Returns:
+            List of messages
+        """
+
+        cond = self.get_cond()
+        async with cond:
+            await cond.wait_for(lambda: self.items or self.closed)
+            if not self.items:
+                raise QueueClosedError('The queue is closed')
+            count = min(limit, len(self.items))
+            msgs = [self.items.popleft() for _ in range(count)]
+            cond.notify_all()
+            return msgs
+
+    async def close(self) -> None:
+        """Closes the queue: new messages are ignored,
+        readers get the remaining ones
+        and then QueueClosedError"""
+
+        cond = self.get_cond()
+        async with cond:
+            self.closed = True
+            cond.notify_all()
+
+    def full(self) -> bool:
+        """Checks if the queue is full
+
+        Returns:
+            Is it full
+        """
+
+        return len(self.items) >= self.maxsize
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+
+class HandlerWorker:
+
+    """Calls one stream listener with messages
+    from its own bounded queue, in order"""
+
+    def __init__(
+            self,
+            func: Callable[[Any], Coroutine[Any, Any, None]],
+            maxsize: int = 1000,
+            overflow: Overflow = Overflow.block) -> None:
+        """Calls one stream listener with messages
+        from its own bounded queue, in order
+
+        Args:
+            func (Callable[[Any], Coroutine[Any, Any, None]]):
+                Listener taking one argument (a message)
+            maxsize (int, optional): Queue size
+            overflow (Overflow, optional): Overflow policy
+        """
+
+        self.func = func
+        self.queue = MessageQueue(maxsize, overflow)
+        self.task: Optional[asyncio.Task] = None
+
+    async def feed(self, msg: Any) -> None:
+        """Puts a message to the queue
+        starting the worker task if needed
+
+        Args:
+            msg (Any): Message
+        """
+
+        if self.task is None:
+            self.task = asyncio.create_task(self.run())
+        await self.queue.put(msg)
+
+    async def run(self) -> None:
+        """Worker loop"""
+
+        while True:
+            try:
+                msg = await self.queue.get()
+            except QueueClosedError:
+                return
+            try:
+                await self.func(msg)
+            # an Exception subclass in Python 3.7
+            except asyncio.CancelledError:  # pylint: disable=try-except-raise
+                raise
+            except Exception:  # pylint: disable=broad-exception-caught
+                log.exception('Error in a stream listener')
+
+    def stop(self) -> None:
+        """Cancels the worker task"""
+
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def finish(self) -> None:
+        """Closes the queue and waits until
+        the remaining messages are handled"""
+
+        await self.queue.close()
+        if self.task is not None:
+            await self.task
+            self.task = None
+
+    @property
+    def depth(self) -> int:
+        """Messages waiting in the queue
+
+        Returns:
+            Queue length
+        """
+
+        return len(self.queue)
+
+
+class Subscription(Sink):
+
+    """Stream messages consumed with `async for`.
+    Has its own bounded queue, so a slow consumer
+    doesn't affect other listeners
+    (unless the overflow policy is `block`)"""
+
+    def __init__(
+            self,
+            maxsize: int = 1000,
+            overflow: Overflow = Overflow.block,
+            on_close: Optional[Callable[['Subscription'], None]] = None) -> None:
+        """Stream messages consumed with `async for`
+
+        Args:
+            maxsize (int, optional): Queue size
+            overflow (Overflow, optional): Overflow policy
+            on_close (Optional[Callable[[Subscription], None]], optional):
+                Called when the subscription is closed
+        """
+
+        self.queue = MessageQueue(maxsize, overflow)
+        self.on_close = on_close
+
+    async def feed(self, msg: Any) -> None:
+        """Puts a message to the queue
+
+        Args:
+            msg (Any): Message
+        """
+
+        await self.queue.put(msg)
+
+    async def get(self) -> Any:
+        """Waits for the next message
+
+        Returns:
+            Message
+        """
+
+        return await self.queue.get()
+
+    async def get_many(self, limit: int = 100) -> List[Any]:
+        """Waits for messages and returns
+        all queued ones, but not more than `limit`
+
+        Args:
+            limit (int, optional): Max messages count
+
+        Returns:
+            List of messages
+        """
+
+        return await self.queue.get_many(limit)
+
+    async def batches(self, limit: int = 100) -> AsyncIterator[List[Any]]:
+        """Iterates over lists of messages,
+        see `get_many`
+
+        Args:
+            limit (int, optional): Max messages count in a list
+
+        Yields:
+            List of messages
+        """
+
+        while True:
+            try:
+                yield await self.queue.get_many(limit)
+            except QueueClosedError:
+                return
+
+    async def close(self) -> None:
+        """Unsubscribes, drops the queued messages
+        and stops the iteration"""
+
+        self.queue.items.clear()
+        await self.queue.close()
+        if self.on_close is not None:
+            self.on_close(self)
+            self.on_close = None
+
+    @property
+    def depth(self) -> int:
+        """Messages waiting in the queue
+
+        Returns:
+            Queue length
+        """
+
+        return len(self.queue)
+
+    def __aiter__(self) -> 'Subscription':
+        return self
+
+    async def __anext__(self) -> Any:
+        try:
+            return await self.queue.get()
+        except QueueClosedError as err:
+            raise StopAsyncIteration from err
+
+    async def __aenter__(self) -> 'Subscription':
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
+
+
+class Batcher(Sink):
+
+    """Gathers stream messages into lists and calls
+    a listener with a list when it reaches `size` messages
+    or `interval` seconds have passed since its first message.
+    Lists are delivered in order by one worker task"""
+
+    def __init__(
+            self,
+            func: Callable[[List[Any]], Coroutine[Any, Any, None]],
+            size: int = 100,
+            interval: float = 0.5,
+            maxsize: int = 100,
+            overflow: Overflow = Overflow.block) -> None:
+        """Gathers stream messages into lists
+
+        Args:
+            func (Callable[[List[Any]], Coroutine[Any, Any, None]]):
+                Listener taking a list of messages
+            size (int, optional): Max messages in a list
+            interval (float, optional): Max seconds
+                a message waits in the list
+            maxsize (int, optional): How many lists
+                can wait for the listener
+            overflow (Overflow, optional): Overflow policy
+                for the lists queue
+        """
+
+        self.func = func
+        self.size = size
+        self.interval = interval
+
+        self.buffer: List[Any] = []
+        self.timer: Optional[asyncio.Task] = None
+        self.worker = HandlerWorker(func, maxsize, overflow)
+
+    async def feed(self, msg: Any) -> None:
+        self.buffer.append(msg)
+
+        if len(self.buffer) >= self.size:
+            await self.flush()
+
+        elif self.timer is None:
+            self.timer = asyncio.create_task(self.wait_flush())
+
+    async def wait_flush(self) -> None:
+        """Flushes the list after `interval`"""
+
+        await asyncio.sleep(self.interval)
+        self.timer = None
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Passes the gathered messages to the listener"""
+
+        if self.timer is not None:
+            if self.timer is not asyncio.current_task():
+                self.timer.cancel()
+            self.timer = None
+
+        batch, self.buffer = self.buffer, []
+        if batch:
+            await self.worker.feed(batch)
+
+    async def close(self) -> None:
+        """Waits until the worker delivers the queued lists
+        (including the one being handled), then delivers
+        the remaining messages directly"""
+
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+        await self.worker.finish()
+        if self.buffer:
+            batch, self.buffer = self.buffer, []
+            await self.func(batch)
@@ -0,0 +1,338 @@
+"""Writes websocket streams
+to rotating JSON Lines files"""
+
+import os
+import re
+import gzip
+import json
+import time
+import shutil
+import asyncio
+
+from pathlib import Path
+from concurrent.futures import Executor
+
+from typing import Any, Optional, Union
+from typing import Iterable, List, IO
+from typing import TYPE_CHECKING
+
+from .atlog import log
+from .atwss import Streams
+from .atqueue import Sink
+
+if TYPE_CHECKING:
+    from .atwss import AternosWss
+
+
+RECORDED = (
+    Streams.console,
+    Streams.status,
+    Streams.ram,
+    Streams.tps,
+)
+
+
+class RecordSink(Sink):
+
+    """Passes the messages of a stream to StreamRecorder"""
+
+    def __init__(
+            self,
+            recorder: 'StreamRecorder',
+            stream: Streams) -> None:
+        """Passes the messages of a stream to StreamRecorder
+
+        Args:
+            recorder (StreamRecorder): Recorder
+            stream (Streams): Stream type
+        """
+
+        self.recorder = recorder
+        self.stream = stream
+
+    async def feed(self, msg: Any) -> None:
+        self.recorder.record(self.stream, msg)
+
+
+class StreamRecorder:  # pylint: disable=too-many-instance-attributes
+
+    """Appends websocket messages to a JSON Lines file:
+    one `{"t": unix time, "s": stream name, "d": message}`
+    object per line. The lines are buffered in memory
+    and written by an executor thread, so the receiver
+    never waits for the disk. When the file reaches `max_bytes`
+    or `max_age` seconds, it's renamed to
+    `name-YYYYmmdd-HHMMSS.jsonl` (and gzipped if `compress`)"""
+
+    def __init__(
+            self,
+            path: Union[str, Path],
+            max_bytes: int = 64 * 1024 * 1024,
+            max_age: Optional[float] = None,
+            backups: int = 10,
+            compress: bool = False,
+            buffer_size: int = 64 * 1024,
+            interval: float = 1.0,
+            executor: Optional[Executor] = None) -> None:
+        """Appends websocket messages to a JSON Lines file
+
+        Args:
+            path (Union[str, Path]): File path, e.g. `logs/server.jsonl`
+            max_bytes (int, optional): Rotate when the file
+                is larger than this size
+            max_age (Optional[float], optional): Rotate when the file
+                is older than this number of seconds, None disables
+            backups (int, optional): How many rotated files to keep
+            compress (bool, optional): Gzip rotated files
+            buffer_size (int, optional): Write when the buffer
+                has this many characters
+            interval (float, optional): Write the buffered lines
+                at least once in this number of seconds
+            executor (Optional[Executor], optional):
+                Executor for the file operations,
+                the loop's default one if None
+        """
+
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.backups = backups
+        self.compress = compress
+        self.buffer_size = buffer_size
+        self.interval = interval
+        self.executor = executor
+
+        self.buffer: List[str] = []
+        self.buffered = 0
+        self.timer: Optional[asyncio.Task] = None
+        self.writer: Optional[asyncio.Task] = None
+        self.closed = False
+
+        # used only in the executor thread
+        self.file: Optional[IO[bytes]] = None
+        self.size = 0
+        self.opened = 0.0
+
+        # Stats
+        self.records = 0
+        self.written = 0
+        self.rotations = 0
+        self.errors = 0
+
+    def attach(
+            self,
+            wss: 'AternosWss',
+            streams: Iterable[Streams] = RECORDED) -> 'StreamRecorder':
+        """Starts recording the streams of the websocket connection.
+        The recorder is not closed with the connection,
+        call `close()` to write the remaining lines
+
+        Args:
+            wss (AternosWss): Websocket connection
+            streams (Iterable[Streams], optional): Streams to record,
+                console, status, RAM and TPS by default
+
+        Returns:
+            The same object
+        """
+
+        for stream in streams:
+            wss.add_sink(stream, RecordSink(self, stream))
+        return self
+
+    def record(self, stream: Streams, msg: Any) -> None:
+        """Adds a message to the buffer
+
+        Args:
+            stream (Streams): Stream type
+            msg (Any): Message
+        """
+
+        if self.closed:
+            return
+
+        line = json.dumps(
+            {'t': round(time.time(), 3), 's': stream.name, 'd': msg},
+            ensure_ascii=False,
+            separators=(',', ':'),
+        ) + '\n'
+
+        self.buffer.append(line)
+        self.buffered += len(line)
+        self.records += 1
+
+        if self.buffered >= self.buffer_size:
+            self.schedule()
+        elif self.timer is None:
+            self.timer = asyncio.create_task(self.wait_flush())
+
+    async def wait_flush(self) -> None:
+
+        """Writes the buffer after `interval`"""
+
+        await asyncio.sleep(self.interval)
+        self.timer = None
+        self.schedule()
+
+    def schedule(self) -> None:
+
+        """Starts writing the buffer
+        unless it's already being written"""
+
+        if self.writer is None or self.writer.done():
+            self.writer = asyncio.create_task(self.flush())
+
+    async def flush(self) -> None:
+
+        """Writes the buffered lines to the file,
+        the lines added while writing are also written"""
+
+        loop = asyncio.get_running_loop()
+
+        while self.buffer:
+
+            data = ''.join(self.buffer).encode('utf-8')
+            self.buffer = []
+            self.buffered = 0
+
+            try:
+                await loop.run_in_executor(self.executor, self.write, data)
+            except OSError:
+                self.errors += 1
+                log.exception('Unable to write %s', self.path)
+
+    async def close(self) -> None:
+
+        """Writes the remaining lines and closes the file,
+        the messages recorded after that are ignored"""
+
+        # one writer at a time, it also writes
+        # the lines recorded while it's running
+        self.schedule()
+        assert self.writer is not None
+        await self.writer
+        self.writer = None
+        self.closed = True
+
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+        if self.file is not None:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self.executor, self.file.close)
+            self.file = None
+
+    def write(self, data: bytes) -> None:
+        """Appends data to the file rotating it if needed,
+        called in the executor
+
+        Args:
+            data (bytes): Encoded lines
+        """
+
+        if self.file is None:
+            self.open()
+        elif self.should_rotate(len(data)):
+            self.rotate()
+
+        assert self.file is not None
+        self.file.write(data)
+        self.file.flush()
+        self.size += len(data)
+        self.written += len(data)
+
+    def open(self) -> None:
+
+        """Opens the file for appending"""
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.file = open(self.path, 'ab')  # pylint: disable=consider-using-with
+        self.size = self.file.tell()
+        self.opened = time.time()
+
+    def should_rotate(self, length: int) -> bool:
+        """Checks if the file must be rotated
+        before writing `length` bytes
+
+        Args:
+            length (int): Data length
+
+        Returns:
+            Is the rotation needed
+        """
+
+        if self.size == 0:
+            return False
+
+        if self.size + length > self.max_bytes:
+            return True
+
+        if self.max_age is None:
+            return False
+
+        return time.time() - self.opened >= self.max_age
+
+    def rotate(self) -> None:
+
+        """Renames the current file, compresses it
+        if needed, removes the old ones and opens a new file"""
+
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        target = self.path.with_name(
+            f'{self.path.stem}-{stamp}{self.path.suffix}'
+        )
+        num = 1
+        while target.exists() or Path(f'{target}.gz').exists():
+            target = self.path.with_name(
+                f'{self.path.stem}-{stamp}.{num}{self.path.suffix}'
+            )
+            num += 1
+
+        os.replace(self.path, target)
+
+        if self.compress:
+            with open(target, 'rb') as src:
+                with gzip.open(f'{target}.gz', 'wb') as dst:
+                    shutil.copyfileobj(src, dst)
+            target.unlink()
+
+        self.rotations += 1
+        self.prune()
+        self.open()
+
+    def rotated(self) -> List[Path]:
+        """Lists the rotated files
+
+        Returns:
+            Paths, the oldest first
+        """
+
+        # only the names written by rotate(), so `srv-2.jsonl`
+        # of another recorder is not taken for a backup of `srv.jsonl`
+        name_re = re.compile(''.join((
+            re.escape(self.path.stem),
+            r'-\d{8}-\d{6}(?:\.\d+)?',
+            re.escape(self.path.suffix),
+            r'(?:\.gz)?',
+        )))
+        return sorted(
+            (
+                path for path in self.path.parent.glob(f'{self.path.stem}-*')
+                if name_re.fullmatch(path.name)
+            ),
+            key=lambda path: (path.stat().st_mtime, path.name),
+        )
+
+    def prune(self) -> None:
+
+        """Removes the oldest rotated files
+        if there are more than `backups` of them"""
+
+        files = self.rotated()
+        for old in files[:max(0, len(files) - self.backups)]:
+            old.unlink()
@@ -0,0 +1,383 @@
+"""Local websocket server replaying
+recorded Aternos sessions, for testing
+AternosWss without a real server"""
+
+import json
+import asyncio
+
+from pathlib import Path
+
+from typing import Any, Optional, Union
+from typing import Iterable, List, Dict, Set
+from typing import NamedTuple
+
+from .atlog import log
+
+
+class Frame(NamedTuple):
+
+    """Message sent by the replay server
+    `delay` seconds after the previous one"""
+
+    data: str
+    delay: float = 0.0
+
+    @property
+    def stream(self) -> Optional[str]:
+        """Stream name of the message (e.g. `console`),
+        None for the status and other messages
+
+        Returns:
+            Stream name
+        """
+
+        return json.loads(self.data).get('stream')
+
+
+def line_frame(text: str, delay: float = 0.0) -> Frame:
+    """Creates a console line message
+
+    Args:
+        text (str): Console line
+        delay (float, optional): Delay in seconds
+
+    Returns:
+        Frame object
+    """
+
+    return Frame(json.dumps({
+        'stream': 'console',
+        'type': 'line',
+        'data': text + '\r',
+    }), delay)
+
+
+def status_frame(info: Dict[str, Any], delay: float = 0.0) -> Frame:
+    """Creates a status message
+
+    Args:
+        info (Dict[str, Any]): `lastStatus` object
+        delay (float, optional): Delay in seconds
+
+    Returns:
+        Frame object
+    """
+
+    return Frame(json.dumps({
+        'type': 'status',
+        'message': json.dumps(info),
+    }), delay)
+
+
+def heap_frame(usage: int, delay: float = 0.0) -> Frame:
+    """Creates a RAM usage message
+
+    Args:
+        usage (int): Used heap in bytes
+        delay (float, optional): Delay in seconds
+
+    Returns:
+        Frame object
+    """
+
+    return Frame(json.dumps({
+        'stream': 'heap',
+        'type': 'heap',
+        'data': {'usage': usage},
+    }), delay)
+
+
+def tick_frame(tps: float, delay: float = 0.0) -> Frame:
+    """Creates a TPS message
+
+    Args:
+        tps (float): Ticks per second
+        delay (float, optional): Delay in seconds
+
+    Returns:
+        Frame object
+    """
+
+    return Frame(json.dumps({
+        'stream': 'tick',
+        'type': 'tick',
+        'data': {'averageTickTime': 1000 / tps},
+    }), delay)
+
+
+def parse_session(text: str) -> List[Frame]:
+    """Takes the server messages (`S> {...}` lines)
+    from a session log in the `aternos_ws.txt` format
+
+    Args:
+        text (str): Session log
+
+    Returns:
+        List of frames without delays
+    """
+
+    frames = []
+    for row in text.splitlines():
+        row = row.strip()
+        if row.startswith('S> {'):
+            frames.append(Frame(row[3:]))
+    return frames
+
+
+def load_recording(path: Union[str, Path]) -> List[Frame]:
+    """Converts a JSON Lines file written by
+    `atrecorder.StreamRecorder` into frames
+    with the original delays
+
+    Args:
+        path (Union[str, Path]): File path
+
+    Returns:
+        List of frames
+    """
+
+    frames = []
+    last: Optional[float] = None
+
+    with open(path, 'rt', encoding='utf-8') as file:
+        for row in file:
+
+            rec = json.loads(row)
+            delay = 0.0 if last is None else max(0.0, rec['t'] - last)
+            last = rec['t']
+
+            if rec['s'] == 'console':
+                frames.append(line_frame(rec['d'], delay))
+            elif rec['s'] == 'status':
+                frames.append(status_frame(rec['d'], delay))
+            elif rec['s'] == 'ram':
+                frames.append(heap_frame(rec['d'], delay))
+            elif rec['s'] == 'tps':
+                frames.append(tick_frame(rec['d'], delay))
+
+    return frames
+
+
+def flood(count: int, rate: Optional[float] = None) -> List[Frame]:
+    """Creates console lines for load testing
+
+    Args:
+        count (int): Lines count
+        rate (Optional[float], optional): Lines per second,
+            None means as fast as possible
+
+    Returns:
+        List of frames
+    """
+
+    delay = 0.0 if rate is None else 1 / rate
+    return [
+        line_frame(
+            f'[00:00:00] [Server thread/INFO]: Flood line {i}',
+            delay,
+        )
+        for i in range(count)
+    ]
+
+
+class ReplayServer:  # pylint: disable=too-many-instance-attributes
+
+    """Websocket server imitating `wss://aternos.org/hermes/`:
+    sends the `ready` message, answers stream start requests,
+    echoes console commands and replays the frames
+    to each client. Use `url` as `AternosWss` endpoint"""
+
+    def __init__(
+            self,
+            frames: Iterable[Frame] = (),
+            speed: Optional[float] = 1.0,
+            outputs: Optional[Dict[str, List[str]]] = None,
+            require_start: bool = False,
+            servid: str = 'replay',
+            host: str = '127.0.0.1',
+            port: int = 0) -> None:
+        """Websocket server imitating `wss://aternos.org/hermes/`
+
+        Args:
+            frames (Iterable[Frame], optional): Messages to replay
+            speed (Optional[float], optional): Delays are divided
+                by this number, None means no delays at all
+            outputs (Optional[Dict[str, List[str]]], optional):
+                Console lines printed after a command (without slash)
+            require_start (bool, optional): Send the messages of a stream
+                only after the client requests it, like Aternos does.
+                Other messages (including the command output
+                without the console stream) are skipped
+            servid (str, optional): Server ID in the `ready` message
+            host (str, optional): Address to listen on
+            port (int, optional): Port, 0 is any free port
+        """
+
+        self.frames = list(frames)
+        self.speed = speed
+        self.outputs = outputs or {}
+        self.require_start = require_start
+        self.servid = servid
+        self.host = host
+        self.port = port
+
+        self.server: Any = None
+        self.clients: Set[Any] = set()
+
+        # Stats
+        self.sent = 0
+        self.received: List[Dict[str, Any]] = []
+        self.finished: Optional[asyncio.Event] = None
+
+    @property
+    def url(self) -> str:
+        """Websocket URL of the server
+
+        Returns:
+            URL
+        """
+
+        return f'ws://{self.host}:{self.port}/hermes/'
+
+    async def start(self) -> 'ReplayServer':
+        """Starts listening
+
+        Returns:
+            The same object
+        """
+
+        import websockets  # pylint: disable=import-outside-toplevel
+
+        self.finished = asyncio.Event()
+        self.server = await websockets.serve(  # type: ignore
+            self.handler, self.host, self.port,
+        )
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self) -> None:
+
+        """Stops the server"""
+
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    async def __aenter__(self) -> 'ReplayServer':
+        return await self.start()
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
+
+    async def handler(self, socket: Any) -> None:
+        """Serves one client
+
+        Args:
+            socket (Any): Websocket connection
+        """
+
+        from websockets.exceptions import ConnectionClosed  # pylint: disable=import-outside-toplevel
+
+        started: Set[str] = set()
+        self.clients.add(socket)
+
+        await socket.send(json.dumps({
+            'type': 'ready',
+            'data': self.servid,
+        }))
+
+        replay = asyncio.create_task(self.replay(socket, started))
+        try:
+            async for data in socket:
+                await self.answer(socket, json.loads(data), started)
+        except ConnectionClosed:
+            pass
+        finally:
+            replay.cancel()
+            self.clients.discard(socket)
+
+    async def answer(
+            self,
+            socket: Any,
+            obj: Dict[str, Any],
+            started: Set[str]) -> None:
+        """Responds to a client message
+
+        Args:
+            socket (Any): Websocket connection
+            obj (Dict[str, Any]): Message
+            started (Set[str]): Streams requested by the client
+        """
+
+        self.received.append(obj)
+        msgtype = obj.get('type')
+        stream = obj.get('stream')
+
+        if msgtype == 'start' and stream:
+            started.add(stream)
+            await socket.send('{"type":"connected"}')
+            await socket.send(json.dumps({
+                'stream': stream,
+                'type': 'started',
+            }))
+
+        elif msgtype == 'stop' and stream:
+            started.discard(stream)
+            await socket.send(json.dumps({
+                'stream': stream,
+                'type': 'stopped',
+            }))
+
+        elif msgtype == 'command':
+            if self.require_start and 'console' not in started:
+                return
+            cmd = obj.get('data', '')
+            lines = [cmd, *self.outputs.get(cmd.lstrip('/'), ())]
+            for text in lines:
+                await socket.send(line_frame(text).data)
+
+    async def replay(self, socket: Any, started: Set[str]) -> None:
+        """Sends the frames to a client
+
+        Args:
+            socket (Any): Websocket connection
+            started (Set[str]): Streams requested by the client
+        """
+
+        from websockets.exceptions import ConnectionClosed  # pylint: disable=import-outside-toplevel
+
+        try:
+            for frame in self.frames:
+
+                if self.speed and frame.delay > 0:
+                    await asyncio.sleep(frame.delay / self.speed)
+
+                if self.require_start:
+                    stream = frame.stream
+                    if stream is not None and stream not in started:
+                        continue
+
+                await socket.send(frame.data)
+                self.sent += 1
+
+        except ConnectionClosed:
+            log.debug('Replay: client disconnected')
+
+        if self.finished is not None:
+            self.finished.set()
+
+    async def broadcast(self, frames: Iterable[Frame]) -> None:
+        """Sends frames to all connected clients,
+        e.g. `flood()` lines
+
+        Args:
+            frames (Iterable[Frame]): Messages
+        """
+
+        for frame in frames:
+            if self.speed and frame.delay > 0:
+                await asyncio.sleep(frame.delay / self.speed)
+            for socket in tuple(self.clients):
+                await socket.send(frame.data)
+                self.sent += 1
@@ -0,0 +1,343 @@
+"""Rolling RAM and TPS time series
+received from the websocket streams"""
+
+import math
+import time
+
+from array import array
+
+from typing import Any, Optional
+from typing import List, Dict, Tuple
+from typing import TYPE_CHECKING
+
+from .atwss import Streams
+from .atqueue import Sink
+
+if TYPE_CHECKING:
+    from .atwss import AternosWss
+
+
+class Series:
+
+    """Fixed-size ring buffer of (timestamp, value) pairs
+    stored in two `array.array('d')` instead of a list of floats.
+    When it's full, the oldest values are overwritten"""
+
+    def __init__(self, capacity: int = 3600) -> None:
+        """Fixed-size ring buffer of timestamped values
+
+        Args:
+            capacity (int, optional): Max values count
+
+        Raises:
+            ValueError: If the capacity is less than 1
+        """
+
+        if capacity < 1:
+            raise ValueError('Capacity must be positive')
+
+        self.capacity = capacity
+        self.times = array('d', bytes(8 * capacity))
+        self.values = array('d', bytes(8 * capacity))
+
+        # next write position and total values written
+        self.pos = 0
+        self.count = 0
+
+        # stats() results by the first value index,
+        # valid until the next append
+        self.cache: Dict[int, Dict[str, float]] = {}
+
+    def append(self, value: float, ts: Optional[float] = None) -> None:
+        """Adds a value
+
+        Args:
+            value (float): Value
+            ts (Optional[float], optional): Unix timestamp,
+                the current time if None. Must not decrease
+        """
+
+        if ts is None:
+            ts = time.time()
+
+        self.times[self.pos] = ts
+        self.values[self.pos] = value
+        self.pos = (self.pos + 1) % self.capacity
+        self.count += 1
+        self.cache.clear()
+
+    def index(self, i: int) -> int:
+        """Converts a logical index (0 is the oldest value)
+        to a position in the arrays
+
+        Args:
+            i (int): Logical index
+
+        Returns:
+            Position in the arrays
+        """
+
+        if self.count < self.capacity:
+            return i
+        return (self.pos + i) % self.capacity
+
+    def bisect(self, ts: float) -> int:
+        """Finds the logical index of the first value
+        with the timestamp not less than `ts`
+
+        Args:
+            ts (float): Unix timestamp
+
+        Returns:
+            Logical index
+        """
+
+        low, high = 0, len(self)
+        while low < high:
+            mid = (low + high) // 2
+            if self.times[self.index(mid)] < ts:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def items(
+            self,
+            window: Optional[float] = None,
+            now: Optional[float] = None) -> List[Tuple[float, float]]:
+        """Returns (timestamp, value) pairs, the oldest first
+
+        Args:
+            window (Optional[float], optional):
+                Only the values of the last `window` seconds,
+                all values if None
+            now (Optional[float], optional): The end of the window,
+                the current time if None
+
+        Returns:
+            List of (timestamp, value) tuples
+        """
+
+        values = self.last(window, now)
+        start = len(self) - len(values)
+        return [
+            (self.times[self.index(start + i)], value)
+            for i, value in enumerate(values)
+        ]
+
+    def last(
+            self,
+            window: Optional[float] = None,
+            now: Optional[float] = None) -> List[float]:
+        """Returns the values, the oldest first
+
+        Args:
+            window (Optional[float], optional):
+                Only the values of the last `window` seconds,
+                all values if None
+            now (Optional[float], optional): The end of the window,
+                the current time if None
+
+        Returns:
+            List of values
+        """
+
+        return self.slice(self.start(window, now))
+
+    def start(
+            self,
+            window: Optional[float] = None,
+            now: Optional[float] = None) -> int:
+        """Finds the logical index of the first value in the window
+
+        Args:
+            window (Optional[float], optional):
+                Window in seconds, all values if None
+            now (Optional[float], optional): The end of the window,
+                the current time if None
+
+        Returns:
+            Logical index
+        """
+
+        if window is None:
+            return 0
+        if now is None:
+            now = time.time()
+        return self.bisect(now - window)
+
+    def slice(self, start: int) -> List[float]:
+        """Returns the values from the logical index `start`
+
+        Args:
+            start (int): Logical index
+
+        Returns:
+            List of values, the oldest first
+        """
+
+        # at most two slices of the array
+        first = self.index(start)
+        size = len(self) - start
+        if first + size <= self.capacity:
+            return self.values[first:first + size].tolist()
+        values = self.values[first:].tolist()
+        values.extend(self.values[:first + size - self.capacity])
+        return values
+
+    def stats(self, window: Optional[float] = None) -> Dict[str, float]:
+        """Aggregates over the values of the last `window` seconds.
+        Results are cached until a new value is added
+
+        Args:
+            window (Optional[float], optional):
+                Window in seconds, all values if None
+
+        Returns:
+            Dict with `count`, `min`, `avg`, `max`, `p95` and `last`.
+            Without values, only `count` (zero) is included
+        """
+
+        start = self.start(window)
+        cached = self.cache.get(start)
+        if cached is not None:
+            return cached
+
+        values = self.slice(start)
+        if not values:
+            return {'count': 0}
+
+        last = values[-1]
+        values.sort()
+        count = len(values)
+
+        result = {
+            'count': count,
+            'min': values[0],
+            'avg': math.fsum(values) / count,
+            'max': values[-1],
+            # nearest-rank percentile
+            'p95': values[math.ceil(0.95 * count) - 1],
+            'last': last,
+        }
+        self.cache[start] = result
+        return result
+
+    def downsample(
+            self,
+            step: float,
+            window: Optional[float] = None) -> List[Tuple[float, float, float, float]]:
+        """Groups the values into `step`-second buckets,
+        e.g. for drawing a chart
+
+        Args:
+            step (float): Bucket size in seconds
+            window (Optional[float], optional):
+                Only the last `window` seconds, all values if None
+
+        Returns:
+            List of (bucket start timestamp, min, avg, max) tuples
+            for non-empty buckets, the oldest first
+        """
+
+        result = []
+        bucket = None
+        low = high = total = 0.0
+        count = 0
+
+        for ts, value in self.items(window):
+
+            start = ts - ts % step
+            if start != bucket:
+                if bucket is not None:
+                    result.append((bucket, low, total / count, high))
+                bucket = start
+                low = high = total = value
+                count = 1
+                continue
+
+            low = min(low, value)
+            high = max(high, value)
+            total += value
+            count += 1
+
+        if bucket is not None:
+            result.append((bucket, low, total / count, high))
+
+        return result
+
+    def clear(self) -> None:
+
+        """Removes all values"""
+
+        self.pos = 0
+        self.count = 0
+        self.cache.clear()
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+
+class SeriesSink(Sink):
+
+    """Stores messages of a numeric stream in a Series"""
+
+    def __init__(self, series: Series) -> None:
+        """Stores messages of a numeric stream in a Series
+
+        Args:
+            series (Series): Series object
+        """
+
+        self.series = series
+
+    async def feed(self, msg: Any) -> None:
+        self.series.append(msg)
+
+
+class ServerMetrics:
+
+    """RAM (used heap, bytes) and TPS (ticks per second)
+    series of one server, filled from the websocket streams"""
+
+    def __init__(self, capacity: int = 3600) -> None:
+        """RAM and TPS series of one server
+
+        Args:
+            capacity (int, optional): Max values count in each series
+                (the streams send about one value per second)
+        """
+
+        self.ram = Series(capacity)
+        self.tps = Series(capacity)
+
+    def attach(self, wss: 'AternosWss') -> 'ServerMetrics':
+        """Starts recording the RAM and TPS streams
+        of the websocket connection
+
+        Args:
+            wss (AternosWss): Websocket connection
+
+        Returns:
+            The same object
+        """
+
+        wss.add_sink(Streams.ram, SeriesSink(self.ram))
+        wss.add_sink(Streams.tps, SeriesSink(self.tps))
+        return self
+
+    def stats(self, window: Optional[float] = None) -> Dict[str, Dict[str, float]]:
+        """Aggregates of both series, see `Series.stats`
+
+        Args:
+            window (Optional[float], optional):
+                Window in seconds, all values if None
+
+        Returns:
+            Dict with `ram` and `tps` keys
+        """
+
+        return {
+            'ram': self.ram.stats(window),
+            'tps': self.tps.stats(window),
+        }
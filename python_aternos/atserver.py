@@ -2,11 +2,14 @@
 
 import re
 import json
+import time
 
 import enum
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
+from typing import Callable
 from functools import partial
 
+from .atlog import log
 from .atconnect import BASE_URL, AJAX_URL
 from .atconnect import AternosConnect
 from .atwss import AternosWss
@@ -26,6 +29,8 @@ status_re = re.compile(
     r'<script>\s*var lastStatus\s*?=\s*?(\{.+?\});?\s*<\/script>'
 )
 
+ChangesT = Dict[str, Tuple[Any, Any]]
+
 
 class Edition(enum.IntEnum):
 
@@ -55,7 +60,7 @@ class Status(enum.IntEnum):
     confirm = 10
 
 
-class AternosServer:
+class AternosServer:  # pylint: disable=too-many-public-methods
     """Class for controlling your Aternos Minecraft server"""
 
     def __init__(
@@ -76,6 +81,8 @@ class AternosServer:
         self.atconn = atconn
 
         self._info: Dict[str, Any] = {}
+        self.updated = 0.0
+        self.callbacks: List[Callable[[ChangesT], None]] = []
 
         self.atserver_request = partial(
             self.atconn.request_cloudflare,
@@ -90,6 +97,20 @@ class AternosServer:
     def fetch(self) -> None:
         """Get all server info"""
 
+        self.update(self.fetch_info(), replace=True)
+
+    def fetch_info(self) -> Dict[str, Any]:
+        """Requests the server info without updating
+        this object, e.g. to call `update()` later
+        in another thread
+
+        Raises:
+            AternosError: If the info can't be found on the page
+
+        Returns:
+            `lastStatus` object
+        """
+
         page = self.atserver_request(
             f'{BASE_URL}/server', 'GET'
         )
@@ -98,9 +119,74 @@ class AternosServer:
         if match is None:
             raise AternosError('Unable to parse lastStatus object')
 
-        self._info = json.loads(match[1])
+        return json.loads(match[1])
+
+    def update(
+            self,
+            info: Dict[str, Any],
+            replace: bool = False) -> ChangesT:
+        """Updates the server info in place, e.g. with
+        a `lastStatus` object from the websocket status stream,
+        and calls the `onchange` callbacks if anything has changed
+
+        Args:
+            info (Dict[str, Any]): Server info dictionary
+            replace (bool, optional): Replace the whole info
+                (e.g. with `fetch_info()` result), so the keys
+                missing in `info` are removed, instead of merging
+
+        Returns:
+            Changed keys with (old value, new value) tuples,
+            the new value of a removed key is None
+        """
+
+        changes = {
+            key: (self._info.get(key), value)
+            for key, value in info.items()
+            if self._info.get(key) != value
+        }
+
+        if replace:
+            for key, value in self._info.items():
+                if key not in info:
+                    changes[key] = (value, None)
+            self._info = dict(info)
+        else:
+            self._info.update(info)
+        self.updated = time.time()
+
+        if changes:
+            for func in tuple(self.callbacks):
+                try:
+                    func(changes)
+                except Exception:  # pylint: disable=broad-exception-caught
+                    log.exception('Error in a server info callback')
+
+        return changes
+
+    def onchange(
+            self,
+            func: Callable[[ChangesT], None]) -> Callable[[ChangesT], None]:
+        """Decorator that registers a function called
+        with the changed keys (a dict of `key: (old, new)`)
+        each time the server info is updated.
+        Called by the websocket receiver when the server
+        is bound to AternosWss, so it must return quickly
+
+        Args:
+            func (Callable[[ChangesT], None]): Callback
+
+        Returns:
+            The same function
+        """
+
+        self.callbacks.append(func)
+        return func
 
-    def wss(self, autoconfirm: bool = False) -> AternosWss:
+    def wss(
+            self,
+            autoconfirm: bool = False,
+            live: bool = False) -> AternosWss:
         """Returns AternosWss instance for
         listening server streams in real-time
 
@@ -109,12 +195,15 @@ class AternosServer:
                 Automatically start server status listener
                 when AternosWss connects to API to confirm
                 server launching
+            live (bool, optional):
+                Update this object's info
+                from the websocket status messages
 
         Returns:
             AternosWss object
         """
 
-        return AternosWss(self, autoconfirm)
+        return AternosWss(self, autoconfirm, live=live)
 
     def start(
             self,
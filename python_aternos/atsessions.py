@@ -0,0 +1,390 @@
+"""Online players and play sessions
+tracked from the console stream"""
+
+import re
+import time
+
+from array import array
+
+from typing import Any, Optional
+from typing import Iterable, List, Dict, Tuple
+from typing import NamedTuple
+from typing import TYPE_CHECKING
+
+from .atwss import Streams
+from .atqueue import Sink
+from .atconsole import parse_line
+
+if TYPE_CHECKING:
+    from .atwss import AternosWss
+
+
+# Java:
+# Steve joined the game
+# Steve left the game
+# Steve lost connection: Disconnected
+# Bedrock:
+# Player connected: Steve, xuid: 2535412345678901
+# Player disconnected: Steve, xuid: 2535412345678901
+# The name can't start with `<` or `[`,
+# so chat messages like `<Alex> Steve joined the game` are skipped
+join_re = re.compile(
+    r'(?:(?P<java>[^\s<\[][^\s]{0,31}) joined the game'
+    r'|Player connected: (?P<bedrock>[^,]+),.*)'
+)
+leave_re = re.compile(
+    r'(?:(?P<java>[^\s<\[][^\s]{0,31}) '
+    r'(?:left the game|lost connection: .*)'
+    r'|Player disconnected: (?P<bedrock>[^,]+),.*)'
+)
+stop_re = re.compile(r'Stopping (?:the )?server')
+
+
+class Session(NamedTuple):
+
+    """Play session, `end` is None
+    if the player is still online"""
+
+    name: str
+    start: float
+    end: Optional[float] = None
+
+    def duration(self, now: Optional[float] = None) -> float:
+        """Session length in seconds
+
+        Args:
+            now (Optional[float], optional): The end of an open session,
+                the current time if None
+
+        Returns:
+            Duration
+        """
+
+        end = self.end
+        if end is None:
+            end = time.time() if now is None else now
+        return end - self.start
+
+
+class SnapshotSink(Sink):
+
+    """Passes the status stream player lists
+    to SessionTracker.reconcile"""
+
+    def __init__(self, tracker: 'SessionTracker') -> None:
+        """Passes the status stream player lists
+        to SessionTracker.reconcile
+
+        Args:
+            tracker (SessionTracker): Tracker
+        """
+
+        self.tracker = tracker
+
+    async def feed(self, msg: Any) -> None:
+        players = msg.get('playerlist')
+        if players is not None:
+            self.tracker.reconcile(players)
+
+
+class SessionTracker(Sink):  # pylint: disable=too-many-instance-attributes
+
+    """Keeps the set of online players up to date using
+    join, leave and disconnect console lines, so the presence
+    is known without polling `AternosServer.fetch()`.
+    Finished sessions are stored in arrays: a player number
+    (names are kept once) and the start and end timestamps.
+    When there are more than `max_sessions` of them,
+    the oldest 10% are removed"""
+
+    def __init__(self, max_sessions: int = 100000) -> None:
+        """Tracks online players and their sessions
+
+        Args:
+            max_sessions (int, optional): Max finished sessions count
+        """
+
+        self.max_sessions = max_sessions
+
+        # name -> session start
+        self.online: Dict[str, float] = {}
+        # name -> sum of the finished sessions durations
+        self.totals: Dict[str, float] = {}
+
+        # finished sessions
+        self.names: List[str] = []
+        self.numbers: Dict[str, int] = {}
+        self.players = array('L')
+        self.starts = array('d')
+        self.ends = array('d')
+
+        # Stats
+        self.joins = 0
+        self.leaves = 0
+        self.reconciled = 0
+
+    def attach(
+            self,
+            wss: 'AternosWss',
+            reconcile: bool = True) -> 'SessionTracker':
+        """Starts tracking the console stream of the websocket
+        connection and, if `reconcile` is True, corrects
+        the online set with the status stream player lists
+
+        Args:
+            wss (AternosWss): Websocket connection
+            reconcile (bool, optional): Use the status messages
+
+        Returns:
+            The same object
+        """
+
+        wss.add_sink(Streams.console, self)
+        if reconcile:
+            wss.add_sink(Streams.status, SnapshotSink(self))
+        return self
+
+    async def feed(self, msg: Any) -> None:
+        self.parse(msg)
+
+    def parse(self, line: str, ts: Optional[float] = None) -> bool:
+        """Updates the online set if the line
+        is a join, leave or server stop message
+
+        Args:
+            line (str): Console line
+            ts (Optional[float], optional): Unix timestamp,
+                the current time if None
+
+        Returns:
+            Is the line recognized
+        """
+
+        # quick check before parsing
+        if 'game' not in line and 'onnect' not in line and 'Stopping' not in line:
+            return False
+
+        parsed = parse_line(line)
+        if parsed.level not in (None, 'INFO'):
+            return False
+        message = parsed.message
+
+        found = join_re.fullmatch(message)
+        if found is not None:
+            self.join(found['java'] or found['bedrock'], ts)
+            return True
+
+        found = leave_re.fullmatch(message)
+        if found is not None:
+            self.leave(found['java'] or found['bedrock'], ts)
+            return True
+
+        if stop_re.match(message):
+            self.reset(ts)
+            return True
+
+        return False
+
+    def join(self, name: str, ts: Optional[float] = None) -> None:
+        """Opens a session
+
+        Args:
+            name (str): Player name
+            ts (Optional[float], optional): Unix timestamp,
+                the current time if None
+        """
+
+        if name in self.online:
+            return
+
+        self.online[name] = time.time() if ts is None else ts
+        self.joins += 1
+
+    def leave(self, name: str, ts: Optional[float] = None) -> Optional[Session]:
+        """Closes the session of a player.
+        Vanilla prints both `lost connection`
+        and `left the game`, the second one is ignored
+
+        Args:
+            name (str): Player name
+            ts (Optional[float], optional): Unix timestamp,
+                the current time if None
+
+        Returns:
+            Finished session, None if the player wasn't online
+        """
+
+        start = self.online.pop(name, None)
+        if start is None:
+            return None
+
+        end = time.time() if ts is None else ts
+        self.leaves += 1
+        self.store(name, start, end)
+        return Session(name, start, end)
+
+    def reset(self, ts: Optional[float] = None) -> None:
+        """Closes all sessions, e.g. when the server stops
+
+        Args:
+            ts (Optional[float], optional): Unix timestamp,
+                the current time if None
+        """
+
+        if ts is None:
+            ts = time.time()
+        for name in list(self.online):
+            self.leave(name, ts)
+
+    def reconcile(
+            self,
+            players: Iterable[str],
+            ts: Optional[float] = None) -> Tuple[List[str], List[str]]:
+        """Corrects the online set with a player list snapshot,
+        e.g. `AternosServer.players_list` after `fetch()`.
+        Needed when the console lines were missed
+        (the websocket reconnected or the tracker was attached
+        while the players were already online)
+
+        Args:
+            players (Iterable[str]): Online players
+            ts (Optional[float], optional): Unix timestamp
+                of the snapshot, the current time if None
+
+        Returns:
+            Players added to and removed from the online set
+        """
+
+        if ts is None:
+            ts = time.time()
+
+        snapshot = set(players)
+        joined = [name for name in snapshot if name not in self.online]
+        left = [name for name in self.online if name not in snapshot]
+
+        for name in joined:
+            self.join(name, ts)
+        for name in left:
+            self.leave(name, ts)
+
+        self.reconciled += len(joined) + len(left)
+        return sorted(joined), sorted(left)
+
+    def store(self, name: str, start: float, end: float) -> None:
+        """Adds a finished session to the history
+
+        Args:
+            name (str): Player name
+            start (float): Start timestamp
+            end (float): End timestamp
+        """
+
+        self.totals[name] = self.totals.get(name, 0.0) + end - start
+
+        num = self.numbers.get(name)
+        if num is None:
+            num = self.numbers[name] = len(self.names)
+            self.names.append(name)
+
+        self.players.append(num)
+        self.starts.append(start)
+        self.ends.append(end)
+
+        if len(self.players) > self.max_sessions:
+            drop = len(self.players) - self.max_sessions * 9 // 10
+            del self.players[:drop]
+            del self.starts[:drop]
+            del self.ends[:drop]
+
+    def is_online(self, name: str) -> bool:
+        """Checks if a player is online
+
+        Args:
+            name (str): Player name
+
+        Returns:
+            Is the player online
+        """
+
+        return name in self.online
+
+    def online_list(self) -> List[str]:
+        """Online players, the earliest joined first
+
+        Returns:
+            Player names
+        """
+
+        return sorted(self.online, key=self.online.__getitem__)
+
+    def current(self, name: str, now: Optional[float] = None) -> Optional[float]:
+        """Length of the current session
+
+        Args:
+            name (str): Player name
+            now (Optional[float], optional): Unix timestamp,
+                the current time if None
+
+        Returns:
+            Duration in seconds, None if the player is offline
+        """
+
+        start = self.online.get(name)
+        if start is None:
+            return None
+        return (time.time() if now is None else now) - start
+
+    def total(self, name: str, now: Optional[float] = None) -> float:
+        """Total play time including the current session.
+        Not affected by the history limit
+
+        Args:
+            name (str): Player name
+            now (Optional[float], optional): Unix timestamp,
+                the current time if None
+
+        Returns:
+            Duration in seconds
+        """
+
+        return self.totals.get(name, 0.0) + (self.current(name, now) or 0.0)
+
+    def sessions(
+            self,
+            name: Optional[str] = None,
+            since: Optional[float] = None) -> List[Session]:
+        """Returns the retained sessions, including the open ones
+
+        Args:
+            name (Optional[str], optional): Only the sessions
+                of this player, all players if None
+            since (Optional[float], optional): Only the sessions
+                ended after this timestamp (or still open)
+
+        Returns:
+            Sessions, the earliest started first
+        """
+
+        num = None
+        if name is not None:
+            num = self.numbers.get(name, -1)
+
+        result = []
+        for player, start, end in zip(self.players, self.starts, self.ends):
+            if num is not None and player != num:
+                continue
+            if since is not None and end < since:
+                continue
+            result.append(Session(self.names[player], start, end))
+
+        result.extend(
+            Session(player, start)
+            for player, start in self.online.items()
+            if name is None or player == name
+        )
+
+        result.sort(key=lambda session: session.start)
+        return result
+
+    def __len__(self) -> int:
+        return len(self.online)
@@ -1,20 +1,34 @@
 """Connects to Aternos WebSocket API
 for real-time information"""
 
+# pylint: disable=too-many-lines
+
+import re
 import enum
 import json
+import time
+import random
 import asyncio
 
+from functools import partial
+from concurrent.futures import Executor
+
 from typing import Iterable
-from typing import Union, Any
-from typing import Tuple, List, Dict
+from typing import Union, Any, Optional
+from typing import Tuple, List, Dict, Set
 from typing import Callable, Coroutine
+from typing import Pattern
 from typing import TYPE_CHECKING
 
-import websockets
-
 from .atlog import log
 from .atconnect import REQUA
+from .atconsole import parse_line
+from .atconsole import PatternSet
+from .atqueue import Overflow
+from .atqueue import HandlerWorker
+from .atqueue import Sink
+from .atqueue import Subscription
+from .atqueue import Batcher
 
 if TYPE_CHECKING:
     from .atserver import AternosServer
@@ -24,6 +38,9 @@ OneArgT = Callable[[Any], Coroutine[Any, Any, None]]
 TwoArgT = Callable[[Any, Tuple[Any, ...]], Coroutine[Any, Any, None]]
 FunctionT = Union[OneArgT, TwoArgT]  # pylint: disable=invalid-name
 ArgsTuple = Tuple[FunctionT, Tuple[Any, ...]]
+DecoderT = Callable[[Union[str, bytes]], Any]
+
+WSS_URL = 'wss://aternos.org/hermes/'
 
 
 class Streams(enum.Enum):
@@ -35,6 +52,9 @@ class Streams(enum.Enum):
     console = (2, 'console')
     ram = (3, 'heap')
     tps = (4, 'tick')
+    reconnect = (5, None)
+    # the same lines as atconsole.ConsoleLine objects
+    console_parsed = (6, 'console')
     none = (-1, None)
 
     def __init__(self, num: int, stream: str) -> None:
@@ -43,14 +63,71 @@ class Streams(enum.Enum):
         self.stream = stream
 
 
-class AternosWss:
+# streams which messages can be filtered
+# with `wssreceiver` pattern or keyword
+TEXT_STREAMS = (Streams.console, Streams.console_parsed)
+
+
+def json_decoder() -> DecoderT:
+    """Returns `loads` function of the fastest
+    installed JSON library: orjson, ujson
+    or the built-in json module
+
+    Returns:
+        Function decoding a JSON string
+    """
+
+    # pylint: disable=import-outside-toplevel
+
+    try:
+        import orjson
+        return orjson.loads
+    except ImportError:
+        pass
+
+    try:
+        import ujson  # type: ignore
+        return ujson.loads  # type: ignore
+    except ImportError:
+        pass
+
+    return json.loads
+
+
+class ServerUpdater(Sink):
+
+    """Updates AternosServer info
+    with the status stream messages"""
+
+    def __init__(self, atserv: 'AternosServer') -> None:
+        """Updates AternosServer info
+        with the status stream messages
+
+        Args:
+            atserv (AternosServer): atserver.AternosServer instance
+        """
+
+        self.atserv = atserv
+
+    async def feed(self, msg: Any) -> None:
+        self.atserv.update(msg)
+
+
+class AternosWss:  # pylint: disable=too-many-instance-attributes
 
     """Class for managing websocket connection"""
 
     def __init__(
             self,
             atserv: 'AternosServer',
-            autoconfirm: bool = False) -> None:
+            autoconfirm: bool = False,
+            reconnect: bool = False,
+            queue_size: Optional[int] = None,
+            overflow: Overflow = Overflow.block,
+            decoder: Optional[DecoderT] = None,
+            live: bool = False,
+            url: str = WSS_URL,
+            keepalive: Optional[float] = 49.0) -> None:
         """Class for managing websocket connection
 
         Args:
@@ -60,10 +137,57 @@ class AternosWss:
                 Automatically start server status listener
                 when AternosWss connects to API to confirm
                 server launching
+            reconnect (bool, optional):
+                Reconnect with exponential backoff when
+                the connection is lost and request
+                all streams that have listeners again.
+                `Streams.reconnect` listeners receive a dict
+                with `attempts` and `downtime` (seconds)
+            queue_size (Optional[int], optional):
+                If set, each listener gets its own queue of this size
+                and a worker task calling it with messages in order.
+                None means a new task for each message
+            overflow (Overflow, optional):
+                What to do when a listener's queue is full,
+                see `atqueue.MessageQueue`
+            decoder (Optional[DecoderT], optional):
+                Function decoding JSON messages,
+                by default orjson or ujson if installed
+            live (bool, optional):
+                Update the AternosServer info (`status`,
+                `players_count`, `countdown`, etc.) in place
+                with each status message, see `AternosServer.onchange`
+            url (str, optional): Websocket endpoint,
+                e.g. `atreplay.ReplayServer.url` for testing
+            keepalive (Optional[float], optional):
+                Seconds between keepalive messages, each followed
+                by a websocket ping measuring the round-trip time.
+                None disables the keepalive task. The websockets
+                library pings (`ping_interval`) are still sent
+                unless the keepalive pings are as frequent
         """
 
+        # Config
+        self.backoff_min = 1.0
+        self.backoff_max = 60.0
+        # None disables the keepalive task,
+        # e.g. when WssManager sends the pings
+        self.keepalive_interval = keepalive
+        # no pong in this time means a half-open
+        # connection, None disables the pings
+        self.pong_timeout: Optional[float] = 10.0
+        # pings of the websockets library, they are replaced
+        # by heartbeat() only if it pings at least as often
+        self.ping_interval: Optional[float] = 20.0
+        self.loads = decoder or json_decoder()
+        # for the blocking HTTP requests,
+        # None is the loop's default executor
+        self.executor: Optional[Executor] = None
+        # ###
+
         self.atserv = atserv
         self.servid = atserv.servid
+        self.url = url
 
         cookies = atserv.atconn.session.cookies
         self.session = cookies['ATERNOS_SESSION']
@@ -75,27 +199,88 @@ class AternosWss:
             Streams.console: [],
             Streams.ram: [],
             Streams.tps: [],
+            Streams.reconnect: [],
         }
 
         self.autoconfirm = autoconfirm
         self.confirmed = False
+        self.confirming: Optional[asyncio.Future] = None
+
+        self.reconnect = reconnect
+        self.registered = False
+        self.builtins: Set[FunctionT] = set()
+
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self.workers: Dict[int, HandlerWorker] = {}
+        self.tasks: Set[asyncio.Task] = set()
+        # stream name -> start request being sent by add_sink
+        self.starting: Dict[str, asyncio.Task] = {}
+        self.sinks: Dict[Streams, List[Sink]] = {}
+        self.filters: Dict[Streams, PatternSet] = {}
+        self.cmdlock: Optional[asyncio.Lock] = None
+        # limits simultaneous reconnects,
+        # shared between connections by WssManager
+        self.limiter: Optional[asyncio.Semaphore] = None
+        self.closing = False
+
+        # Stats
+        self.connected = False
+        self.reconnects = 0
+        self.downtime = 0.0
+        self.received = 0
+        self.last_recv = 0.0
+        self.connected_at = 0.0
+        self.rtt: Optional[float] = None
+        self.rtt_avg: Optional[float] = None
+        self.half_open = 0
 
         self.socket: Any = None
-        self.keep: asyncio.Task
-        self.msgs: asyncio.Task
+        self.keep: Optional[asyncio.Task] = None
+        self.msgs: Optional[asyncio.Task] = None
+
+        if live:
+            self.add_sink(Streams.status, ServerUpdater(atserv))
 
     async def confirm(self) -> None:
 
         """Simple way to call
         `AternosServer.confirm`
-        from this class"""
+        from this class. The request is sent from an executor,
+        so the other streams are not blocked,
+        and calls made while it's in progress wait for it
+        instead of sending another one"""
+
+        if self.confirming is None or self.confirming.done():
+            self.confirming = asyncio.ensure_future(
+                self.run_blocking(self.atserv.confirm)
+            )
+
+        await asyncio.shield(self.confirming)
+        self.confirmed = True
+
+    async def run_blocking(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Calls a blocking function (e.g. an `AternosServer` method
+        sending HTTP requests) in `self.executor`,
+        use it in stream listeners instead of calling directly
+
+        Args:
+            func (Callable[..., Any]): Function
+            *args (Any): Its arguments
 
-        self.atserv.confirm()
+        Returns:
+            The function result
+        """
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
 
     def wssreceiver(
             self,
             stream: Streams,
-            arg: Tuple[Any, ...] = ()) -> Callable[[FunctionT], Any]:
+            arg: Tuple[Any, ...] = (),
+            pattern: Union[str, Pattern[str], None] = None,
+            keyword: Optional[str] = None) -> Callable[[FunctionT], Any]:
         """Decorator that marks your function as a stream receiver.
         When websocket receives message from the specified stream,
         it calls all listeners created with this decorator.
@@ -103,19 +288,49 @@ class AternosWss:
         Args:
             stream (Streams): Stream that your function should listen
             arg (Tuple[Any, ...], optional): Arguments which will be passed to your function
+            pattern (Union[str, Pattern[str], None], optional):
+                For console streams: call the function only
+                with the lines matching this regex (`re.search`).
+                Patterns of all listeners are combined, so a line
+                matching none of them is skipped with one regex call
+            keyword (Optional[str], optional):
+                For console streams: call the function only
+                with the lines containing this substring
+
+        Raises:
+            ValueError: If a pattern or a keyword is passed
+                for a stream which messages are not console lines
+            re.error: If the pattern is invalid
 
         Returns:
             ...
         """
 
+        filtered = pattern is not None or keyword is not None
+        if filtered and stream not in TEXT_STREAMS:
+            raise ValueError(
+                f'Only console streams can be filtered, not {stream.name}'
+            )
+
         def decorator(func: FunctionT) -> Callable[[Any, Any], Coroutine[Any, Any, Any]]:
 
+            handler = (func, arg)
+
+            # before registering the handler:
+            # an invalid pattern raises an exception here
+            if filtered:
+                filters = self.filters.setdefault(stream, PatternSet())
+                if keyword is not None:
+                    filters.add_keyword(id(handler), keyword)
+                else:
+                    filters.add(id(handler), pattern)  # type: ignore
+
             handlers = self.recv.get(stream, None)
 
             if handlers is None:
-                self.recv[stream] = [(func, arg)]
+                self.recv[stream] = [handler]
             else:
-                handlers.append((func, arg))
+                handlers.append(handler)
 
             async def wrapper(*args, **kwargs) -> Any:
                 return await func(*args, **kwargs)
@@ -124,13 +339,112 @@ class AternosWss:
 
         return decorator
 
-    async def connect(self) -> None:
+    def wssbatcher(
+            self,
+            stream: Streams,
+            size: int = 100,
+            interval: float = 0.5,
+            arg: Tuple[Any, ...] = ()) -> Callable[[FunctionT], Any]:
+        """Decorator that marks your function as a batch receiver.
+        Unlike `wssreceiver`, the function is called with a list
+        of messages gathered until there are `size` of them
+        or `interval` seconds have passed since the first one.
+        Lists are passed to the function in order,
+        one call at a time
 
-        """Connects to the websocket server
-        and starts all stream listeners"""
+        Args:
+            stream (Streams): Stream that your function should listen
+            size (int, optional): Max messages in a list
+            interval (float, optional): Max seconds
+                a message waits before the call
+            arg (Tuple[Any, ...], optional): Arguments which will be passed to your function
+
+        Returns:
+            ...
+        """
+
+        def decorator(func: FunctionT) -> FunctionT:
+
+            batcher = Batcher(
+                partial(self.call, (func, arg)),
+                size, interval,
+            )
+            self.add_sink(stream, batcher)
+            return func
+
+        return decorator
+
+    def stream(
+            self,
+            stream: Streams,
+            maxsize: int = 1000,
+            overflow: Overflow = Overflow.block) -> Subscription:
+        """Subscribes to a stream, messages can be read
+        with `async for msg in wss.stream(Streams.console)`.
+        Each subscription has its own bounded queue,
+        the iteration ends when it's closed with `close()`
+        or the connection is closed
+
+        Args:
+            stream (Streams): Stream to subscribe to
+            maxsize (int, optional): Queue size
+            overflow (Overflow, optional): Overflow policy,
+                `block` slows down the receiver when the queue is full
+
+        Returns:
+            Subscription object
+        """
+
+        sub = Subscription(
+            maxsize, overflow,
+            on_close=partial(self.remove_sink, stream),
+        )
+        self.add_sink(stream, sub)
+        return sub
+
+    def add_sink(self, stream: Streams, sink: Sink) -> None:
+        """Adds an object which receives all messages of the stream.
+        If the connection is already established and nobody
+        listens to the stream yet, it's requested from the server
+
+        Args:
+            stream (Streams): Stream type
+            sink (Sink): Sink object
+        """
+
+        requested = any(
+            strm.stream == stream.stream and self.has_listeners(strm)
+            for strm in Streams
+        )
+        self.sinks.setdefault(stream, []).append(sink)
+
+        if self.connected and stream.stream and not requested:
+            task = asyncio.create_task(self.send({
+                'stream': stream.stream,
+                'type': 'start',
+            }))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+            self.starting[stream.stream] = task
+
+    def remove_sink(self, stream: Streams, sink: Sink) -> None:
+        """Removes a sink added with `add_sink`
+
+        Args:
+            stream (Streams): Stream type
+            sink (Sink): Sink object
+        """
+
+        sinks = self.sinks.get(stream, [])
+        if sink in sinks:
+            sinks.remove(sink)
+
+    async def open(self) -> None:
+
+        """Opens the websocket connection
+        without starting any tasks"""
 
         headers = [
-            ('Host', 'aternos.org'),
             ('User-Agent', REQUA),
             (
                 'Cookie',
@@ -138,11 +452,46 @@ class AternosWss:
                 f'ATERNOS_SERVER={self.servid}'
             )
         ]
+        if self.url == WSS_URL:
+            headers.insert(0, ('Host', 'aternos.org'))
+
+        ping_interval = self.ping_interval
+        keepalive = self.keepalive_interval
+        if keepalive is not None and self.pong_timeout is not None:
+            if ping_interval is not None and keepalive <= ping_interval:
+                # pings are sent by heartbeat()
+                ping_interval = None
+
+        import websockets  # pylint: disable=import-outside-toplevel
         self.socket = await websockets.connect(  # type: ignore
-            'wss://aternos.org/hermes/',
+            self.url,
             origin='https://aternos.org',
-            extra_headers=headers
+            extra_headers=headers,
+            ping_interval=ping_interval,
         )
+        self.connected = True
+        self.connected_at = time.monotonic()
+
+    async def connect(self) -> None:
+
+        """Connects to the websocket server
+        and starts all stream listeners"""
+
+        self.closing = False
+        await self.open()
+
+        if not self.registered:
+            self.register()
+
+        await self.wssworker()
+
+    def register(self) -> None:
+
+        """Adds the built-in status listeners"""
+
+        self.registered = True
+        status = self.recv[Streams.status]
+        count = len(status)
 
         @self.wssreceiver(Streams.status)
         async def confirmfunc(msg: Dict[str, Any]) -> None:
@@ -158,10 +507,13 @@ class AternosWss:
                 return
 
             in_queue = msg['class'] == 'queueing'
-            pending = msg['queue']['pending'] == 'pending'
-            confirmation = in_queue and pending
+            pending = in_queue and msg['queue']['pending'] == 'pending'
+
+            if not pending:
+                # ready to confirm the next launch
+                self.confirmed = False
 
-            if confirmation and not self.confirmed:
+            elif not self.confirmed:
                 await self.confirm()
 
         @self.wssreceiver(Streams.status)
@@ -187,33 +539,52 @@ class AternosWss:
             """
 
             if msg['status'] == 2:
-                # Automatically start streams
-                for strm in self.recv:
+                await self.start_streams()
 
-                    if not isinstance(strm, Streams):
-                        continue
+        # wssreceiver returns wrappers,
+        # so the functions are taken from the list
+        self.builtins.update(func for func, _ in status[count:])
 
-                    # If the handlers list is empty
-                    if not self.recv.get(strm):
-                        continue
+    async def start_streams(self) -> None:
 
-                    if strm.stream:
-                        log.debug('Requesting %s stream', strm.stream)
-                        await self.send({
-                            'stream': strm.stream,
-                            'type': 'start'
-                        })
+        """Requests all streams that have listeners"""
 
-        await self.wssworker()
+        requested = set()
+        for strm in (*self.recv, *self.sinks):
+
+            if not isinstance(strm, Streams):
+                continue
+
+            # If the handlers list is empty
+            if not self.has_listeners(strm):
+                continue
+
+            if strm.stream and strm.stream not in requested:
+                requested.add(strm.stream)
+                log.debug('Requesting %s stream', strm.stream)
+                await self.send({
+                    'stream': strm.stream,
+                    'type': 'start'
+                })
 
     async def close(self) -> None:
 
         """Closes websocket connection and stops all listeners"""
 
-        self.keep.cancel()
-        self.msgs.cancel()
+        self.closing = True
+        if self.keep is not None:
+            self.keep.cancel()
+        if self.msgs is not None:
+            self.msgs.cancel()
+        for worker in self.workers.values():
+            worker.stop()
+        self.workers.clear()
+        for sinks in self.sinks.values():
+            for sink in list(sinks):
+                await sink.close()
         await self.socket.close()
-        del self.socket
+        self.socket = None
+        self.connected = False
 
     async def send(self, obj: Union[Dict[str, Any], str]) -> None:
 
@@ -253,38 +624,218 @@ class AternosWss:
             }
         )
 
+    async def command_result(
+            self, cmd: str,
+            until: Union[str, Pattern[str], Callable[[str], bool], None] = None,
+            timeout: float = 5.0,
+            quiet: float = 0.5) -> List[str]:
+
+        """Sends a Minecraft command and collects
+        the console lines printed in response: all lines
+        after the echoed command until a line matches `until`
+        or no lines have been received for `quiet` seconds.
+        Commands sent with this method are executed
+        one after another, so their outputs don't mix,
+        but lines from other sources (e.g. chat)
+        printed at the same time are also collected
+
+        Args:
+            cmd (str): Command, slash at
+                the beginning is not required
+            until (Union[str, Pattern[str], Callable[[str], bool], None], optional):
+                Regex or function that matches the last line of the output
+                (the line is included), None means waiting for a quiet period
+            timeout (float, optional): Max seconds to wait for the output
+            quiet (float, optional): Seconds without new lines
+                after which the output is considered complete
+                (only when `until` is None)
+
+        Raises:
+            asyncio.TimeoutError: If the command wasn't echoed
+                or `until` didn't match in `timeout` seconds.
+                Without `until`, the lines received
+                before the timeout are returned
+
+        Returns:
+            Console lines without the echoed command
+        """
+
+        matcher: Optional[Callable[[str], Any]]
+        if isinstance(until, str):
+            matcher = re.compile(until).search
+        elif isinstance(until, re.Pattern):
+            matcher = until.search
+        else:
+            matcher = until
+
+        echo = cmd.strip().lstrip('/')
+        if self.cmdlock is None:
+            self.cmdlock = asyncio.Lock()
+
+        async with self.cmdlock:
+            async with self.stream(Streams.console) as sub:
+
+                # start the console first, or the echo can be missed
+                starting = self.starting.get(Streams.console.stream)
+                if starting is not None and not starting.done():
+                    await starting
+                await self.command(cmd)
+
+                loop = asyncio.get_running_loop()
+                deadline = loop.time() + timeout
+                echoed = False
+                lines: List[str] = []
+
+                while True:
+                    left = deadline - loop.time()
+                    wait = left
+                    if echoed and matcher is None:
+                        wait = min(left, quiet)
+
+                    try:
+                        line = await asyncio.wait_for(sub.get(), max(wait, 0))
+                    except asyncio.TimeoutError:
+                        if echoed and matcher is None:
+                            return lines
+                        raise
+
+                    if not echoed:
+                        echoed = line.lstrip('>/ ') == echo
+                        continue
+
+                    lines.append(line)
+                    if matcher is not None and matcher(line):
+                        return lines
+
     async def wssworker(self) -> None:
 
         """Starts async tasks in background
         for receiving websocket messages
         and sending keepalive ping"""
 
-        self.keep = asyncio.create_task(self.keepalive())
+        if self.keepalive_interval is not None:
+            self.keep = asyncio.create_task(self.keepalive())
         self.msgs = asyncio.create_task(self.receiver())
 
     async def keepalive(self) -> None:
 
-        """Each 49 seconds sends keepalive ping
-        to the websocket server"""
+        """Each `keepalive_interval` seconds
+        sends keepalive ping to the websocket server"""
 
         try:
-            while True:
-                await asyncio.sleep(49)
-                await self.socket.send('{"type":"\u2764"}')
+            while self.keepalive_interval is not None:
+                await asyncio.sleep(self.keepalive_interval)
+                await self.heartbeat()
 
         except asyncio.CancelledError:
             pass
 
+    async def heartbeat(self) -> None:
+
+        """Sends one keepalive message if the connection is open,
+        then a websocket ping: the time until the pong is saved
+        in `rtt` and `rtt_avg` (moving average), and if there's
+        no pong in `pong_timeout` seconds, the connection
+        is considered half-open and closed, so the receiver
+        reconnects (when `reconnect` is enabled)"""
+
+        from websockets.exceptions import ConnectionClosed  # pylint: disable=import-outside-toplevel
+
+        socket = self.socket
+        if socket is None or not self.connected:
+            return
+
+        try:
+            await socket.send('{"type":"\u2764"}')
+            if self.pong_timeout is None:
+                return
+
+            start = time.monotonic()
+            waiter = await socket.ping()
+            await asyncio.wait_for(waiter, self.pong_timeout)
+
+        except ConnectionClosed:
+            # receiver reconnects or stops
+            log.debug('Keepalive: the connection is closed')
+            return
+
+        except asyncio.TimeoutError:
+            self.half_open += 1
+            log.warning(
+                'No pong in %.1f s, dropping the connection',
+                self.pong_timeout,
+            )
+            socket.fail_connection(1011, 'keepalive ping timeout')
+            return
+
+        rtt = time.monotonic() - start
+        self.rtt = rtt
+        if self.rtt_avg is None:
+            self.rtt_avg = rtt
+        else:
+            self.rtt_avg += (rtt - self.rtt_avg) * 0.2
+
+    async def reconnect_loop(self) -> None:
+
+        """Reopens the connection with exponential backoff
+        and jitter, requests the streams again
+        and calls `Streams.reconnect` listeners"""
+
+        from websockets.exceptions import WebSocketException  # pylint: disable=import-outside-toplevel
+
+        self.connected = False
+        lost = time.monotonic()
+        delay = self.backoff_min
+        attempts = 0
+
+        while True:
+            attempts += 1
+            await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+            try:
+                if self.limiter is None:
+                    await self.open()
+                else:
+                    async with self.limiter:
+                        await self.open()
+                # the new connection may drop here too
+                await self.start_streams()
+                break
+            except (OSError, asyncio.TimeoutError, WebSocketException) as err:
+                self.connected = False
+                log.warning('Reconnect attempt %d failed: %r', attempts, err)
+                delay = min(delay * 2, self.backoff_max)
+
+        downtime = time.monotonic() - lost
+        self.reconnects += 1
+        self.downtime += downtime
+        log.info('Reconnected in %.1f s', downtime)
+
+        try:
+            await self.handle(Streams.reconnect, {
+                'attempts': attempts,
+                'downtime': downtime,
+            })
+        except Exception:  # pylint: disable=broad-exception-caught
+            # called from the receiver's except block,
+            # so it wouldn't catch this error
+            log.exception('Error in a reconnect listener')
+
     async def receiver(self) -> None:
 
         """Receives messages from websocket servers
         and calls user's streams listeners"""
 
+        from websockets.exceptions import ConnectionClosed  # pylint: disable=import-outside-toplevel
+
         while True:
             try:
                 data = await self.socket.recv()
-                obj = json.loads(data)
+                self.received += 1
+                self.last_recv = time.monotonic()
+
+                obj = self.loads(data)
                 msgtype = Streams.none
+                msg: Any = None
 
                 if obj['type'] == 'line':
                     msgtype = Streams.console
@@ -300,29 +851,162 @@ class AternosWss:
                     msg = 20 if ticks > 20 else ticks
 
                 elif obj['type'] == 'status':
+                    if not self.status_wanted():
+                        continue
                     msgtype = Streams.status
-                    msg = json.loads(obj['message'])
+                    msg = self.loads(obj['message'])
 
-                if msgtype in self.recv:
+                await self.handle(msgtype, msg)
 
-                    # function info tuples
-                    handlers: Iterable[ArgsTuple]
-                    handlers = self.recv.get(msgtype, ())
+                if msgtype == Streams.console and \
+                        self.has_listeners(Streams.console_parsed):
+                    await self.handle(
+                        Streams.console_parsed,
+                        parse_line(msg),
+                    )
 
-                    for func in handlers:
+            except asyncio.CancelledError:
+                break
 
-                        # if arguments is not empty
-                        if func[1]:
-                            # call the function with args
-                            coro = func[0](msg, func[1])  # type: ignore
+            except ConnectionClosed as err:
+                if self.closing or not self.reconnect:
+                    log.info('Websocket connection closed: %r', err)
+                    self.connected = False
+                    break
+                log.warning('Websocket connection lost: %r', err)
+                await self.reconnect_loop()
 
-                        else:
-                            # mypy error: too few arguments
-                            # looks like a bug, so it is ignored
-                            coro = func[0](msg)  # type: ignore
+            except Exception:  # pylint: disable=broad-exception-caught
+                # a malformed message or an error in a sink
+                # must not stop receiving the next ones
+                log.exception('Unable to handle a websocket message')
 
-                        # run
-                        asyncio.create_task(coro)
+    def status_wanted(self) -> bool:
 
-            except asyncio.CancelledError:
-                break
+        """Checks if the status messages must be decoded:
+        there are user's status listeners, or the built-in ones
+        have something to do (confirm the launching
+        or request the streams that have listeners)
+
+        Returns:
+            Is it needed to decode the status
+        """
+
+        if self.sinks.get(Streams.status):
+            return True
+
+        for func in self.recv.get(Streams.status, ()):
+            if func[0] not in self.builtins:
+                return True
+
+        # even after confirming: the status
+        # must be seen to reset `confirmed`
+        if self.autoconfirm:
+            return True
+
+        return any(
+            strm.stream is not None and self.has_listeners(strm)
+            for strm in Streams
+        )
+
+    def has_listeners(self, msgtype: Streams) -> bool:
+
+        """Checks if the stream has listeners or sinks
+
+        Args:
+            msgtype (Streams): Stream type
+
+        Returns:
+            Are there any listeners
+        """
+
+        return bool(self.recv.get(msgtype) or self.sinks.get(msgtype))
+
+    async def handle(self, msgtype: Streams, msg: Any) -> None:
+
+        """Calls all listeners of the stream
+
+        Args:
+            msgtype (Streams): Stream type
+            msg (Any): Parsed message
+        """
+
+        for sink in tuple(self.sinks.get(msgtype, ())):
+            await sink.feed(msg)
+
+        if msgtype not in self.recv:
+            return
+
+        # function info tuples
+        handlers: Iterable[ArgsTuple]
+        handlers = self.recv.get(msgtype, ())
+
+        # listeners' filters matched
+        # against the line at once
+        filters = self.filters.get(msgtype)
+        matched: Set[Any] = set()
+        if filters:
+            text = getattr(msg, 'message', msg)
+            matched = filters.match(text)
+
+        for func in handlers:
+
+            if filters and id(func) in filters and id(func) not in matched:
+                continue
+
+            if self.queue_size is None:
+                # run
+                task = asyncio.create_task(self.call(func, msg))
+                self.tasks.add(task)
+                task.add_done_callback(self.tasks.discard)
+                continue
+
+            worker = self.workers.get(id(func))
+            if worker is None:
+                worker = HandlerWorker(
+                    partial(self.call, func),
+                    self.queue_size,
+                    self.overflow,
+                )
+                self.workers[id(func)] = worker
+
+            await worker.feed(msg)
+
+    @staticmethod
+    async def call(func: ArgsTuple, msg: Any) -> None:
+
+        """Calls a listener
+
+        Args:
+            func (ArgsTuple): Function and its arguments
+            msg (Any): Message
+        """
+
+        # if arguments is not empty
+        if func[1]:
+            # call the function with args
+            await func[0](msg, func[1])  # type: ignore
+
+        else:
+            # mypy error: too few arguments
+            # looks like a bug, so it is ignored
+            await func[0](msg)  # type: ignore
+
+    def queue_depths(self) -> Dict[str, int]:
+
+        """Messages waiting in each listener's queue
+        (only when `queue_size` is set)
+
+        Returns:
+            Dict of `stream.function` name and queue length
+        """
+
+        depths = {}
+        for strm, handlers in self.recv.items():
+            for func in handlers:
+                worker = self.workers.get(id(func))
+                if worker is not None:
+                    name = getattr(func[0], '__name__', repr(func[0]))
+                    depths[f'{strm.name}.{name}'] = worker.depth
+
+        return depths
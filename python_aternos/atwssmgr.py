@@ -0,0 +1,488 @@
+"""Runs many websocket connections
+in one event loop"""
+
+import math
+import time
+import random
+import asyncio
+
+from typing import Any, Optional
+from typing import Iterable, Iterator
+from typing import List, Dict, Set
+from typing import NamedTuple
+from typing import TYPE_CHECKING
+
+from .atlog import log
+from .atwss import AternosWss
+from .atwss import Streams
+from .atqueue import Overflow
+from .atqueue import Sink
+from .atqueue import Subscription
+
+if TYPE_CHECKING:
+    from .atserver import AternosServer
+
+
+class WssEvent(NamedTuple):
+
+    """Message from one of the connections
+    managed by WssManager"""
+
+    servid: str
+    stream: Streams
+    msg: Any
+    time: float
+
+
+class Tagger(Sink):
+
+    """Passes the messages of one connection's stream
+    to the manager's event stream with the server ID"""
+
+    def __init__(
+            self,
+            manager: 'WssManager',
+            servid: str,
+            stream: Streams) -> None:
+        """Passes the messages of one connection's stream
+        to the manager's event stream with the server ID
+
+        Args:
+            manager (WssManager): Manager
+            servid (str): Server ID
+            stream (Streams): Stream type
+        """
+
+        self.manager = manager
+        self.servid = servid
+        self.stream = stream
+
+    async def feed(self, msg: Any) -> None:
+        await self.manager.publish(
+            WssEvent(self.servid, self.stream, msg, time.time())
+        )
+
+
+class WssManager:  # pylint: disable=too-many-instance-attributes
+
+    """Manages websocket connections to many servers:
+    sends keepalive pings from one timer wheel
+    instead of a task per connection, spreads
+    connection attempts over time, merges messages
+    into one event stream and collects health metrics"""
+
+    def __init__(
+            self,
+            streams: Iterable[Streams] = (Streams.status,),
+            keepalive: float = 49.0,
+            tick: float = 1.0,
+            stagger: float = 0.2,
+            concurrency: int = 10,
+            stale: float = 120.0) -> None:
+        """Manages websocket connections to many servers
+
+        Args:
+            streams (Iterable[Streams], optional):
+                Streams of each connection passed to `events()`
+            keepalive (float, optional): Seconds between
+                keepalive pings of each connection
+            tick (float, optional): Timer wheel resolution in seconds,
+                pings are spread evenly over `keepalive / tick` slots
+            stagger (float, optional): Min seconds
+                between two connection attempts
+            concurrency (int, optional): Max connections
+                (or reconnects) being established at the same time
+            stale (float, optional): Seconds without messages
+                after which a connection is reported as stale
+        """
+
+        self.streams = tuple(streams)
+        self.keepalive = keepalive
+        self.tick = tick
+        self.stagger = stagger
+        self.concurrency = concurrency
+        self.stale = stale
+
+        self.conns: Dict[str, AternosWss] = {}
+        self.subs: List[Subscription] = []
+        self.tasks: Set[asyncio.Task] = set()
+
+        # Timer wheel
+        slots = max(1, math.ceil(keepalive / tick))
+        self.wheel: List[List[AternosWss]] = [[] for _ in range(slots)]
+        self.wheeltask: Optional[asyncio.Task] = None
+
+        # created in the event loop
+        self.limiter: Optional[asyncio.Semaphore] = None
+        self.next_start = 0.0
+
+        # Stats
+        self.lag = 0.0
+        self.lag_max = 0.0
+        self.events_count = 0
+
+    def get_limiter(self) -> asyncio.Semaphore:
+        """Returns the semaphore limiting
+        simultaneous connection attempts
+
+        Returns:
+            asyncio.Semaphore object
+        """
+
+        if self.limiter is None:
+            self.limiter = asyncio.Semaphore(self.concurrency)
+        return self.limiter
+
+    def create(self, atserv: 'AternosServer', **kwargs) -> AternosWss:
+        """Creates a websocket connection object
+        for the server and adds it to the manager
+
+        Args:
+            atserv (AternosServer): atserver.AternosServer instance
+            **kwargs: Arguments passed to AternosWss
+
+        Returns:
+            AternosWss object, not connected yet
+        """
+
+        return self.add(AternosWss(atserv, **kwargs))
+
+    def add(self, wss: AternosWss) -> AternosWss:
+        """Adds a websocket connection object to the manager.
+        Its own keepalive task is disabled
+
+        Args:
+            wss (AternosWss): Connection object
+
+        Raises:
+            KeyError: If a connection to this server
+                is already added
+
+        Returns:
+            The same object
+        """
+
+        if wss.servid in self.conns:
+            raise KeyError(f'Server {wss.servid} is already added')
+
+        self.conns[wss.servid] = wss
+        wss.keepalive_interval = None
+        wss.limiter = self.get_limiter() if self.running() else None
+
+        for stream in self.streams:
+            wss.add_sink(stream, Tagger(self, wss.servid, stream))
+
+        # the least loaded slot
+        slot = min(self.wheel, key=len)
+        slot.append(wss)
+
+        return wss
+
+    async def remove(self, servid: str) -> None:
+        """Closes the connection and removes it from the manager
+
+        Args:
+            servid (str): Server ID
+        """
+
+        wss = self.conns.pop(servid)
+        for slot in self.wheel:
+            if wss in slot:
+                slot.remove(wss)
+
+        for stream in self.streams:
+            for sink in list(wss.sinks.get(stream, ())):
+                if isinstance(sink, Tagger) and sink.manager is self:
+                    wss.remove_sink(stream, sink)
+
+        if wss.connected:
+            await wss.close()
+
+    async def start(self) -> None:
+
+        """Starts the timer wheel
+        and connects all added servers"""
+
+        limiter = self.get_limiter()
+        for wss in self.conns.values():
+            wss.limiter = limiter
+
+        if self.wheeltask is None:
+            self.wheeltask = asyncio.create_task(self.run_wheel())
+
+        await asyncio.gather(*(
+            self.connect(wss)
+            for wss in self.conns.values()
+            if not wss.connected
+        ))
+
+    async def connect(self, wss: AternosWss) -> None:
+        """Connects to the websocket server
+        waiting for a free connection slot.
+        If it fails and `wss.reconnect` is enabled,
+        the connection is retried in background
+        with the same backoff as reconnects
+
+        Args:
+            wss (AternosWss): Connection object
+        """
+
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        start = max(now, self.next_start)
+        self.next_start = start + self.stagger
+        await asyncio.sleep(start - now)
+
+        wss.limiter = self.get_limiter()
+        if await self.try_connect(wss):
+            return
+
+        if wss.reconnect:
+            task = asyncio.create_task(self.retry(wss))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def try_connect(self, wss: AternosWss, attempt: int = 1) -> bool:
+        """Connects to the websocket server
+        waiting for a free connection slot
+
+        Args:
+            wss (AternosWss): Connection object
+            attempt (int, optional): Attempt number for the log
+
+        Returns:
+            Is the connection established
+        """
+
+        assert wss.limiter is not None
+        async with wss.limiter:
+            try:
+                await wss.connect()
+                return True
+            # an Exception subclass in Python 3.7
+            except asyncio.CancelledError:  # pylint: disable=try-except-raise
+                raise
+            except Exception as err:  # pylint: disable=broad-exception-caught
+                if wss.reconnect:
+                    log.warning(
+                        'Connection attempt %d to %s failed: %r',
+                        attempt, wss.servid, err,
+                    )
+                else:
+                    log.exception('Unable to connect to %s', wss.servid)
+                return False
+
+    async def retry(self, wss: AternosWss) -> None:
+        """Retries a failed initial connection
+        with exponential backoff and jitter
+
+        Args:
+            wss (AternosWss): Connection object
+        """
+
+        delay = wss.backoff_min
+        attempt = 1
+
+        while self.conns.get(wss.servid) is wss:
+            attempt += 1
+            await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+            if await self.try_connect(wss, attempt):
+                log.info('Connected to %s after %d attempts', wss.servid, attempt)
+                return
+            delay = min(delay * 2, wss.backoff_max)
+
+    def running(self) -> bool:
+        """Checks if the manager is started
+
+        Returns:
+            Is the timer wheel running
+        """
+
+        return self.wheeltask is not None
+
+    async def run_wheel(self) -> None:
+
+        """Timer wheel: each tick sends keepalive pings
+        to the connections of the next slot
+        and measures the event loop lag"""
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time()
+        pos = 0
+
+        try:
+            while True:
+                deadline += self.tick
+                await asyncio.sleep(max(0, deadline - loop.time()))
+
+                self.lag = max(0.0, loop.time() - deadline)
+                self.lag_max = max(self.lag_max, self.lag)
+                if self.lag > self.tick:
+                    # don't try to catch up
+                    deadline = loop.time()
+
+                pos = (pos + 1) % len(self.wheel)
+                slot = self.wheel[pos]
+                if slot:
+                    task = asyncio.create_task(self.ping(slot))
+                    self.tasks.add(task)
+                    task.add_done_callback(self.tasks.discard)
+
+        except asyncio.CancelledError:
+            pass
+
+    @staticmethod
+    async def ping(slot: List[AternosWss]) -> None:
+        """Sends keepalive pings
+
+        Args:
+            slot (List[AternosWss]): Connections
+        """
+
+        await asyncio.gather(
+            *(wss.heartbeat() for wss in tuple(slot)),
+            return_exceptions=True,
+        )
+
+    def events(
+            self,
+            maxsize: int = 10000,
+            overflow: Overflow = Overflow.drop_oldest) -> Subscription:
+        """Subscribes to the messages of all connections
+        (only the streams passed to the constructor),
+        `async for event in manager.events()`
+        yields `WssEvent` objects
+
+        Args:
+            maxsize (int, optional): Queue size
+            overflow (Overflow, optional): Overflow policy
+
+        Returns:
+            Subscription object
+        """
+
+        sub = Subscription(maxsize, overflow, on_close=self.subs.remove)
+        self.subs.append(sub)
+        return sub
+
+    async def publish(self, event: WssEvent) -> None:
+        """Passes an event to all `events()` subscribers
+
+        Args:
+            event (WssEvent): Event
+        """
+
+        self.events_count += 1
+        for sub in tuple(self.subs):
+            await sub.feed(event)
+
+    async def close(self) -> None:
+
+        """Stops the timer wheel
+        and closes all connections"""
+
+        if self.wheeltask is not None:
+            self.wheeltask.cancel()
+            self.wheeltask = None
+
+        for task in tuple(self.tasks):
+            task.cancel()
+
+        await asyncio.gather(
+            *(
+                wss.close()
+                for wss in self.conns.values()
+                if wss.socket is not None
+            ),
+            return_exceptions=True,
+        )
+
+        for sub in tuple(self.subs):
+            await sub.close()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Metrics of each connection
+
+        Returns:
+            Dict of server ID and its metrics:
+            `connected`, `reconnects`, `downtime`,
+            `received` (messages count),
+            `idle` (seconds since the last message or the last
+            connection, whichever is later, None if it has never
+            been connected), `queued` (messages
+            waiting in the listeners' queues) and `rtt`
+            (average ping round-trip time, None if unknown)
+        """
+
+        now = time.monotonic()
+        result = {}
+
+        for servid, wss in self.conns.items():
+            idle = None
+            if wss.connected_at:
+                idle = now - max(wss.last_recv, wss.connected_at)
+            result[servid] = {
+                'connected': wss.connected,
+                'reconnects': wss.reconnects,
+                'downtime': wss.downtime,
+                'received': wss.received,
+                'idle': idle,
+                'queued': sum(wss.queue_depths().values()),
+                'rtt': wss.rtt_avg,
+            }
+
+        return result
+
+    def health(self) -> Dict[str, Any]:
+        """Aggregate metrics of all connections
+
+        Returns:
+            Dict with `servers`, `connected`, `reconnects`,
+            `downtime`, `received`, `queued` totals,
+            `stale` (IDs of the connected servers without messages
+            for `stale` seconds), `idle_max`, `rtt_avg`, `rtt_max`,
+            `half_open` (connections dropped after a ping timeout),
+            `lag` and `lag_max` (event loop lag
+            measured by the timer wheel, seconds)
+        """
+
+        stats = self.stats()
+        idle = [
+            s['idle'] for s in stats.values()
+            if s['idle'] is not None
+        ]
+        rtt = [
+            s['rtt'] for s in stats.values()
+            if s['rtt'] is not None
+        ]
+
+        return {
+            'servers': len(stats),
+            'connected': sum(s['connected'] for s in stats.values()),
+            'reconnects': sum(s['reconnects'] for s in stats.values()),
+            'downtime': sum(s['downtime'] for s in stats.values()),
+            'received': sum(s['received'] for s in stats.values()),
+            'queued': sum(s['queued'] for s in stats.values()),
+            'stale': [
+                servid for servid, s in stats.items()
+                if s['connected'] and (s['idle'] or 0.0) > self.stale
+            ],
+            'idle_max': max(idle, default=0.0),
+            'rtt_avg': sum(rtt) / len(rtt) if rtt else None,
+            'rtt_max': max(rtt, default=None),
+            'half_open': sum(wss.half_open for wss in self.conns.values()),
+            'lag': self.lag,
+            'lag_max': self.lag_max,
+        }
+
+    def __getitem__(self, servid: str) -> AternosWss:
+        return self.conns[servid]
+
+    def __contains__(self, servid: str) -> bool:
+        return servid in self.conns
+
+    def __iter__(self) -> Iterator[AternosWss]:
+        return iter(tuple(self.conns.values()))
+
+    def __len__(self) -> int:
+        return len(self.conns)
@@ -0,0 +1,87 @@
+// Same sandbox as server.js, but talks to Python
+// over stdin/stdout instead of HTTP.
+// Each frame is a 4-byte big-endian length + UTF-8 JSON.
+// Request:  {"exec": "code", "get": ["var", ...], "reset": false}
+// Response: {"vars": {"var": value, ...}} or {"error": "message"}
+
+const process = require('process')
+
+// The built-in vm module is not a security sandbox,
+// the downloaded code must not get access to the process
+let VM
+try {
+    ({ VM } = require('vm2'))
+}
+catch (ex) {
+    process.stderr.write(
+        'pipe.js: vm2 is not installed, run `npm install vm2` ' +
+        'in the python_aternos/data directory\n'
+    )
+    process.exit(1)
+}
+
+const TIMEOUT = 2000
+const stubFunc = (_i) => {}
+
+const makeSandbox = () => ({
+    atob: atob,
+    setTimeout: stubFunc,
+    setInterval: stubFunc,
+    document: {
+        getElementById: stubFunc,
+        prepend: stubFunc,
+        append: stubFunc,
+        appendChild: stubFunc,
+        doctype: {},
+        currentScript: {},
+    },
+})
+
+const makeVM = () => {
+    const vm = new VM({
+        timeout: TIMEOUT,
+        allowAsync: false,
+        sandbox: makeSandbox(),
+    })
+    vm.run('var window = globalThis')
+    return vm
+}
+
+let vm = makeVM()
+
+const handle = (req) => {
+    if (req.reset)
+        vm = makeVM()
+    if (req.exec)
+        vm.run(req.exec)
+    const vars = {}
+    for (const name of req.get || [])
+        vars[name] = vm.run(name)
+    return { vars: vars }
+}
+
+const send = (obj) => {
+    const body = Buffer.from(JSON.stringify(obj), 'utf-8')
+    const head = Buffer.alloc(4)
+    head.writeUInt32BE(body.length)
+    process.stdout.write(Buffer.concat([head, body]))
+}
+
+let buf = Buffer.alloc(0)
+
+process.stdin.on('data', chunk => {
+    buf = Buffer.concat([buf, chunk])
+    while (buf.length >= 4) {
+        const len = buf.readUInt32BE(0)
+        if (buf.length < 4 + len)
+            break
+        const body = buf.subarray(4, 4 + len).toString('utf-8')
+        buf = buf.subarray(4 + len)
+        let resp
+        try { resp = handle(JSON.parse(body)) }
+        catch (ex) { resp = { error: String(ex && ex.message || ex) } }
+        send(resp)
+    }
+})
+
+process.stdin.on('end', () => process.exit(0))
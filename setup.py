@@ -42,6 +42,9 @@ setuptools.setup(
         'websockets==11.0.3',
     ],
     extras_require={
+        'fast': [
+            'orjson==3.9.2',
+        ],
         'dev': [
             'autopep8==2.0.2',
             'pycodestyle==2.10.0',
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+
+#           How to use
+# *******************************
+# python3 -m tests.bench_import [runs]
+#
+# Measures how long `import python_aternos` takes
+# in a fresh interpreter and prints which of
+# the heavy dependencies were loaded by the import
+
+import sys
+import json
+import statistics
+import subprocess
+
+RUNS = 10
+
+CHILD = '''
+import sys, time, json
+start = time.perf_counter()
+import python_aternos
+took = time.perf_counter() - start
+heavy = ('js2py', 'lxml', 'cloudscraper', 'regex', 'websockets', 'requests')
+print(json.dumps({
+    'time': took,
+    'loaded': [m for m in heavy if m in sys.modules],
+}))
+'''
+
+
+def measure() -> dict:
+
+    out = subprocess.run(
+        [sys.executable, '-c', CHILD],
+        capture_output=True,
+        check=True,
+    )
+    return json.loads(out.stdout)
+
+
+def main() -> None:
+
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else RUNS
+    results = [measure() for _ in range(runs)]
+    times = [r['time'] * 1000 for r in results]
+
+    print(f'Runs: {runs}')
+    print(f'Median: {statistics.median(times):.1f} ms')
+    print(f'Min: {min(times):.1f} ms, max: {max(times):.1f} ms')
+    print('Heavy modules loaded on import:', results[-1]['loaded'] or 'none')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+
+#           How to use
+# *******************************
+# python3 -m tests.bench_wss [frames]
+#
+# Measures how many websocket frames per second
+# AternosWss.receiver processes with each available
+# JSON decoder. Frames are modelled on aternos_ws.txt:
+# mostly console lines with RAM, TPS and status messages
+
+import sys
+import json
+import time
+import asyncio
+
+from typing import Any, Callable, Dict, List
+
+from python_aternos.atwss import Streams
+from tests.test_wss import FakeWss
+
+FRAMES = 100000
+
+LINE = {
+    'stream': 'console',
+    'type': 'line',
+    'data': (
+        '[23:28:28] [Server thread/INFO] [minecraft/DedicatedServer]: '
+        'There are §r0§r/§r8§r players online:§r\r'
+    ),
+}
+HEAP = {'stream': 'heap', 'type': 'heap', 'data': {'usage': 1298120528}}
+TICK = {'stream': 'tick', 'type': 'tick', 'data': {'averageTickTime': 1.2}}
+STATUS = {
+    'type': 'status',
+    'message': json.dumps({
+        'brand': 'aternos', 'status': 1, 'change': 1676024531,
+        'slots': 20, 'problems': 0, 'players': 0, 'playerlist': [],
+        'message': {'text': '', 'class': 'blue'},
+        'dynip': None, 'bedrock': False, 'host': '', 'port': 25565,
+        'headstarts': None, 'ram': 1700, 'lang': 'online',
+        'label': 'Online', 'class': 'online', 'countdown': None,
+        'queue': None, 'id': 'S0m3DGvTXXXXXXXX', 'name': 'test',
+        'software': {'id': 'vanilla', 'name': 'Vanilla', 'version': '1.16.5'},
+        'motd': 'A Minecraft Server', 'onlineMode': False,
+    }),
+}
+
+
+def synthetic(count: int) -> List[str]:
+
+    # 90% console lines, the rest are split
+    # between heap, tick and status messages
+    kinds = [LINE] * 18 + [HEAP, TICK]
+    frames = [json.dumps(kinds[i % len(kinds)]) for i in range(count)]
+    for i in range(0, count, 100):
+        frames[i] = json.dumps(STATUS)
+    return frames
+
+
+def decoders() -> Dict[str, Callable[[str], Any]]:
+
+    result: Dict[str, Callable[[str], Any]] = {'json': json.loads}
+    for name in ('orjson', 'ujson'):
+        try:
+            result[name] = __import__(name).loads
+        except ImportError:
+            pass
+    return result
+
+
+async def measure(
+        frames: List[str],
+        loads: Callable[[str], Any],
+        status: bool) -> float:
+
+    wss = FakeWss(decoder=loads, queue_size=len(frames))
+
+    @wss.wssreceiver(Streams.console)
+    async def console(msg: str) -> None:
+        pass
+
+    if status:
+        @wss.wssreceiver(Streams.status)
+        async def server(msg: Dict[str, Any]) -> None:
+            pass
+
+    await wss.connect()
+
+    start = time.perf_counter()
+    wss.sockets[0].feed(*frames)
+    while wss.received < len(frames):
+        await asyncio.sleep(0)
+    took = time.perf_counter() - start
+
+    await wss.close()
+    return took
+
+
+def main() -> None:
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else FRAMES
+    frames = synthetic(count)
+
+    print(f'Frames: {count}')
+    for name, loads in decoders().items():
+        for status in (False, True):
+            took = asyncio.run(measure(frames, loads, status))
+            listeners = 'with' if status else 'without'
+            print(
+                f'{name:>6}, {listeners} status listener: '
+                f'{count / took:,.0f} frames/s'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+
+import re
+import unittest
+
+from python_aternos import atconsole
+
+LINES = [
+    '[23:27:07] [Server thread/INFO] [FML]: Injecting itemstacks\r',
+    '[23:28:28] [Server thread/INFO] [minecraft/DedicatedServer]: '
+    'There are §r0§r/§r8§r players online:§r',
+    '[23:28:30] [User Authenticator #1/INFO]: UUID of player Steve is 123',
+    '[12:34:56 WARN]: [Essentials] Can\'t find the config',
+    '[12:34:56 INFO]: Done (3.2s)!',
+    'list',
+]
+
+
+class TestConsole(unittest.TestCase):
+
+    def test_forge(self) -> None:
+
+        line = atconsole.parse_line(LINES[0])
+        self.assertEqual(line.time, '23:27:07')
+        self.assertEqual(line.thread, 'Server thread')
+        self.assertEqual(line.level, 'INFO')
+        self.assertEqual(line.logger, 'FML')
+        self.assertEqual(line.message, 'Injecting itemstacks')
+        self.assertEqual(line.raw, LINES[0])
+
+    def test_colors(self) -> None:
+
+        line = atconsole.parse_line(LINES[1])
+        self.assertEqual(line.logger, 'minecraft/DedicatedServer')
+        self.assertEqual(line.message, 'There are 0/8 players online:')
+
+    def test_vanilla(self) -> None:
+
+        line = atconsole.parse_line(LINES[2])
+        self.assertEqual(line.thread, 'User Authenticator #1')
+        self.assertIsNone(line.logger)
+        self.assertEqual(line.message, 'UUID of player Steve is 123')
+
+    def test_paper(self) -> None:
+
+        line = atconsole.parse_line(LINES[3])
+        self.assertEqual(line.time, '12:34:56')
+        self.assertIsNone(line.thread)
+        self.assertEqual(line.level, 'WARN')
+        self.assertEqual(line.logger, 'Essentials')
+
+        line = atconsole.parse_line(LINES[4])
+        self.assertIsNone(line.logger)
+        self.assertEqual(line.message, 'Done (3.2s)!')
+
+    def test_unknown(self) -> None:
+
+        line = atconsole.parse_line(LINES[5])
+        self.assertEqual(line, atconsole.ConsoleLine('list', raw='list'))
+
+    def test_batch(self) -> None:
+
+        self.assertEqual(
+            atconsole.parse_lines(LINES),
+            [atconsole.parse_line(line) for line in LINES],
+        )
+
+
+class TestPatternSet(unittest.TestCase):
+
+    def test_match(self) -> None:
+
+        patterns = atconsole.PatternSet()
+        patterns.add('join', r'\w+ joined the game')
+        patterns.add('error', re.compile('error', re.IGNORECASE))
+        patterns.add_keyword('essentials', '[Essentials]')
+        patterns.add('double', r'(\w)\1')
+
+        self.assertEqual(patterns.match(LINES[0]), set())
+        self.assertEqual(
+            patterns.match('Steve joined the game'),
+            {'join'},
+        )
+        self.assertEqual(
+            patterns.match('[12:34:56 ERROR]: [Essentials] x'),
+            {'error', 'essentials', 'double'},
+        )
+        self.assertEqual(patterns.match('aa'), {'double'})
+        self.assertIn('double', patterns.separate)
+
+        patterns.remove('error')
+        self.assertEqual(patterns.match('ERROR'), {'double'})
+
+    def test_global_flags(self) -> None:
+
+        patterns = atconsole.PatternSet()
+        patterns.add('join', '(?i)joined the game')
+        patterns.add('done', 'Done')
+
+        self.assertIn('join', patterns.separate)
+        self.assertEqual(patterns.match('Steve JOINED the game'), {'join'})
+        self.assertEqual(patterns.match('Done'), {'done'})
+
+        with self.assertRaises(re.error):
+            patterns.add('broken', '(unclosed')
+
+    def test_same_as_search(self) -> None:
+
+        regexes = ['^list$', 'Done', r'\d+\.\ds', 'player', '(?:INFO|WARN)']
+        patterns = atconsole.PatternSet()
+        for i, regex in enumerate(regexes):
+            patterns.add(i, regex)
+
+        for line in LINES:
+            self.assertEqual(
+                patterns.match(line),
+                {i for i, r in enumerate(regexes) if re.search(r, line)},
+            )
+
+
+if __name__ == '__main__':
+    unittest.main()
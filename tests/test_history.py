@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+
+import re
+import unittest
+
+from python_aternos.athistory import ConsoleHistory, HistoryLine
+from python_aternos.athistory import TokenIndex, tokenize
+from tests.test_wss import FakeWss, line, settle
+
+
+class TestHistory(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self) -> None:
+        self.history = ConsoleHistory()
+        for i in range(10):
+            self.history.append(f'line {i} §é', 100 + i)
+
+    def test_tail(self) -> None:
+
+        self.assertEqual(
+            self.history.tail(2),
+            [
+                HistoryLine(8, 108, 'line 8 §é'),
+                HistoryLine(9, 109, 'line 9 §é'),
+            ],
+        )
+        self.assertEqual(len(self.history.tail(100)), 10)
+        self.assertEqual(self.history.get(3).text, 'line 3 §é')
+
+    def test_between(self) -> None:
+
+        found = self.history.between(102.5, 105)
+        self.assertEqual([ln.id for ln in found], [3, 4, 5])
+        self.assertEqual(self.history.between(200), [])
+
+    def test_search(self) -> None:
+
+        history = self.history
+        self.assertEqual([ln.id for ln in history.search('1')], [1])
+        self.assertEqual(len(history.search('§é')), 10)
+        self.assertEqual(len(history.search('§é', limit=3)), 3)
+        self.assertEqual(
+            [ln.id for ln in history.search(r'[27] §', regex=True)],
+            [2, 7],
+        )
+        self.assertEqual(
+            [ln.id for ln in history.search(re.compile('LINE [0-4]', re.I), start=103)],
+            [3, 4],
+        )
+        self.assertEqual(history.search('line', end=99), [])
+
+    def test_evict(self) -> None:
+
+        history = ConsoleHistory(max_bytes=100, max_lines=1000)
+        for i in range(100):
+            lineid = history.append(f'{i:04d}x\nyz', i)
+
+        self.assertEqual(lineid, 99)
+        self.assertLessEqual(len(history.data), 100)
+        self.assertEqual(history.get(99).text, '0099x yz')
+        with self.assertRaises(IndexError):
+            history.get(0)
+        self.assertEqual(history.tail(1)[0].id, 99)
+        self.assertEqual(history.search('0095')[0].id, 95)
+
+        history = ConsoleHistory(max_lines=10)
+        for i in range(11):
+            history.append(str(i))
+        self.assertEqual(len(history), 9)
+        self.assertEqual(history.lines()[0].text, '2')
+
+    async def test_attach(self) -> None:
+
+        wss = FakeWss()
+        history = ConsoleHistory().attach(wss)
+
+        await wss.connect()
+        wss.sockets[0].feed(line('a'), line('b'))
+        await settle()
+        await wss.close()
+
+        self.assertEqual([ln.text for ln in history.tail()], ['a', 'b'])
+
+
+class TestTokenIndex(unittest.TestCase):
+
+    lines = (
+        '[12:00:00] [Server thread/INFO]: Steve joined the game',
+        '[12:00:01] [Server thread/INFO]: Steve123 joined the game',
+        '[12:00:02] [Server thread/ERROR]: java.lang.NullPointerException',
+        '[12:00:03] [Server thread/INFO]: Steve teleported to -120.5, 64, 300',
+        '[12:00:04] [Server thread/INFO]: Alex left the game',
+        '[12:00:05] [Server thread/WARN]: Caused by java.lang.IllegalStateException',
+        '[12:00:06] [Server thread/INFO]: Steve moved to 12.5, 64',
+    )
+
+    def fill(self, history: ConsoleHistory) -> None:
+        for i, text in enumerate(self.lines):
+            history.append(text, 100 + i)
+
+    def test_tokenize(self) -> None:
+
+        self.assertEqual(
+            tokenize('java.lang.NPE at x=-1.5'),
+            [
+                (0, 'java.lang.npe'), (0, 'java'), (0, 'lang'), (0, 'npe'),
+                (1, 'at'), (2, 'x'), (3, '1.5'), (3, '1'), (3, '5'),
+            ],
+        )
+
+    def test_find(self) -> None:
+
+        for index in (True, False):
+            history = ConsoleHistory(index=index)
+            self.fill(history)
+
+            self.assertEqual([ln.id for ln in history.find('steve')], [0, 3, 6])
+            self.assertEqual([ln.id for ln in history.find('STEVE joined')], [0])
+            self.assertEqual(
+                [ln.id for ln in history.find('joined the', phrase=True)],
+                [0, 1],
+            )
+            self.assertEqual(history.find('the joined', phrase=True), [])
+            self.assertEqual(history.find('NullPointerException')[0].id, 2)
+            self.assertEqual(history.find('java.lang.NullPointerException')[0].time, 102)
+            self.assertEqual(history.find('-120.5, 64', phrase=True)[0].id, 3)
+            self.assertEqual([ln.id for ln in history.find('game', limit=1)], [4])
+            self.assertEqual(history.find('by java', phrase=True)[0].id, 5)
+            # the parts share the position of the dotted name
+            self.assertEqual(history.find('by IllegalStateException', phrase=True)[0].id, 5)
+            self.assertEqual(history.find('caused java', phrase=True), [])
+            self.assertEqual(history.find('to 12', phrase=True)[0].id, 6)
+            self.assertEqual(history.find('12.5 64', phrase=True)[0].id, 6)
+            self.assertEqual(history.find('moved 12', phrase=True), [])
+            self.assertEqual(history.find('creeper'), [])
+            self.assertEqual(history.find(' '), [])
+
+    def test_evict(self) -> None:
+
+        history = ConsoleHistory(max_lines=100, index=True)
+        for i in range(250):
+            history.append(f'player{i % 3} tick{i}')
+
+        index = history.index
+        assert index is not None
+        self.assertNotIn('tick0', index.postings)
+        self.assertEqual(len(index.postings['player0']), len(history.find('player0')))
+        self.assertEqual(index.postings['player0'][0], history.find('player0')[0].id)
+        self.assertEqual(history.find('tick249')[0].id, 249)
+
+        history.clear()
+        self.assertEqual(len(index), 0)
+        history.append('player0')
+        self.assertEqual([ln.id for ln in history.find('player0')], [250])
+
+    def test_lookup(self) -> None:
+
+        index = TokenIndex()
+        index.add(1, 'a b')
+        index.add(2, 'b c b')
+        index.add(5, 'a b c')
+        self.assertEqual(index.lookup(['b', 'c']), [2, 5])
+        self.assertEqual(index.lookup(['d', 'a']), [])
+        self.assertEqual(list(index.postings['b']), [1, 2, 5])
+
+        index.evict(['a b', 'b c b'], 5)
+        self.assertEqual(index.lookup(['b']), [5])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,8 +2,12 @@
 
 import unittest
 
+from requests import HTTPError
+
 from python_aternos import Client
+from python_aternos.atconnect import BASE_URL
 from tests import mock
+from tests import files
 
 
 class TestHttp(unittest.TestCase):
@@ -35,6 +39,35 @@ class TestHttp(unittest.TestCase):
                 True,
             )
 
+    def test_fetch_all(self) -> None:
+        with mock.mock:
+            at = Client()
+            at.login('test', '')
+            at.atconn.min_interval = 0.01
+            srvs = at.account.list_servers(cache=False)
+
+            results = at.account.fetch_all(max_workers=4, timeout=30)
+            self.assertEqual(list(results), [srv.servid for srv in srvs])
+            for result in results.values():
+                self.assertTrue(result.ok, result.error)
+                self.assertEqual(result.server.subdomain, 'world35v')
+
+    def test_fetch_all_errors(self) -> None:
+        with mock.mock:
+            at = Client()
+            at.login('test', '')
+            srv = at.account.list_servers(cache=False)[0]
+            mock.mock.get(f'{BASE_URL}/server', status_code=500)
+            try:
+                results = at.account.fetch_all()
+            finally:
+                mock.mock.get(
+                    f'{BASE_URL}/server',
+                    content=files.read_html('aternos_server1'),
+                )
+            self.assertFalse(results[srv.servid].ok)
+            self.assertIsInstance(results[srv.servid].error, HTTPError)
+
 
 if __name__ == '__main__':
     unittest.main()
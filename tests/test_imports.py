@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+
+import sys
+import subprocess
+import unittest
+
+HEAVY = ('js2py', 'lxml', 'cloudscraper', 'regex', 'websockets')
+
+
+def loaded_after(code: str) -> list:
+
+    out = subprocess.run(
+        [
+            sys.executable, '-c',
+            f'import sys\n{code}\n'
+            f'print(*[m for m in {HEAVY!r} if m in sys.modules])',
+        ],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    return out.stdout.split()
+
+
+class TestImports(unittest.TestCase):
+
+    def test_lazy(self) -> None:
+        loaded = loaded_after('import python_aternos')
+        self.assertEqual(loaded, [])
+
+    def test_js2py(self) -> None:
+        loaded = loaded_after(
+            'from python_aternos import Js2PyInterpreter\n'
+            'Js2PyInterpreter()'
+        )
+        self.assertIn('js2py', loaded)
+        self.assertNotIn('websockets', loaded)
+
+
+if __name__ == '__main__':
+    unittest.main()
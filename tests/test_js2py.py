@@ -2,7 +2,10 @@
 
 import unittest
 
+from concurrent.futures import ThreadPoolExecutor
+
 from python_aternos import atjsparse
+from python_aternos import aterrors
 from tests import files
 
 CONV_TOKEN_ARROW = '''(() => {/*AJAX_TOKEN=123}*/window["AJAX_TOKEN"]=("2r" + "KO" + "A1" + "IFdBcHhEM" + "61" + "6cb");})();'''
@@ -58,6 +61,85 @@ class TestJs2Py(unittest.TestCase):
             res = self.js['AJAX_TOKEN']
             self.assertEqual(res, exp)
 
+    def test_cache(self) -> None:
+
+        code = self.js.compile_js(CONV_TOKEN_ARROW)
+        other = atjsparse.Js2PyInterpreter()
+        self.assertIs(other.compile_js(CONV_TOKEN_ARROW), code)
+
+        other.exec_js(CONV_TOKEN_ARROW)
+        other.reset()
+        other.exec_js('window.r = typeof AJAX_TOKEN')
+        self.assertEqual(other['r'], 'undefined')
+
+
+class TestPool(unittest.TestCase):
+
+    def setUp(self) -> None:
+
+        self.tests = files.read_sample('token_input.txt')
+        self.results = files.read_sample('token_output.txt')
+        self.pool = atjsparse.InterpreterPool(size=2, timeout=0.1)
+
+    def tearDown(self) -> None:
+        self.pool.close()
+
+    def test_isolation(self) -> None:
+
+        with self.pool.acquire() as js:
+            js.exec_js('window.t = 1')
+            self.assertEqual(js['t'], 1)
+
+        with self.pool.acquire() as js:
+            res = js.exec_and_get('window.r = typeof t', 'r')
+            self.assertEqual(res, {'r': 'undefined'})
+
+    def test_bounded(self) -> None:
+
+        with self.pool.acquire(), self.pool.acquire():
+            with self.assertRaises(aterrors.InterpreterError):
+                self.pool.take()
+
+        self.assertEqual(self.pool.count, 2)
+
+    def test_threads(self) -> None:
+
+        def parse(func: str) -> str:
+            with self.pool.acquire() as js:
+                return js.exec_and_get(func, 'AJAX_TOKEN')['AJAX_TOKEN']
+
+        self.pool.timeout = None
+        with ThreadPoolExecutor(4) as executor:
+            tokens = list(executor.map(parse, self.tests))
+
+        self.assertEqual(tokens, self.results[:len(tokens)])
+        self.assertLessEqual(self.pool.count, 2)
+
+    def test_get_pool(self) -> None:
+
+        pool = atjsparse.get_pool(create=atjsparse.NodeInterpreter)
+        try:
+            self.assertIs(pool.create, atjsparse.NodePipeInterpreter)
+            self.assertIs(atjsparse.get_pool(create=atjsparse.NodeInterpreter), pool)
+        finally:
+            atjsparse.get_pool(create=atjsparse.Js2PyInterpreter)
+
+    def test_get_pool_threads(self) -> None:
+
+        def get(_: int) -> atjsparse.InterpreterPool:
+            return atjsparse.get_pool(create=atjsparse.Js2PyInterpreter)
+
+        with ThreadPoolExecutor(4) as executor:
+            pools = set(executor.map(get, range(8)))
+
+        self.assertEqual(len(pools), 1)
+
+    def test_get_interpreter(self) -> None:
+
+        js = atjsparse.get_interpreter()
+        self.assertIsInstance(js, atjsparse.Js2PyInterpreter)
+        self.assertIs(atjsparse.get_interpreter(), js)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -3,6 +3,7 @@
 import unittest
 
 from python_aternos import atjsparse
+from python_aternos import aterrors
 from tests import files
 
 
@@ -28,5 +29,71 @@ class TestJsNode(unittest.TestCase):
             self.assertEqual(res, exp)
 
 
+class TestJsNodePipe(unittest.TestCase):
+
+    def setUp(self) -> None:
+
+        self.tests = files.read_sample('token_input.txt')
+        self.results = files.read_sample('token_output.txt')
+
+        try:
+            self.js = atjsparse.NodePipeInterpreter()
+            self.js.exec_js('0')
+        except (OSError, aterrors.InterpreterError) as err:
+            self.skipTest(
+                f'Unable to start NodeJS interpreter: {err}'
+            )
+
+    def test_exec(self) -> None:
+
+        for func, exp in zip(self.tests, self.results):
+            res = self.js.exec_and_get(func, 'AJAX_TOKEN')
+            self.assertEqual(res, {'AJAX_TOKEN': exp})
+
+    def test_error(self) -> None:
+
+        with self.assertRaises(aterrors.InterpreterError):
+            self.js.exec_js('throw new Error("test")')
+
+        # the worker is still usable after an exception
+        self.js.exec_js('window.t = 1 + 1')
+        self.assertEqual(self.js['t'], 2)
+
+
+class TestJsNodeAsync(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self) -> None:
+
+        self.tests = files.read_sample('token_input.txt')
+        self.results = files.read_sample('token_output.txt')
+
+        self.js = atjsparse.AsyncNodeInterpreter()
+        try:
+            await self.js.start()
+        except aterrors.InterpreterError as err:
+            self.skipTest(
+                f'Unable to start NodeJS interpreter: {err}'
+            )
+
+    async def asyncTearDown(self) -> None:
+        await self.js.close()
+
+    async def test_exec(self) -> None:
+
+        for func, exp in zip(self.tests, self.results):
+            res = await self.js.exec_and_get(func, 'AJAX_TOKEN')
+            self.assertEqual(res, {'AJAX_TOKEN': exp})
+
+    async def test_respawn(self) -> None:
+
+        assert self.js.proc is not None
+        self.js.proc.kill()
+        await self.js.proc.wait()
+
+        res = await self.js.exec_and_get('window.t = 2', 't')
+        self.assertEqual(res, {'t': 2})
+        self.assertTrue(self.js.alive())
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+
+import math
+import time
+import asyncio
+import unittest
+
+from typing import Any, Dict, List
+
+from python_aternos.atconnect import AternosConnect
+from python_aternos.atserver import AternosServer, Status
+from python_aternos.atpoller import StatusPoller
+
+
+class FakeServer(AternosServer):
+
+    def __init__(self, servid: str, atconn: AternosConnect, status: int) -> None:
+        super().__init__(servid, atconn)
+        self.status_value = status
+        self.requests: List[float] = []
+        self.fail = False
+
+    def fetch_info(self) -> Dict[str, Any]:
+        self.requests.append(time.monotonic())
+        if self.fail:
+            raise ConnectionError('Unreachable')
+        return {'status': self.status_value, 'lang': Status(self.status_value).name}
+
+
+class TestPoller(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self) -> None:
+        self.atconn = AternosConnect()
+        self.poller = StatusPoller(
+            intervals={Status.off: 10.0, Status.loading: 0.05},
+            rate=200.0,
+            jitter=0.0,
+        )
+
+    async def test_intervals(self) -> None:
+
+        off = FakeServer('off', self.atconn, Status.off)
+        loading = FakeServer('loading', self.atconn, Status.loading)
+        self.poller.add(off)
+        self.poller.add(loading)
+
+        self.assertEqual(self.poller.staleness('off'), math.inf)
+        with self.assertRaises(KeyError):
+            self.poller.add(off)
+
+        await self.poller.start()
+        await asyncio.sleep(0.3)
+        await self.poller.close()
+
+        self.assertEqual(len(off.requests), 1)
+        self.assertGreaterEqual(len(loading.requests), 3)
+        self.assertEqual(loading.status, 'loading')
+
+        stats = self.poller.stats()
+        self.assertEqual(stats['off']['status'], 'off')
+        self.assertEqual(stats['off']['interval'], 10.0)
+        self.assertLess(stats['off']['stale'], 1.0)
+        self.assertGreater(stats['off']['next'], 9.0)
+
+    async def test_replace(self) -> None:
+
+        atserv = FakeServer('a', self.atconn, Status.off)
+        atserv.update({'status': Status.on, 'lang': 'online', 'players': 1})
+        atserv.updated = 0.0
+        changes: List[Dict[str, Any]] = []
+        atserv.onchange(changes.append)
+
+        self.poller.add(atserv)
+        await self.poller.start()
+        await asyncio.sleep(0.05)
+        await self.poller.close()
+
+        self.assertEqual(atserv._info, atserv.fetch_info())
+        self.assertEqual(changes[0]['players'], (1, None))
+
+    async def test_rate(self) -> None:
+
+        self.poller.rate = 50.0
+        servers = [
+            FakeServer(str(i), self.atconn, Status.off)
+            for i in range(5)
+        ]
+        for atserv in servers:
+            self.poller.add(atserv)
+
+        await self.poller.start()
+        await asyncio.sleep(0.2)
+        await self.poller.close()
+
+        starts = sorted(atserv.requests[0] for atserv in servers)
+        gaps = [b - a for a, b in zip(starts, starts[1:])]
+        self.assertGreater(min(gaps), 0.01)
+
+    async def test_backoff_and_skip(self) -> None:
+
+        failing = FakeServer('failing', self.atconn, Status.loading)
+        failing.fail = True
+        self.poller.add(failing)
+
+        live = FakeServer('live', self.atconn, Status.off)
+        live.update({'status': Status.loading, 'lang': 'loading'})
+        self.poller.add(live)
+
+        await self.poller.start()
+        await asyncio.sleep(0.3)
+        await self.poller.close()
+
+        # 0.05, 0.1, 0.2
+        self.assertLessEqual(len(failing.requests), 3)
+        self.assertGreater(self.poller.errors['failing'], 0)
+        self.assertEqual(self.poller.failures, len(failing.requests))
+
+        # updated by someone else less than an interval ago
+        self.assertLessEqual(len(live.requests), len(failing.requests) + 5)
+        self.assertGreater(self.poller.skipped, 0)
+
+    async def test_remove_refresh(self) -> None:
+
+        atserv = FakeServer('a', self.atconn, Status.off)
+        self.poller.add(atserv, delay=100.0)
+        await self.poller.start()
+
+        self.poller.refresh('a')
+        await asyncio.sleep(0.05)
+        self.assertEqual(len(atserv.requests), 1)
+
+        self.poller.remove('a')
+        self.poller.refresh('a')
+        self.assertNotIn('a', self.poller)
+        await self.poller.close()
+
+    async def test_remove_while_waiting(self) -> None:
+
+        self.poller.rate = 10.0
+        first = FakeServer('a', self.atconn, Status.off)
+        second = FakeServer('b', self.atconn, Status.off)
+        self.poller.add(first)
+        self.poller.add(second)
+        await self.poller.start()
+
+        # b waits 0.1 s for its turn
+        await asyncio.sleep(0.05)
+        self.poller.remove('b')
+        await asyncio.sleep(0.1)
+
+        self.assertEqual(len(first.requests), 1)
+        self.assertEqual(second.requests, [])
+        self.assertNotIn('b', self.poller.due)
+        limiter = self.poller.get_limiter()
+        self.assertFalse(limiter.locked())
+
+        # removed during the request
+        def slow() -> Dict[str, Any]:
+            time.sleep(0.05)
+            return {'status': Status.off, 'lang': 'offline'}
+
+        polls = self.poller.polls
+        first.fetch_info = slow  # type: ignore
+        first.updated = 0.0
+        self.poller.next_start = 0.0
+        self.poller.refresh('a')
+        await asyncio.sleep(0.02)
+        self.poller.remove('a')
+        await asyncio.sleep(0.1)
+        await self.poller.close()
+
+        self.assertEqual(self.poller.polls, polls + 1)
+
+        self.assertNotIn('a', self.poller.errors)
+        self.assertNotIn('a', self.poller.due)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+
+import json
+import gzip
+import time
+import asyncio
+import tempfile
+import unittest
+
+from pathlib import Path
+
+from python_aternos.atrecorder import StreamRecorder
+from python_aternos.atwss import Streams
+from tests.test_wss import FakeWss, line, status, settle
+
+
+class TestRecorder(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / 'logs' / 'server.jsonl'
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    async def test_record(self) -> None:
+
+        wss = FakeWss()
+        recorder = StreamRecorder(self.path, interval=0.01)
+        recorder.attach(wss)
+
+        await wss.connect()
+        wss.sockets[0].feed(line('hello'), status(status=2))
+        await settle()
+        await wss.close()
+
+        # written in the background, before close()
+        await asyncio.sleep(0.1)
+        self.assertEqual(recorder.written, self.path.stat().st_size)
+        await recorder.close()
+
+        records = [
+            json.loads(row)
+            for row in self.path.read_text('utf-8').splitlines()
+        ]
+        self.assertEqual(
+            [(rec['s'], rec['d']) for rec in records][0],
+            ('console', 'hello'),
+        )
+        self.assertEqual(records[1]['s'], 'status')
+        self.assertEqual(records[1]['d']['status'], 2)
+
+    async def test_rotate(self) -> None:
+
+        recorder = StreamRecorder(
+            self.path,
+            max_bytes=200,
+            backups=2,
+            compress=True,
+            buffer_size=1,
+        )
+
+        for i in range(20):
+            recorder.record(Streams.console, f'line {i:02d} ' + 'x' * 50)
+            await recorder.writer
+        await recorder.close()
+
+        rotated = recorder.rotated()
+        self.assertEqual(len(rotated), 2)
+        self.assertGreater(recorder.rotations, 2)
+        self.assertTrue(all(p.suffix == '.gz' for p in rotated))
+        self.assertLessEqual(self.path.stat().st_size, 200)
+
+        with gzip.open(rotated[-1], 'rt', encoding='utf-8') as file:
+            rows = [json.loads(row)['d'] for row in file]
+        current = [
+            json.loads(row)['d']
+            for row in self.path.read_text('utf-8').splitlines()
+        ]
+        # the newest rotated file ends right before the current one
+        self.assertEqual(
+            int(rows[-1][5:7]) + 1,
+            int(current[0][5:7]),
+        )
+        self.assertEqual(current[-1][:7], 'line 19')
+
+    async def test_record_while_closing(self) -> None:
+
+        recorder = StreamRecorder(self.path)
+        write = recorder.write
+        writing = []
+
+        def slow_write(data: bytes) -> None:
+            writing.append(data)
+            self.assertEqual(len(writing), 1)
+            time.sleep(0.02)
+            write(data)
+            writing.pop()
+
+        recorder.write = slow_write  # type: ignore
+        recorder.record(Streams.console, 'a')
+        closing = asyncio.create_task(recorder.close())
+        await asyncio.sleep(0.01)
+
+        # a receiver still attached
+        recorder.buffer_size = 1
+        recorder.record(Streams.console, 'b')
+        await closing
+        recorder.record(Streams.console, 'c')
+        await asyncio.sleep(0.05)
+
+        rows = [
+            json.loads(row)['d']
+            for row in self.path.read_text('utf-8').splitlines()
+        ]
+        self.assertEqual(rows, ['a', 'b'])
+        self.assertIsNone(recorder.file)
+
+    def test_rotated_names(self) -> None:
+
+        recorder = StreamRecorder(self.path)
+        stem, suffix = self.path.stem, self.path.suffix
+        self.path.parent.mkdir(parents=True)
+        names = (
+            f'{stem}-20240101-120000{suffix}',
+            f'{stem}-20240101-120000.2{suffix}.gz',
+            # another recorder's files in the same directory
+            f'{stem}-2{suffix}',
+            f'{stem}-2-20240101-120000{suffix}',
+        )
+        for name in names:
+            (self.path.parent / name).write_text('')
+
+        self.assertEqual(
+            sorted(path.name for path in recorder.rotated()),
+            sorted(names[:2]),
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+
+import json
+import asyncio
+import tempfile
+import unittest
+
+from pathlib import Path
+from typing import Any, Dict, List, Set
+
+from python_aternos import atreplay
+from python_aternos.atwss import AternosWss, Streams
+from tests.test_wss import FakeServer, OUTPUT
+
+SESSION = Path(__file__).parent.parent / 'aternos_ws.txt'
+
+
+class TestReplay(unittest.IsolatedAsyncioTestCase):
+
+    def test_parse(self) -> None:
+
+        frames = atreplay.parse_session(SESSION.read_text('utf-8'))
+        types = [json.loads(frame.data)['type'] for frame in frames]
+
+        self.assertEqual(types[0], 'ready')
+        self.assertEqual(types.count('status'), 4)
+        self.assertEqual(types.count('tick'), 2)
+        self.assertEqual(frames[3].stream, 'console')
+
+    def test_recording(self) -> None:
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'rec.jsonl'
+            path.write_text(
+                '{"t":10.0,"s":"console","d":"a"}\n'
+                '{"t":10.5,"s":"tps","d":20.0}\n'
+                '{"t":12.0,"s":"status","d":{"status":1}}\n',
+                'utf-8',
+            )
+            frames = atreplay.load_recording(path)
+
+        self.assertEqual([f.delay for f in frames], [0.0, 0.5, 1.5])
+        self.assertEqual(json.loads(frames[1].data)['data'], {
+            'averageTickTime': 50.0,
+        })
+
+    async def test_session(self) -> None:
+
+        frames = atreplay.parse_session(SESSION.read_text('utf-8'))
+        async with atreplay.ReplayServer(frames, speed=None) as server:
+
+            wss = AternosWss(FakeServer(), url=server.url)  # type: ignore
+            lines: List[str] = []
+            statuses: List[Dict[str, Any]] = []
+
+            @wss.wssreceiver(Streams.console)
+            async def console(msg: str) -> None:
+                lines.append(msg)
+
+            @wss.wssreceiver(Streams.status)
+            async def status(msg: Dict[str, Any]) -> None:
+                statuses.append(msg)
+
+            await wss.connect()
+            assert server.finished is not None
+            await asyncio.wait_for(server.finished.wait(), 5)
+            await asyncio.sleep(0.05)
+            await wss.heartbeat()
+            await wss.close()
+
+        self.assertIsNotNone(wss.rtt)
+        self.assertIn({'type': '❤'}, server.received)
+
+        self.assertEqual(len(lines), 4)
+        self.assertEqual(
+            [s['lang'] for s in statuses],
+            ['stopping', 'saving', 'offline', 'online'],
+        )
+
+    async def test_command(self) -> None:
+
+        server = atreplay.ReplayServer(
+            atreplay.flood(5),
+            speed=None,
+            outputs=OUTPUT,
+            require_start=True,
+        )
+        await server.start()
+
+        wss = AternosWss(FakeServer(), url=server.url)  # type: ignore
+        await wss.connect()
+        result = await wss.command_result('list', quiet=0.1)
+        await wss.close()
+        await server.close()
+
+        self.assertEqual(result, [s.strip() for s in OUTPUT['list']])
+        self.assertIn(
+            {'stream': 'console', 'type': 'start'},
+            server.received,
+        )
+        # flood lines were skipped before the stream was started
+        self.assertEqual(server.sent, 0)
+
+    async def test_library_pings(self) -> None:
+
+        async with atreplay.ReplayServer([], speed=None) as server:
+
+            wss = AternosWss(FakeServer(), url=server.url)  # type: ignore
+            await wss.connect()
+            # heartbeat() pings every 49 s, not often enough
+            self.assertEqual(wss.socket.ping_interval, 20.0)
+            await wss.close()
+
+            wss = AternosWss(
+                FakeServer(), url=server.url,  # type: ignore
+                keepalive=10.0,
+            )
+            await wss.connect()
+            self.assertIsNone(wss.socket.ping_interval)
+            await wss.close()
+
+    async def test_command_not_started(self) -> None:
+
+        server = atreplay.ReplayServer(
+            [], outputs=OUTPUT, require_start=True,
+        )
+        sent: List[str] = []
+
+        class Socket:
+            async def send(self, data: str) -> None:
+                sent.append(data)
+
+        started: Set[str] = set()
+        command = {'type': 'command', 'data': 'list'}
+        await server.answer(Socket(), command, started)
+        self.assertEqual(sent, [])
+
+        started.add('console')
+        await server.answer(Socket(), command, started)
+        self.assertEqual(len(sent), 1 + len(OUTPUT['list']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+import unittest
+
+from python_aternos.atseries import Series, ServerMetrics
+from python_aternos.atwss import Streams
+from tests.test_wss import FakeWss, settle
+
+
+class TestSeries(unittest.IsolatedAsyncioTestCase):
+
+    def test_ring(self) -> None:
+
+        series = Series(4)
+        for i in range(6):
+            series.append(i, 100 + i)
+
+        self.assertEqual(len(series), 4)
+        self.assertEqual(series.last(), [2, 3, 4, 5])
+        self.assertEqual(series.last(2.5, now=105), [3, 4, 5])
+        self.assertEqual(series.items(0.5, now=105), [(105, 5)])
+
+        series.clear()
+        self.assertEqual(series.last(), [])
+        self.assertEqual(series.stats(), {'count': 0})
+
+    def test_stats(self) -> None:
+
+        series = Series(1000)
+        for i in range(1, 101):
+            series.append(i, i)
+
+        stats = series.stats()
+        self.assertEqual(stats['count'], 100)
+        self.assertEqual(stats['min'], 1)
+        self.assertEqual(stats['max'], 100)
+        self.assertEqual(stats['avg'], 50.5)
+        self.assertEqual(stats['p95'], 95)
+        self.assertEqual(stats['last'], 100)
+        self.assertIs(series.stats(), stats)
+
+        series.append(0, 101)
+        self.assertEqual(series.stats()['min'], 0)
+
+    def test_downsample(self) -> None:
+
+        series = Series(10)
+        for i, value in enumerate((1, 3, 5, 7, 9)):
+            series.append(value, 10 + i)
+
+        self.assertEqual(
+            series.downsample(2),
+            [(10, 1, 2, 3), (12, 5, 6, 7), (14, 9, 9, 9)],
+        )
+
+    async def test_attach(self) -> None:
+
+        wss = FakeWss()
+        metrics = ServerMetrics(10).attach(wss)
+        self.assertTrue(wss.has_listeners(Streams.ram))
+
+        await wss.connect()
+        wss.sockets[0].feed(
+            '{"stream":"heap","type":"heap","data":{"usage":1024}}',
+            '{"stream":"tick","type":"tick","data":{"averageTickTime":100}}',
+        )
+        await settle()
+        await wss.close()
+
+        self.assertEqual(metrics.ram.last(), [1024])
+        self.assertEqual(metrics.stats()['tps']['last'], 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
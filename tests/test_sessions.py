@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+
+import unittest
+
+from python_aternos.atsessions import SessionTracker, Session
+from tests.test_wss import FakeWss, line, settle
+
+
+class TestSessions(unittest.IsolatedAsyncioTestCase):
+
+    def test_parse(self) -> None:
+
+        tracker = SessionTracker()
+        lines = (
+            ('[12:00:00] [Server thread/INFO]: Steve joined the game', 10),
+            ('[12:00:01 INFO]: §eAlex joined the game', 20),
+            ('[12:00:02] [Server thread/INFO]: <Alex> Bob joined the game', 25),
+            ('[2023-01-01 12:00:03:123 INFO] Player connected: Bed Rock, xuid: 253', 30),
+            ('[12:00:04] [Server thread/INFO]: Steve lost connection: Disconnected', 40),
+            ('[12:00:04] [Server thread/INFO]: Steve left the game', 41),
+            ('[12:00:05] [Server thread/INFO]: Steve joined the game', 50),
+        )
+        recognized = [tracker.parse(text, ts) for text, ts in lines]
+
+        self.assertEqual(recognized, [True, True, False, True, True, True, True])
+        self.assertEqual(tracker.online_list(), ['Alex', 'Bed Rock', 'Steve'])
+        self.assertEqual(
+            tracker.sessions('Steve'),
+            [Session('Steve', 10, 40), Session('Steve', 50)],
+        )
+        self.assertEqual(tracker.current('Steve', 60), 10)
+        self.assertEqual(tracker.total('Steve', 60), 40)
+        self.assertIsNone(tracker.current('Bob'))
+
+        tracker.parse('[12:00:06] [Server thread/INFO]: Stopping the server', 70)
+        self.assertEqual(len(tracker), 0)
+        self.assertEqual(tracker.total('Alex'), 50)
+        self.assertEqual(len(tracker.sessions(since=65)), 3)
+
+    def test_reconcile(self) -> None:
+
+        tracker = SessionTracker()
+        tracker.join('Steve', 0)
+        tracker.join('Alex', 5)
+
+        joined, left = tracker.reconcile(['Alex', 'Bob'], 10)
+        self.assertEqual((joined, left), (['Bob'], ['Steve']))
+        self.assertEqual(tracker.sessions('Steve'), [Session('Steve', 0, 10)])
+        self.assertEqual(tracker.online_list(), ['Alex', 'Bob'])
+        self.assertEqual(tracker.reconcile(['Bob', 'Alex'], 20), ([], []))
+
+    def test_history_limit(self) -> None:
+
+        tracker = SessionTracker(max_sessions=10)
+        for i in range(25):
+            tracker.join(f'p{i % 2}', i)
+            tracker.leave(f'p{i % 2}', i + 0.5)
+
+        self.assertLessEqual(len(tracker.sessions()), 10)
+        self.assertEqual(tracker.sessions()[-1], Session('p0', 24, 24.5))
+        self.assertEqual(tracker.total('p0'), 6.5)
+        self.assertEqual(tracker.names, ['p0', 'p1'])
+
+    async def test_attach(self) -> None:
+
+        wss = FakeWss()
+        tracker = SessionTracker().attach(wss)
+
+        await wss.connect()
+        wss.sockets[0].feed(
+            line('[12:00:00] [Server thread/INFO]: Steve joined the game'),
+            line('[12:00:00] [Server thread/INFO]: Alex joined the game'),
+            line('[12:00:01] [Server thread/INFO]: Alex left the game'),
+        )
+        await settle()
+        await wss.close()
+
+        self.assertEqual(tracker.online_list(), ['Steve'])
+        self.assertEqual(len(tracker.sessions('Alex')), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,666 @@
+#!/usr/bin/env python3
+
+import json
+import time
+import asyncio
+import threading
+import unittest
+
+from typing import Any, Dict, List
+
+from websockets.exceptions import ConnectionClosedError
+
+from python_aternos import atwss
+from python_aternos.atconnect import AternosConnect
+from python_aternos.atserver import AternosServer
+from python_aternos.atwss import Streams
+from python_aternos.atqueue import MessageQueue, Overflow
+from python_aternos.atqueue import Sink, Batcher
+
+STATUS = {
+    'status': 1,
+    'class': 'online',
+    'lang': 'online',
+    'players': 0,
+    'playerlist': [],
+    'countdown': None,
+    'queue': None,
+}
+
+OUTPUT = {
+    'list': [
+        '[23:28:28] [Server thread/INFO]: There are 0/8 players online:',
+        '[23:28:28] [Server thread/INFO]: ',
+    ],
+    'tps': [
+        '[23:28:29] [Server thread/INFO]: TPS from last 1m, 5m, 15m: 20.0',
+    ],
+}
+
+
+def line(text: str) -> str:
+    return json.dumps({
+        'stream': 'console',
+        'type': 'line',
+        'data': text + '\r',
+    })
+
+
+def status(**kwargs) -> str:
+    return json.dumps({
+        'type': 'status',
+        'message': json.dumps({**STATUS, **kwargs}),
+    })
+
+
+class FakeSocket:
+
+    def __init__(self) -> None:
+        self.incoming: asyncio.Queue = asyncio.Queue()
+        self.sent: List[Any] = []
+        # don't answer pings
+        self.silent = False
+
+    def feed(self, *frames: Any) -> None:
+        for frame in frames:
+            self.incoming.put_nowait(frame)
+
+    async def recv(self) -> str:
+        frame = await self.incoming.get()
+        if isinstance(frame, Exception):
+            raise frame
+        return frame
+
+    async def send(self, data: str) -> None:
+        obj = json.loads(data)
+        self.sent.append(obj)
+        if obj.get('type') == 'command':
+            self.feed(line(obj['data']))
+            self.feed(*map(line, OUTPUT.get(obj['data'].lstrip('/'), ())))
+
+    async def ping(self) -> asyncio.Future:
+        waiter = asyncio.get_running_loop().create_future()
+        if not self.silent:
+            waiter.set_result(0.0)
+        return waiter
+
+    def fail_connection(self, code: int, reason: str) -> None:
+        self.feed(ConnectionClosedError(None, None))
+
+    async def close(self) -> None:
+        pass
+
+
+class FakeServer:
+
+    class atconn:  # pylint: disable=invalid-name
+        class session:  # pylint: disable=invalid-name
+            cookies = {'ATERNOS_SESSION': '0123abcd'}
+
+    servid = 'test'
+
+    def __init__(self) -> None:
+        self.confirms = 0
+
+    def confirm(self) -> None:
+        self.confirms += 1
+
+
+class FakeWss(atwss.AternosWss):
+
+    def __init__(self, *args, atserv: Any = None, **kwargs) -> None:
+        super().__init__(atserv or FakeServer(), *args, **kwargs)
+        self.sockets: List[FakeSocket] = []
+        self.backoff_min = 0.01
+
+    async def open(self) -> None:
+        self.socket = FakeSocket()
+        self.sockets.append(self.socket)
+        self.connected = True
+        self.connected_at = time.monotonic()
+
+
+async def settle() -> None:
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+class TestWss(unittest.IsolatedAsyncioTestCase):
+
+    async def test_receive(self) -> None:
+
+        wss = FakeWss()
+        lines: List[str] = []
+        statuses: List[Dict[str, Any]] = []
+
+        @wss.wssreceiver(Streams.console)
+        async def console(msg: str) -> None:
+            lines.append(msg)
+
+        @wss.wssreceiver(Streams.status)
+        async def server(msg: Dict[str, Any]) -> None:
+            statuses.append(msg)
+
+        await wss.connect()
+        wss.sockets[0].feed(line('a'), status(), line('b'))
+        await settle()
+        await wss.close()
+
+        self.assertEqual(lines, ['a', 'b'])
+        self.assertEqual(statuses[0]['lang'], 'online')
+
+    async def test_parsed(self) -> None:
+
+        wss = FakeWss()
+        sub = wss.stream(Streams.console_parsed)
+
+        await wss.connect()
+        wss.sockets[0].feed(line('[23:27:07] [Server thread/INFO]: Done'))
+        parsed = await sub.get()
+        await wss.close()
+
+        self.assertEqual(parsed.level, 'INFO')
+        self.assertEqual(parsed.message, 'Done')
+
+    async def test_reconnect(self) -> None:
+
+        wss = FakeWss(reconnect=True)
+        events: List[Dict[str, Any]] = []
+
+        @wss.wssreceiver(Streams.console)
+        async def console(msg: str) -> None:
+            pass
+
+        @wss.wssreceiver(Streams.reconnect)
+        async def reconnected(msg: Dict[str, Any]) -> None:
+            events.append(msg)
+
+        await wss.connect()
+        wss.sockets[0].feed(ConnectionClosedError(None, None))
+        await asyncio.sleep(0.05)
+        await wss.close()
+
+        self.assertEqual(len(wss.sockets), 2)
+        self.assertIn(
+            {'stream': 'console', 'type': 'start'},
+            wss.sockets[1].sent,
+        )
+        self.assertEqual(wss.reconnects, 1)
+        self.assertEqual(events[0]['attempts'], 1)
+        self.assertGreater(wss.downtime, 0)
+
+    async def test_reconnect_drop_on_start(self) -> None:
+
+        class DroppingSocket(FakeSocket):
+            async def send(self, data: str) -> None:
+                raise ConnectionClosedError(None, None)
+
+        class DroppingWss(FakeWss):
+            async def open(self) -> None:
+                await super().open()
+                if len(self.sockets) == 2:
+                    self.socket = self.sockets[1] = DroppingSocket()
+
+        wss = DroppingWss(reconnect=True)
+
+        @wss.wssreceiver(Streams.console)
+        async def console(msg: str) -> None:
+            pass
+
+        await wss.connect()
+        wss.sockets[0].feed(ConnectionClosedError(None, None))
+        await asyncio.sleep(0.1)
+
+        self.assertFalse(wss.msgs.done())
+        self.assertTrue(wss.connected)
+        self.assertEqual(len(wss.sockets), 3)
+        self.assertIn(
+            {'stream': 'console', 'type': 'start'},
+            wss.sockets[2].sent,
+        )
+        self.assertEqual(wss.reconnects, 1)
+        await wss.close()
+
+    async def test_no_reconnect(self) -> None:
+
+        wss = FakeWss()
+        await wss.connect()
+        wss.sockets[0].feed(ConnectionClosedError(None, None))
+        await settle()
+
+        self.assertTrue(wss.msgs.done())
+        self.assertFalse(wss.connected)
+        self.assertEqual(len(wss.sockets), 1)
+        wss.keep.cancel()
+
+    async def test_lazy_status(self) -> None:
+
+        decoded: List[Any] = []
+
+        def loads(data: str) -> Any:
+            decoded.append(data)
+            return json.loads(data)
+
+        wss = FakeWss(decoder=loads)
+        await wss.connect()
+
+        # no listeners: only the outer objects are decoded
+        wss.sockets[0].feed(status(), status(status=2))
+        await settle()
+        self.assertEqual(len(decoded), 2)
+        self.assertFalse(wss.status_wanted())
+
+        statuses: List[Dict[str, Any]] = []
+
+        @wss.wssreceiver(Streams.status)
+        async def server(msg: Dict[str, Any]) -> None:
+            statuses.append(msg)
+
+        wss.sockets[0].feed(status(status=2))
+        await settle()
+        await wss.close()
+
+        self.assertEqual(len(decoded), 4)
+        self.assertEqual(statuses[0]['status'], 2)
+
+    async def test_live(self) -> None:
+
+        atconn = AternosConnect()
+        atconn.session.cookies.set('ATERNOS_SESSION', '0123abcd')
+        atserv = AternosServer('test', atconn)
+        atserv.update(STATUS)
+
+        changes: List[Dict[str, Any]] = []
+        atserv.onchange(changes.append)
+
+        wss = FakeWss(atserv=atserv, live=True)
+        await wss.connect()
+        wss.sockets[0].feed(
+            status(),
+            status(status=2, lang='loading', players=1),
+        )
+        await settle()
+        await wss.close()
+
+        self.assertEqual(atserv.status, 'loading')
+        self.assertEqual(atserv.players_count, 1)
+        self.assertEqual(len(changes), 1)
+        self.assertEqual(changes[0]['status'], (1, 2))
+        self.assertEqual(set(changes[0]), {'status', 'lang', 'players'})
+
+    async def test_autoconfirm(self) -> None:
+
+        wss = FakeWss(autoconfirm=True)
+        release = threading.Event()
+        lines: List[str] = []
+
+        def confirm() -> None:
+            release.wait(1)
+            wss.atserv.confirms += 1  # type: ignore
+
+        wss.atserv.confirm = confirm  # type: ignore
+
+        @wss.wssreceiver(Streams.console)
+        async def console(msg: str) -> None:
+            lines.append(msg)
+
+        queueing = {
+            'class': 'queueing',
+            'queue': {'pending': 'pending'},
+        }
+
+        await wss.connect()
+        wss.sockets[0].feed(
+            status(**queueing), line('a'),
+            status(**queueing), line('b'),
+        )
+        await settle()
+
+        # the confirmation doesn't block the receiver
+        self.assertEqual(lines, ['a', 'b'])
+        self.assertFalse(wss.confirmed)
+
+        release.set()
+        await asyncio.wait_for(wss.confirming, 1)  # type: ignore
+        await settle()
+        self.assertTrue(wss.confirmed)
+        self.assertEqual(wss.atserv.confirms, 1)  # type: ignore
+
+        wss.sockets[0].feed(status(), status(**queueing))
+        await asyncio.sleep(0.05)
+        await wss.close()
+        self.assertEqual(wss.atserv.confirms, 2)  # type: ignore
+
+    async def test_autoconfirm_only(self) -> None:
+
+        # no other status or stream listeners
+        wss = FakeWss(autoconfirm=True)
+
+        def confirm() -> None:
+            wss.atserv.confirms += 1  # type: ignore
+
+        wss.atserv.confirm = confirm  # type: ignore
+
+        queueing = {
+            'class': 'queueing',
+            'queue': {'pending': 'pending'},
+        }
+
+        await wss.connect()
+        wss.sockets[0].feed(status(**queueing))
+        await asyncio.sleep(0.05)
+        self.assertEqual(wss.atserv.confirms, 1)  # type: ignore
+
+        wss.sockets[0].feed(status(), status(**queueing))
+        await asyncio.sleep(0.05)
+        await wss.close()
+        self.assertEqual(wss.atserv.confirms, 2)  # type: ignore
+
+    async def test_filters(self) -> None:
+
+        wss = FakeWss()
+        joins: List[str] = []
+        errors: List[str] = []
+        everything: List[str] = []
+
+        @wss.wssreceiver(Streams.console, pattern=r'\w+ joined the game')
+        async def join(msg: str) -> None:
+            joins.append(msg)
+
+        @wss.wssreceiver(Streams.console, keyword='ERROR')
+        async def error(msg: str) -> None:
+            errors.append(msg)
+
+        @wss.wssreceiver(Streams.console)
+        async def console(msg: str) -> None:
+            everything.append(msg)
+
+        @wss.wssreceiver(Streams.console, pattern=r'(?i)STEVE JOINED')
+        async def steve(msg: str) -> None:
+            joins.append(msg)
+
+        with self.assertRaises(ValueError):
+            wss.wssreceiver(Streams.status, keyword='online')
+
+        await wss.connect()
+        wss.sockets[0].feed(
+            line('[00:00:00] [Server thread/INFO]: Steve joined the game'),
+            line('[00:00:01] [Server thread/ERROR]: Oops'),
+            line('[00:00:02] [Server thread/INFO]: Done'),
+        )
+        await settle()
+        self.assertFalse(wss.msgs is not None and wss.msgs.done())
+        await wss.close()
+
+        self.assertEqual(len(joins), 2)
+        self.assertEqual(errors, ['[00:00:01] [Server thread/ERROR]: Oops'])
+        self.assertEqual(len(everything), 3)
+
+    async def test_bad_frames(self) -> None:
+
+        wss = FakeWss(reconnect=True)
+        lines: List[str] = []
+
+        class Failing(Sink):
+            async def feed(self, msg: Any) -> None:
+                if msg == 'boom':
+                    raise RuntimeError(msg)
+
+        wss.add_sink(Streams.console, Failing())
+
+        @wss.wssreceiver(Streams.console)
+        async def console(msg: str) -> None:
+            lines.append(msg)
+
+        await wss.connect()
+        with self.assertLogs('aternos', 'ERROR') as logs:
+            wss.sockets[0].feed(
+                'not json',
+                json.dumps({'stream': 'console'}),
+                json.dumps({'type': 'tick', 'data': {'averageTickTime': 0}}),
+                line('boom'),
+                line('a'),
+            )
+            await settle()
+
+        self.assertEqual(len(logs.records), 4)
+        self.assertEqual(lines, ['a'])
+        self.assertFalse(wss.msgs is not None and wss.msgs.done())
+        await wss.close()
+
+    async def test_half_open(self) -> None:
+
+        wss = FakeWss(reconnect=True, keepalive=None)
+        await wss.connect()
+
+        await wss.heartbeat()
+        self.assertIsNotNone(wss.rtt)
+        self.assertEqual(wss.rtt, wss.rtt_avg)
+
+        wss.pong_timeout = 0.01
+        wss.sockets[0].silent = True
+        await wss.heartbeat()
+        await asyncio.sleep(0.05)
+        await wss.close()
+
+        self.assertEqual(wss.half_open, 1)
+        self.assertEqual(len(wss.sockets), 2)
+        self.assertEqual(wss.reconnects, 1)
+
+
+class TestQueue(unittest.IsolatedAsyncioTestCase):
+
+    async def test_drop_oldest(self) -> None:
+
+        queue = MessageQueue(2, Overflow.drop_oldest)
+        for i in range(4):
+            await queue.put(i)
+
+        self.assertEqual(list(queue.items), [2, 3])
+        self.assertEqual(queue.dropped, 2)
+
+    async def test_coalesce(self) -> None:
+
+        queue = MessageQueue(2, Overflow.coalesce)
+        for i in range(4):
+            await queue.put(i)
+
+        self.assertEqual(list(queue.items), [0, 3])
+        self.assertEqual(queue.coalesced, 2)
+
+    async def test_block(self) -> None:
+
+        queue = MessageQueue(1)
+        await queue.put(0)
+        putter = asyncio.create_task(queue.put(1))
+        await settle()
+        self.assertFalse(putter.done())
+
+        self.assertEqual(await queue.get(), 0)
+        await putter
+        self.assertEqual(await queue.get(), 1)
+
+    async def test_workers(self) -> None:
+
+        wss = FakeWss(queue_size=10)
+        lines: List[str] = []
+        release = asyncio.Event()
+
+        @wss.wssreceiver(Streams.console)
+        async def console(msg: str) -> None:
+            await release.wait()
+            lines.append(msg)
+
+        await wss.connect()
+        wss.sockets[0].feed(*(line(str(i)) for i in range(5)))
+        await settle()
+
+        self.assertEqual(wss.queue_depths(), {'console.console': 4})
+        release.set()
+        await settle()
+        await wss.close()
+
+        self.assertEqual(lines, ['0', '1', '2', '3', '4'])
+
+
+class TestStream(unittest.IsolatedAsyncioTestCase):
+
+    async def test_iterate(self) -> None:
+
+        wss = FakeWss()
+        await wss.connect()
+        sub = wss.stream(Streams.console)
+        await settle()
+
+        self.assertIn(
+            {'stream': 'console', 'type': 'start'},
+            wss.sockets[0].sent,
+        )
+
+        wss.sockets[0].feed(line('a'), line('b'), line('c'))
+        received = []
+        async for msg in sub:
+            received.append(msg)
+            if len(received) == 2:
+                await sub.close()
+
+        self.assertEqual(received, ['a', 'b'])
+        self.assertEqual(wss.sinks[Streams.console], [])
+        await wss.close()
+
+    async def test_batches(self) -> None:
+
+        wss = FakeWss()
+        await wss.connect()
+        wss.sockets[0].feed(*(line(str(i)) for i in range(5)))
+
+        async with wss.stream(Streams.console, maxsize=3) as sub:
+            await settle()
+            self.assertEqual(await sub.get_many(2), ['0', '1'])
+            await settle()
+            self.assertEqual(await sub.get_many(10), ['2', '3', '4'])
+
+        await wss.close()
+
+    async def test_close(self) -> None:
+
+        wss = FakeWss()
+        await wss.connect()
+        sub = wss.stream(Streams.ram)
+
+        async def consume() -> List[int]:
+            return [msg async for msg in sub]
+
+        consumer = asyncio.create_task(consume())
+        wss.sockets[0].feed(json.dumps({
+            'stream': 'heap',
+            'type': 'heap',
+            'data': {'usage': 1024},
+        }))
+        await settle()
+        await wss.close()
+
+        self.assertEqual(await consumer, [1024])
+
+
+class TestBatch(unittest.IsolatedAsyncioTestCase):
+
+    async def test_size(self) -> None:
+
+        wss = FakeWss()
+        batches: List[List[str]] = []
+
+        @wss.wssbatcher(Streams.console, size=3, interval=10)
+        async def console(msgs: List[str]) -> None:
+            batches.append(msgs)
+
+        await wss.connect()
+        wss.sockets[0].feed(*(line(str(i)) for i in range(7)))
+        await settle()
+
+        self.assertEqual(batches, [['0', '1', '2'], ['3', '4', '5']])
+
+        # the remaining line is delivered on close
+        await wss.close()
+        self.assertEqual(batches[-1], ['6'])
+
+    async def test_close_in_flight(self) -> None:
+
+        batches: List[List[int]] = []
+
+        async def slow(msgs: List[int]) -> None:
+            await asyncio.sleep(0.02)
+            batches.append(msgs)
+
+        batcher = Batcher(slow, size=2)
+        for i in range(5):
+            await batcher.feed(i)
+        await settle()
+
+        # [0, 1] is being handled, [2, 3] is queued
+        await batcher.close()
+        self.assertEqual(batches, [[0, 1], [2, 3], [4]])
+
+    async def test_interval(self) -> None:
+
+        wss = FakeWss()
+        batches: List[List[str]] = []
+
+        @wss.wssbatcher(Streams.console, size=100, interval=0.02)
+        async def console(msgs: List[str]) -> None:
+            batches.append(msgs)
+
+        await wss.connect()
+        wss.sockets[0].feed(line('a'), line('b'))
+        await settle()
+        self.assertEqual(batches, [])
+
+        await asyncio.sleep(0.05)
+        self.assertEqual(batches, [['a', 'b']])
+        await wss.close()
+
+
+class TestCommand(unittest.IsolatedAsyncioTestCase):
+
+    async def test_quiet(self) -> None:
+
+        wss = FakeWss()
+        await wss.connect()
+        wss.sockets[0].feed(line('[23:28:27] [Server thread/INFO]: before'))
+
+        lines = await wss.command_result('/list', quiet=0.02)
+        await wss.close()
+
+        self.assertEqual(lines, [s.strip() for s in OUTPUT['list']])
+        self.assertEqual(
+            [msg['type'] for msg in wss.sockets[0].sent],
+            ['start', 'command'],
+        )
+
+    async def test_until(self) -> None:
+
+        wss = FakeWss()
+        await wss.connect()
+
+        lines, tps = await asyncio.gather(
+            wss.command_result('list', until='players online', quiet=0.02),
+            wss.command_result('tps', until=r'TPS from', timeout=1),
+        )
+        await wss.close()
+
+        self.assertEqual(lines, OUTPUT['list'][:1])
+        self.assertEqual(tps, OUTPUT['tps'])
+
+    async def test_timeout(self) -> None:
+
+        wss = FakeWss()
+        await wss.connect()
+
+        with self.assertRaises(asyncio.TimeoutError):
+            await wss.command_result('list', until='nothing', timeout=0.05)
+
+        await wss.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+
+import asyncio
+import unittest
+
+from typing import List
+
+from python_aternos.atwss import Streams
+from python_aternos.atwssmgr import WssManager, WssEvent
+from tests.test_wss import FakeWss, line, status
+
+
+class FakeWssN(FakeWss):
+
+    def __init__(self, servid: str, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.servid = servid
+
+
+class FlakyWss(FakeWssN):
+
+    def __init__(self, servid: str, failures: int, *args, **kwargs) -> None:
+        super().__init__(servid, *args, **kwargs)
+        self.failures = failures
+
+    async def open(self) -> None:
+        if self.failures > 0:
+            self.failures -= 1
+            raise OSError('Connection refused')
+        await super().open()
+
+
+class TestManager(unittest.IsolatedAsyncioTestCase):
+
+    async def test_events(self) -> None:
+
+        mgr = WssManager(streams=(Streams.console, Streams.status))
+        for i in range(3):
+            mgr.add(FakeWssN(f's{i}'))
+        await mgr.start()
+
+        events: List[WssEvent] = []
+        sub = mgr.events()
+
+        mgr['s1'].sockets[0].feed(line('hello'))
+        mgr['s2'].sockets[0].feed(status(status=2))
+
+        for _ in range(2):
+            events.append(await asyncio.wait_for(sub.get(), 1))
+
+        self.assertEqual(
+            {(e.servid, e.stream) for e in events},
+            {('s1', Streams.console), ('s2', Streams.status)},
+        )
+
+        # console stream is requested once the server is online
+        await asyncio.sleep(0.01)
+        self.assertIn(
+            {'stream': 'console', 'type': 'start'},
+            mgr['s2'].sockets[0].sent,
+        )
+
+        health = mgr.health()
+        self.assertEqual(health['servers'], 3)
+        self.assertEqual(health['connected'], 3)
+        self.assertEqual(health['received'], 2)
+        self.assertEqual(health['stale'], [])
+
+        # s0 has been connected without messages
+        mgr.stale = 0.005
+        health = mgr.health()
+        self.assertIn('s0', health['stale'])
+        self.assertIsNotNone(mgr.stats()['s0']['idle'])
+
+        await mgr.close()
+        with self.assertRaises(StopAsyncIteration):
+            await sub.__anext__()
+
+    async def test_initial_retry(self) -> None:
+
+        mgr = WssManager()
+        mgr.add(FlakyWss('s0', 2, reconnect=True))
+        mgr.add(FlakyWss('s1', 1))
+
+        with self.assertLogs('aternos', 'WARNING'):
+            await mgr.start()
+            await asyncio.sleep(0.1)
+
+        self.assertTrue(mgr['s0'].connected)
+        # without reconnect, the failure is only logged
+        self.assertFalse(mgr['s1'].connected)
+        await mgr.close()
+
+    async def test_wheel(self) -> None:
+
+        mgr = WssManager(keepalive=0.04, tick=0.01)
+        self.assertEqual(len(mgr.wheel), 4)
+
+        for i in range(8):
+            mgr.add(FakeWssN(f's{i}'))
+        self.assertEqual([len(slot) for slot in mgr.wheel], [2] * 4)
+
+        await mgr.start()
+        for wss in mgr:
+            self.assertIsNone(wss.keep)
+
+        await asyncio.sleep(0.1)
+        await mgr.close()
+
+        for wss in mgr:
+            pings = [
+                msg for msg in wss.sockets[0].sent
+                if msg == {'type': '❤'}
+            ]
+            self.assertGreaterEqual(len(pings), 1)
+
+    async def test_stagger(self) -> None:
+
+        mgr = WssManager(stagger=0.02, concurrency=2)
+        opened: List[float] = []
+        loop = asyncio.get_running_loop()
+
+        class Timed(FakeWssN):
+            async def open(self) -> None:
+                opened.append(loop.time())
+                await super().open()
+
+        for i in range(4):
+            mgr.add(Timed(f's{i}'))
+
+        await mgr.start()
+        await mgr.close()
+
+        self.assertEqual(len(opened), 4)
+        self.assertGreaterEqual(opened[-1] - opened[0], 0.05)
+
+    async def test_remove(self) -> None:
+
+        mgr = WssManager()
+        wss = mgr.add(FakeWssN('a'))
+        with self.assertRaises(KeyError):
+            mgr.add(FakeWssN('a'))
+
+        await mgr.start()
+        await mgr.remove('a')
+
+        self.assertNotIn('a', mgr)
+        self.assertFalse(wss.connected)
+        self.assertFalse(any(mgr.wheel))
+        self.assertEqual(wss.sinks[Streams.status], [])
+        await mgr.close()
+
+
+if __name__ == '__main__':
+    unittest.main()